@@ -30,6 +30,14 @@ def create_app(config_name=None):
     if os.getenv('MAIL_PASSWORD') is None or os.getenv('MAIL_PASSWORD') == "":
         raise ValueError("MAIL_PASSWORD is not set")
 
+    # Uploads are handed to workers by reference, so web and worker must point at the same shared volume
+    if os.getenv('BLOB_STORE_DIR') is None or os.getenv('BLOB_STORE_DIR') == "":
+        raise ValueError("BLOB_STORE_DIR is not set")
+
+    # Workers write proxy renders that the web process serves, so they need a shared directory too
+    if os.getenv('PROXY_CACHE_DIR') is None or os.getenv('PROXY_CACHE_DIR') == "":
+        raise ValueError("PROXY_CACHE_DIR is not set")
+
     # Initialize SQLAlchemy
     db.init_app(app)
 
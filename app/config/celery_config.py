@@ -3,6 +3,8 @@ import os
 from celery import Celery
 from dotenv import load_dotenv
 
+from app.utils.constant import RENDER_QUEUE
+
 load_dotenv()
 
 
@@ -32,6 +34,9 @@ def make_celery(app_name=__name__):
         worker_prefetch_multiplier=1,
         task_acks_late=True,
         worker_max_tasks_per_child=1000,
+        task_routes={
+            'app.tasks.video_tasks.render_image_effect': {'queue': RENDER_QUEUE},
+        },
         broker_pool_limit=50,
         redis_max_connections=100,
         broker_connection_timeout=10,
@@ -0,0 +1,48 @@
+from flask import jsonify, request
+from flask_jwt_extended import jwt_required
+
+from app.config.logging_config import setup_logging
+from app.models import Audio
+from app.utils.audio_peaks import select_peaks_level
+from app.utils.exceptions import BadRequestException, ForbiddenException, ResourceNotFoundException
+from app.utils.jwt_helpers import get_user_id_from_jwt
+
+logger = setup_logging()
+
+
+@jwt_required()
+def get_audio_peaks(audio_id):
+    audio = Audio.query.get(audio_id)
+    if not audio:
+        logger.error(f"Get audio peaks failed: Audio {audio_id} not found")
+        raise ResourceNotFoundException("Audio not found")
+
+    if audio.user_id != get_user_id_from_jwt():
+        logger.error(f"Get audio peaks failed: Audio {audio_id} does not belong to the current user")
+        raise ForbiddenException("Access denied")
+
+    if not audio.peaks:
+        logger.error(f"Get audio peaks failed: No peaks computed for audio {audio_id}")
+        raise ResourceNotFoundException("Waveform peaks not available for this audio")
+
+    width = request.args.get('width')
+    if width is not None:
+        try:
+            width = int(width)
+            if width <= 0:
+                raise ValueError
+        except ValueError:
+            logger.error(f"Get audio peaks failed: Invalid width {width}")
+            raise BadRequestException("width must be a positive integer.")
+
+    level = select_peaks_level(audio.peaks, width)
+    return jsonify({
+        'audio_id': audio.id,
+        'sample_rate': audio.peaks.get('sample_rate'),
+        'channels': audio.peaks.get('channels'),
+        'duration': audio.peaks.get('duration'),
+        'bits': audio.peaks.get('bits'),
+        'samples_per_bucket': level['samples_per_bucket'] if level else None,
+        'length': level['length'] if level else 0,
+        'data': level['data'] if level else []
+    }), 200
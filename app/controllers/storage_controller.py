@@ -0,0 +1,23 @@
+from flask import send_file
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import LOCAL_STORAGE_BACKEND
+from app.utils.exceptions import ResourceNotFoundException
+from app.utils.upload.storage import StorageError, get_storage
+
+logger = setup_logging()
+
+
+def get_stored_file(key):
+    # Public like Cloudinary delivery URLs, since renders fetch stored assets by URL
+    storage = get_storage()
+    if storage.name != LOCAL_STORAGE_BACKEND:
+        raise ResourceNotFoundException("File not found")
+
+    try:
+        path = storage.local_path(key)
+    except StorageError as e:
+        logger.error(f"Get stored file failed: {e}")
+        raise ResourceNotFoundException("File not found")
+
+    return send_file(path, conditional=True)
@@ -4,13 +4,13 @@ import subprocess
 import threading
 from uuid import uuid4
 
-import cloudinary
-import cloudinary.uploader
 from flask import after_this_request, g, jsonify, request, send_file
 from flask_jwt_extended import get_jwt_identity, jwt_required
 
+from app.config.extensions import db
 from app.config.logging_config import setup_logging
-from app.models import User
+from app.models import Audio, User
+from app.utils.audio_peaks import compute_audio_peaks
 from app.utils.constant import ALL, AUDIO_FOLDER, EDGE_ENGINE, FEMALE, MALE, SRT_FOLDER, TIKTOK_ENGINE
 from app.utils.exceptions import (
     BadRequestException,
@@ -21,10 +21,12 @@ from app.utils.exceptions import (
     ServiceUnavailableException,
 )
 from app.utils.function_helpers import convert_audio_to_text
+from app.utils.upload.storage import get_storage
 from app.utils.voice.edge_voices import EDGE_FORMATTED_VOICES
 from app.utils.voice.tiktok_tts import TikTokTTS
 from app.utils.voice.tiktok_voices import TIKTOK_FORMATTED_VOICES
 from app.utils.whisper_support_language import whisper_support_language
+from app.utils.workspace import ScratchWorkspace
 
 logger = setup_logging()
 
@@ -517,7 +519,9 @@ def cleanup_files(files_to_delete):
 def concatenate_and_upload():
     temp_files = []
     output_filename = None
+    workspace = ScratchWorkspace()
     try:
+        workspace.open()
         files = request.files
         language = request.form.get("language")
         model = request.form.get("model")
@@ -532,7 +536,7 @@ def concatenate_and_upload():
                     index = int(key.split("_")[-1])
                     file = files[key]
                     if file and file.filename:
-                        temp_filename = os.path.join(os.getcwd(), f"{uuid4()}.mp3")
+                        temp_filename = workspace.file(f"{uuid4()}.mp3")
                         file.save(temp_filename)
                         file_paths_ordered[index] = temp_filename
                         temp_files.append(temp_filename)
@@ -554,11 +558,11 @@ def concatenate_and_upload():
             logger.error("Concatenate and upload failed: No audio files to process after sorting.")
             raise ResourceNotFoundException("No audio files to process after sorting")
 
-        output_filename = os.path.join(os.getcwd(), f"final_{uuid4()}.mp3")
+        output_filename = workspace.file(f"final_{uuid4()}.mp3")
         temp_files.append(output_filename)
 
         # Create the concat file list for ffmpeg
-        concat_list_path = os.path.join(os.getcwd(), f"concat_list_{uuid4()}.txt")
+        concat_list_path = workspace.file(f"concat_list_{uuid4()}.txt")
         temp_files.append(concat_list_path)
         try:
             with open(concat_list_path, 'w') as f:
@@ -602,26 +606,32 @@ def concatenate_and_upload():
             logger.error(f"Concatenated file not found or empty: {output_filename}")
             raise InternalServerException("Failed to create final audio file")
 
-        logger.info(f"Uploading {output_filename} to Cloudinary...")
+        logger.info(f"Uploading {output_filename} to storage...")
         try:
             unique_id = str(uuid4())
             current_user = get_jwt_identity()
             user = User.query.get(current_user)
             public_id = f"{AUDIO_FOLDER}/{user.id}/{unique_id}"
-            upload_options = {
-                "resource_type": "video",
-                "public_id": public_id,
-                "overwrite": True,
-            }
-            upload_result = cloudinary.uploader.upload(output_filename, **upload_options)
-            logger.info("Upload to Cloudinary successful.")
-            logger.debug("Cloudinary upload result: %s", upload_result)
+            upload_result = get_storage().put(output_filename, public_id, resource_type="video", overwrite=True)
+            logger.info("Upload to storage successful.")
+            logger.debug("Storage upload result: %s", upload_result)
 
-            final_url = upload_result.get('secure_url')
+            final_url = upload_result.get('url')
             if not final_url:
-                logger.error("Cloudinary upload result missing secure_url")
+                logger.error("Storage upload result missing url")
                 raise InternalServerException("Upload succeeded but failed to get URL")
 
+            peaks = None
+            try:
+                peaks = compute_audio_peaks(output_filename)
+            except Exception as peaks_err:
+                logger.warning(f"Could not compute waveform peaks for {output_filename}: {peaks_err}")
+
+            audio = Audio(user_id=user.id, url=final_url, title=f"Narration_{unique_id}", peaks=peaks)
+            db.session.add(audio)
+            db.session.commit()
+            logger.info(f"Audio record saved with ID: {audio.id}")
+
             language_supported = True
             if language not in whisper_support_language:
                 language_supported = False
@@ -629,11 +639,12 @@ def concatenate_and_upload():
                 logger.warning(f"Language '{language}' is not supported.")
                 return jsonify({
                     "cloudinary_url": final_url,
+                    "audio_id": audio.id,
                     "language_supported": language_supported,
                 }), 200
 
             srt_file_path, segments_json = convert_audio_to_text(
-                output_filename, language, model
+                output_filename, language, model, workspace.path
             )
 
             srt_public_id = f"{SRT_FOLDER}/{user.id}/{unique_id}_srt"
@@ -654,14 +665,16 @@ def concatenate_and_upload():
 
             return jsonify({
                 "cloudinary_url": final_url,
+                "audio_id": audio.id,
                 "language_supported": language_supported,
                 "srt_url": "srt_url",
                 "srt_json": segments_json,
             }), 200
 
         except Exception as e:
-            logger.error(f"Cloudinary upload failed: {e}", exc_info=True)
+            logger.error(f"Storage upload failed: {e}", exc_info=True)
             raise InternalServerException("Failed to upload final audio to storage")
 
     finally:
         cleanup_files(temp_files)
+        workspace.close()
@@ -1,7 +1,5 @@
 from uuid import uuid4
 
-import cloudinary
-import cloudinary.uploader
 from flask import jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from werkzeug.utils import secure_filename
@@ -9,6 +7,7 @@ from werkzeug.utils import secure_filename
 from app.config.logging_config import setup_logging
 from app.models import User
 from app.tasks.upload_tasks import process_avatar_upload, process_video_upload
+from app.utils.blob_store import put_blob, release_blob
 from app.utils.constant import ALLOWED_AUDIO_EXTENSIONS, ALLOWED_IMAGE_EXTENSIONS, ALLOWED_VIDEO_EXTENSIONS
 from app.utils.exceptions import (
     BadRequestException,
@@ -17,6 +16,7 @@ from app.utils.exceptions import (
     ResourceNotFoundException,
 )
 from app.utils.function_helpers import allowed_file
+from app.utils.upload.storage import StorageError, get_storage
 
 logger = setup_logging()
 
@@ -56,10 +56,15 @@ def upload_avatar():
             raise ResourceNotFoundException(f"User with id {user_id} not found in database.")
 
         filename = secure_filename(original_filename)
-        file_data = file.read()
+        # The task only receives a reference; the worker reads the upload from the shared blob store
+        blob_id = put_blob(file.stream, filename)
 
         logger.info(f"Dispatching avatar upload task for user_id: {user.id}, secured filename: {filename}.")
-        task = process_avatar_upload.delay(user.id, file_data)
+        try:
+            task = process_avatar_upload.delay(user.id, blob_id)
+        except Exception:
+            release_blob(blob_id)
+            raise
         logger.info(f"Successfully dispatched avatar upload task for user_id: {user.id}. Task ID: {task.id}")
 
         return jsonify({
@@ -112,10 +117,14 @@ def upload_video():
             raise ResourceNotFoundException(f"User with id {user_id} not found in database.")
 
         filename = secure_filename(original_filename)
-        file_data = file.read()
+        blob_id = put_blob(file.stream, filename)
 
         logger.info(f"Dispatching video upload task for user_id: {user.id}, filename: {filename}, title: {title}.")
-        task = process_video_upload.delay(user.id, file_data, filename, title)
+        try:
+            task = process_video_upload.delay(user.id, blob_id, filename, title)
+        except Exception:
+            release_blob(blob_id)
+            raise
         logger.info(f"Successfully dispatched video upload task for user_id: {user.id}. Task ID: {task.id}")
 
         return jsonify({
@@ -161,30 +170,30 @@ def upload_paragraph_audio():
         public_id = f"paragraph_audio_previews/{user_id}/{unique_id}"
 
         logger.info(
-            f"Uploading paragraph audio '{original_filename}' for user {user_id} to Cloudinary (public_id: {public_id}, resource_type: video).")
+            f"Uploading paragraph audio '{original_filename}' for user {user_id} to storage (public_id: {public_id}, resource_type: video).")
 
-        upload_result = cloudinary.uploader.upload(
+        upload_result = get_storage().put(
             file.stream,
+            public_id,
             resource_type="video",
-            public_id=public_id,
             overwrite=True,
             chunk_size=6000000
         )
-        secure_url = upload_result.get('secure_url')
+        secure_url = upload_result.get('url')
 
         if not secure_url:
             logger.error(
-                f"Cloudinary upload failed for paragraph audio '{original_filename}', user {user_id}. No secure_url returned.")
-            raise InternalServerException("Cloudinary upload failed")
+                f"Storage upload failed for paragraph audio '{original_filename}', user {user_id}. No url returned.")
+            raise InternalServerException("Storage upload failed")
 
         logger.info(
             f"Successfully uploaded paragraph audio '{original_filename}' for user {user_id}. URL: {secure_url}")
 
         return jsonify({'url': secure_url}), 200
 
-    except cloudinary.exceptions.Error as e:
+    except StorageError as e:
         logger.error(
-            f"Cloudinary API error during paragraph audio upload for user {user_id if user_id else 'unknown'}: {e}",
+            f"Storage error during paragraph audio upload for user {user_id if user_id else 'unknown'}: {e}",
             exc_info=True)
         raise InternalServerException("Unexpected error during upload")
     except Exception as e:
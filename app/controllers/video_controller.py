@@ -1,15 +1,28 @@
 import math
+import os
 
 from celery.result import AsyncResult
-from flask import jsonify, request, url_for
+from flask import jsonify, request, send_file, url_for
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from werkzeug.utils import secure_filename
 
 from app.config.extensions import celery, db
 from app.config.logging_config import setup_logging
 from app.models import Video
-from app.tasks.video_tasks import concat_video, process_image_to_video_effects
-from app.utils.constant import ALLOWED_IMAGE_EXTENSIONS
+from app.tasks.video_tasks import concat_video, process_image_to_video_effects, render_proxy_video
+from app.utils.blob_store import blob_size, put_blob, release_blob
+from app.utils.constant import (
+    ALLOWED_IMAGE_EXTENSIONS,
+    DEFAULT_ENCODER_PROFILE,
+    DEFAULT_OUTPUT_PROFILE,
+    EFFECT_TRANSITION_DURATION,
+    EFFECTS_TO_APPLY,
+    ENCODER_PROFILES,
+    MAX_TRANSITION_DURATION,
+    MAX_ZOOM_FACTOR,
+    OUTPUT_PROFILES,
+    ZOOM_FACTOR,
+)
 from app.utils.exceptions import (
     BadRequestException,
     InternalServerException,
@@ -18,6 +31,8 @@ from app.utils.exceptions import (
 )
 from app.utils.function_helpers import allowed_file
 from app.utils.jwt_helpers import get_user_from_jwt
+from app.utils.video.effects import SUPPORTED_EFFECTS
+from app.utils.video.proxy import load_proxy
 
 logger = setup_logging()
 
@@ -91,11 +106,17 @@ def duplicate_video(video_id):
     data = request.get_json()
     title = data.get('title', 'Untitled')
 
+    # The copy points at the same stored files, so it shares the original's renditions and previews
     new_video = Video(
         user_id=video.user_id,
         url=video.url,
         title=title,
-        starred=video.starred
+        starred=video.starred,
+        hls_url=video.hls_url,
+        poster_url=video.poster_url,
+        sprite_url=video.sprite_url,
+        sprite_vtt_url=video.sprite_vtt_url,
+        media_info=video.media_info
     )
     db.session.add(new_video)
     db.session.commit()
@@ -104,6 +125,38 @@ def duplicate_video(video_id):
     return jsonify(new_video.to_dict()), 201
 
 
+def _parse_effect_options(user_id):
+    # Effects may be repeated form fields or comma-separated; the default is every effect
+    effects = []
+    for value in request.form.getlist('effects'):
+        for effect_type in value.split(','):
+            effect_type = effect_type.strip()
+            if effect_type and effect_type not in effects:
+                effects.append(effect_type)
+    effects = effects or list(EFFECTS_TO_APPLY)
+    unknown = [effect_type for effect_type in effects if effect_type not in SUPPORTED_EFFECTS]
+    if unknown:
+        logger.error(f"Generate video effects failed for user {user_id}: Unknown effects {unknown}.")
+        raise BadRequestException(f"effects must be chosen from: {', '.join(SUPPORTED_EFFECTS)}.")
+
+    try:
+        zoom_factor = float(request.form.get('zoom_factor') or ZOOM_FACTOR)
+        transition_duration = float(request.form.get('transition_duration') or EFFECT_TRANSITION_DURATION)
+    except ValueError:
+        logger.error(f"Generate video effects failed for user {user_id}: Invalid zoom_factor or transition_duration.")
+        raise BadRequestException("zoom_factor and transition_duration must be valid numbers.")
+
+    if not 1 <= zoom_factor <= MAX_ZOOM_FACTOR:
+        logger.error(f"Generate video effects failed for user {user_id}: Invalid zoom_factor {zoom_factor}.")
+        raise BadRequestException(f"zoom_factor must be between 1 and {MAX_ZOOM_FACTOR}.")
+    if not 0 <= transition_duration <= MAX_TRANSITION_DURATION:
+        logger.error(
+            f"Generate video effects failed for user {user_id}: Invalid transition_duration {transition_duration}.")
+        raise BadRequestException(f"transition_duration must be between 0 and {MAX_TRANSITION_DURATION} seconds.")
+
+    return {'effects': effects, 'zoom_factor': zoom_factor, 'transition_duration': transition_duration}
+
+
 @jwt_required()
 def generate_videos_effect_from_image():
     user = get_user_from_jwt()
@@ -133,6 +186,20 @@ def generate_videos_effect_from_image():
         raise BadRequestException("duration must be a valid number.")
 
     duration = int(math.ceil(duration))
+
+    encoder_profile = request.form.get('profile') or DEFAULT_ENCODER_PROFILE
+    if encoder_profile not in ENCODER_PROFILES:
+        logger.error(f"Generate video effects failed for user {user.id}: Unknown encoder profile {encoder_profile}.")
+        raise BadRequestException(f"profile must be one of: {', '.join(ENCODER_PROFILES)}.")
+
+    output_profile = request.form.get('output') or DEFAULT_OUTPUT_PROFILE
+    if output_profile not in OUTPUT_PROFILES:
+        logger.error(f"Generate video effects failed for user {user.id}: Unknown output profile {output_profile}.")
+        raise BadRequestException(f"output must be one of: {', '.join(OUTPUT_PROFILES)}.")
+
+    # Validated before any file is read, so a bad option costs nothing
+    effect_options = _parse_effect_options(user.id)
+
     files = request.files.getlist('images')
     if not files or all(f.filename == '' for f in files):
         logger.error(f"Generate video effects failed for user {user.id}: No files selected.")
@@ -147,12 +214,14 @@ def generate_videos_effect_from_image():
         if file and file.filename and allowed_file(file.filename, ALLOWED_IMAGE_EXTENSIONS):
             filename = secure_filename(file.filename)
             try:
-                file_data = file.read()
-                if not file_data:
+                # Written once to the shared blob store; tasks are only handed its id
+                blob_id = put_blob(file.stream, filename)
+                if not blob_size(blob_id):
+                    release_blob(blob_id)
                     logger.warning(f"Skipping empty file: {filename} for user {user.id}")
                     continue
                 # Store valid file info for second pass
-                valid_files.append({'file': file, 'filename': filename, 'file_data': file_data})
+                valid_files.append({'file': file, 'filename': filename, 'blob_id': blob_id})
                 processed_files += 1
             except Exception as e:
                 logger.error(f"Error reading file '{filename}' for user {user.id}: {e}", exc_info=True)
@@ -191,11 +260,12 @@ def generate_videos_effect_from_image():
     # Second pass: Submit tasks for valid files
     for valid_file in valid_files:
         filename = valid_file['filename']
-        file_data = valid_file['file_data']
+        blob_id = valid_file['blob_id']
         try:
             # Submit task to Celery with duration_per_part
             task = process_image_to_video_effects.apply_async(
-                args=[user.id, file_data, filename, duration_per_part]
+                args=[user.id, blob_id, filename, duration_per_part, encoder_profile, output_profile],
+                kwargs=effect_options
             )
             tasks.append({
                 'task_id': task.id,
@@ -205,6 +275,7 @@ def generate_videos_effect_from_image():
             logger.info(f"Submitted task {task.id} for file {filename} for user {user.id}")
         except Exception as e:
             logger.error(f"Error submitting task for file '{filename}' for user {user.id}: {e}", exc_info=True)
+            release_blob(blob_id)
             tasks.append({
                 'task_id': None,
                 'filename': filename,
@@ -336,9 +407,49 @@ def generate_video_with_ffmpeg():
     data = request.get_json()
     logger.info("Data received for video generation: %s", data)
 
+    if data.get('proxy'):
+        try:
+            task = render_proxy_video.apply_async(
+                args=[user.id, data]
+            )
+            logger.info(f"Submitted proxy render task {task.id} for user {user.id}")
+            return jsonify({
+                'success': True,
+                'msg': 'Proxy render task submitted successfully.',
+                'task_id': task.id,
+                'status_url': url_for('video.check_video_concat_status', task_id=task.id, _external=True)
+            })
+        except Exception as e:
+            logger.error(f"Error submitting proxy render task for user {user.id}: {e}", exc_info=True)
+            raise InternalServerException(f"Error submitting proxy render task for user {user.id}")
+
+    # A final render can reuse the exact timeline a proxy was rendered from
+    proxy_id = data.get('proxyId')
+    if proxy_id:
+        proxy = load_proxy(proxy_id)
+        if not proxy or proxy.get('user_id') != user.id:
+            logger.error(f"Generate video failed for user {user.id}: Proxy {proxy_id} not found or expired.")
+            raise ResourceNotFoundException("Proxy not found or expired")
+        data = dict(proxy['timeline'], proxy=False, profile=data.get('profile'), outputs=data.get('outputs'))
+
+    encoder_profile = data.get('profile') or DEFAULT_ENCODER_PROFILE
+    if encoder_profile not in ENCODER_PROFILES:
+        logger.error(f"Generate video failed for user {user.id}: Unknown encoder profile {encoder_profile}.")
+        raise BadRequestException(f"profile must be one of: {', '.join(ENCODER_PROFILES)}.")
+
+    # One render can produce several aspect ratios, e.g. ["landscape", "portrait"] for YouTube and Shorts
+    output_profiles = data.get('outputs') or [DEFAULT_OUTPUT_PROFILE]
+    if isinstance(output_profiles, str):
+        output_profiles = [output_profiles]
+    if not isinstance(output_profiles, list) or any(
+            not isinstance(output, str) or output not in OUTPUT_PROFILES for output in output_profiles):
+        logger.error(f"Generate video failed for user {user.id}: Unknown output profiles {output_profiles}.")
+        raise BadRequestException(f"outputs must be chosen from: {', '.join(OUTPUT_PROFILES)}.")
+    output_profiles = list(dict.fromkeys(output_profiles))
+
     try:
         task = concat_video.apply_async(
-            args=[user.id, data]
+            args=[user.id, data, encoder_profile, output_profiles]
         )
         logger.info(f"Submitted video generation task {task.id} for user {user.id}")
         return jsonify({
@@ -363,7 +474,12 @@ def check_video_concat_status(task_id):
         'completed': False,
         'msg': 'Task status unknown or processing...',
         'video_url': None,
-        'video_id': None
+        'video_id': None,
+        'hls_url': None,
+        'poster_url': None,
+        'sprite_vtt_url': None,
+        'outputs': [],
+        'proxy_id': None
     }
 
     if task_result.state == 'PENDING':
@@ -377,7 +493,17 @@ def check_video_concat_status(task_id):
         if result and isinstance(result, dict) and result.get('success'):
             video_url = result.get('url')
             video_id_from_task = result.get('video_id')
-            if video_url and video_id_from_task:
+            proxy_id = result.get('proxy_id')
+            if proxy_id:
+                logger.info(f"Proxy render task {task_id} completed successfully. Proxy ID: {proxy_id}")
+                response.update({
+                    'success': True,
+                    'completed': True,
+                    'msg': 'Proxy render task completed successfully.',
+                    'video_url': url_for('video.get_proxy_video', proxy_id=proxy_id, _external=True),
+                    'proxy_id': proxy_id
+                })
+            elif video_url and video_id_from_task:
                 logger.info(
                     f"Video concat task {task_id} completed successfully. URL: {video_url}, Video ID: {video_id_from_task}")
                 response.update({
@@ -385,7 +511,11 @@ def check_video_concat_status(task_id):
                     'completed': True,
                     'msg': 'Video concatenation task completed successfully.',
                     'video_url': video_url,
-                    'video_id': video_id_from_task
+                    'video_id': video_id_from_task,
+                    'hls_url': result.get('hls_url'),
+                    'poster_url': result.get('poster_url'),
+                    'sprite_vtt_url': result.get('sprite_vtt_url'),
+                    'outputs': result.get('outputs') or []
                 })
             else:
                 logger.error(
@@ -424,6 +554,15 @@ def check_video_concat_status(task_id):
             'msg': 'Video concatenation task failed during execution.',
             'error': str(task_result.info)
         })
+    elif task_result.state == 'RENDERING':
+        meta = task_result.info if isinstance(task_result.info, dict) else {}
+        logger.info(f"Video concat task {task_id} is rendering: {meta.get('current', 0)}%")
+        response.update({
+            'success': True,
+            'msg': meta.get('status', 'Video is rendering...'),
+            'progress': meta.get('current', 0),
+            'eta_seconds': meta.get('eta_seconds')
+        })
     elif task_result.state == 'RETRY':
         logger.info(f"Video concat task is being retried: {task_id}")
         response.update({
@@ -438,3 +577,18 @@ def check_video_concat_status(task_id):
         })
 
     return jsonify(response)
+
+
+@jwt_required()
+def get_proxy_video(proxy_id):
+    user = get_user_from_jwt()
+    if user is None:
+        logger.error("Get proxy video failed: User not found.")
+        raise ResourceNotFoundException("User not found")
+
+    proxy = load_proxy(proxy_id)
+    if not proxy or proxy.get('user_id') != user.id or not os.path.exists(proxy['video_path']):
+        logger.error(f"Get proxy video failed for user {user.id}: Proxy {proxy_id} not found or expired.")
+        raise ResourceNotFoundException("Proxy not found or expired")
+
+    return send_file(proxy['video_path'], mimetype="video/mp4", as_attachment=False)
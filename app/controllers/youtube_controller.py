@@ -1,8 +1,5 @@
-import os
 import re
-import tempfile
 from urllib.parse import parse_qs, urlparse
-from uuid import uuid4
 
 import google.oauth2.credentials
 import google_auth_oauthlib.flow
@@ -16,6 +13,7 @@ from app.config.extensions import celery, db
 from app.config.logging_config import setup_logging
 from app.models import YoutubeUpload
 from app.tasks.youtube_tasks import upload_from_file_task, upload_from_url_task
+from app.utils.blob_store import put_blob, release_blob
 from app.utils.constant import API_SERVICE_NAME, API_VERSION, CLIENT_SECRETS_FILE, FRONTEND_URL, SCOPES
 from app.utils.exceptions import (
     ForbiddenException,
@@ -176,7 +174,7 @@ def upload_video():
     }
 
     task = None
-    temp_file_to_delete = None
+    blob_to_release = None
 
     try:
         if request.is_json:
@@ -214,24 +212,22 @@ def upload_video():
                 'privacyStatus': request.form.get('privacy_status', metadata['privacyStatus'])
             })
 
-            temp_dir = tempfile.gettempdir()
-            temp_filename = os.path.join(temp_dir,
-                                         f"upload_{uuid4().hex}{os.path.splitext(video_file.filename)[1]}")
-            video_file.save(temp_filename)
-            temp_file_to_delete = temp_filename
+            # The worker may run on another host, so the file goes to the shared blob store, not the local temp dir
+            blob_id = put_blob(video_file.stream, video_file.filename)
+            blob_to_release = blob_id
 
             task = upload_from_file_task.apply_async(
-                args=[user_id, credentials_dict, temp_filename, metadata]
+                args=[user_id, credentials_dict, blob_id, metadata]
             )
-            temp_file_to_delete = None
+            blob_to_release = None
 
     except Exception as e:
         logger.error(f"Error initiating upload task: {e}", exc_info=True)
-        if temp_file_to_delete and os.path.exists(temp_file_to_delete):
+        if blob_to_release:
             try:
-                os.remove(temp_file_to_delete)
+                release_blob(blob_to_release)
             except OSError as rm_err:
-                logger.error(f"Error removing temp file during exception: {rm_err}", exc_info=True)
+                logger.error(f"Error releasing uploaded file during exception: {rm_err}", exc_info=True)
         raise InternalServerException(f'Failed to start upload task: {str(e)}')
 
     if task:
@@ -1,5 +1,5 @@
 from sqlalchemy import ForeignKey, func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import column_property, deferred, relationship
 
 from app.config.extensions import db
 
@@ -12,16 +12,23 @@ class Audio(db.Model):
     title = db.Column(db.String(255), nullable=True)
     url = db.Column(db.String(255), nullable=False)
     starred = db.Column(db.Boolean, default=False)
+    # Waveforms run to hundreds of KB and only the peaks endpoint reads them, so listings load just whether one exists.
+    # Missing peaks are stored as SQL NULL rather than JSON null, which has_peaks relies on
+    peaks = deferred(db.Column(db.JSON(none_as_null=True), nullable=True))
+    has_peaks = column_property(peaks.columns[0].isnot(None))
+    media_info = db.Column(db.JSON(none_as_null=True), nullable=True)
     created_at = db.Column(db.DateTime(timezone=True), default=func.now())
     updated_at = db.Column(db.DateTime(timezone=True), onupdate=func.now(), default=func.now())
 
     user = relationship('User', back_populates='audios')
 
-    def __init__(self, user_id, url, title=None, starred=False):
+    def __init__(self, user_id, url, title=None, starred=False, peaks=None, media_info=None):
         self.user_id = user_id
         self.url = url
         self.title = title
         self.starred = starred
+        self.peaks = peaks
+        self.media_info = media_info
 
     def __repr__(self):
         return f'<ID: {self.id}, User ID: {self.user_id}, Title: {self.title}>, URL: {self.url}>'
@@ -33,6 +40,8 @@ class Audio(db.Model):
             'title': self.title,
             'url': self.url,
             'starred': self.starred,
+            'has_peaks': self.has_peaks,
+            'media_info': self.media_info,
             'created_at': self.created_at,
             'updated_at': self.updated_at
         }
@@ -10,14 +10,16 @@ class Image(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, ForeignKey('users.id'), nullable=False)
     url = db.Column(db.String(255), nullable=False)
+    media_info = db.Column(db.JSON(none_as_null=True), nullable=True)
     created_at = db.Column(db.DateTime(timezone=True), default=func.now())
     updated_at = db.Column(db.DateTime(timezone=True), onupdate=func.now(), default=func.now())
 
     user = relationship('User', back_populates='images')
 
-    def __init__(self, user_id, url):
+    def __init__(self, user_id, url, media_info=None):
         self.user_id = user_id
         self.url = url
+        self.media_info = media_info
 
     def __repr__(self):
         return f'<ID: {self.id}, User ID: {self.user_id}, URL: {self.url}>'
@@ -27,6 +29,7 @@ class Image(db.Model):
             'id': self.id,
             'user_id': self.user_id,
             'url': self.url,
+            'media_info': self.media_info,
             'created_at': self.created_at,
             'updated_at': self.updated_at
         }
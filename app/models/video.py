@@ -11,17 +11,28 @@ class Video(db.Model):
     user_id = db.Column(db.Integer, ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(255), nullable=True)
     url = db.Column(db.String(255), nullable=False)
+    hls_url = db.Column(db.String(255), nullable=True)
+    poster_url = db.Column(db.String(255), nullable=True)
+    sprite_url = db.Column(db.String(255), nullable=True)
+    sprite_vtt_url = db.Column(db.String(255), nullable=True)
+    media_info = db.Column(db.JSON(none_as_null=True), nullable=True)
     starred = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime(timezone=True), default=func.now())
     updated_at = db.Column(db.DateTime(timezone=True), onupdate=func.now(), default=func.now())
 
     user = relationship('User', back_populates='videos')
 
-    def __init__(self, user_id, url, title=None, starred=False):
+    def __init__(self, user_id, url, title=None, starred=False, hls_url=None, poster_url=None, sprite_url=None,
+                 sprite_vtt_url=None, media_info=None):
         self.user_id = user_id
         self.url = url
         self.title = title
         self.starred = starred
+        self.hls_url = hls_url
+        self.poster_url = poster_url
+        self.sprite_url = sprite_url
+        self.sprite_vtt_url = sprite_vtt_url
+        self.media_info = media_info
 
     def __repr__(self):
         return f'<ID: {self.id}, User ID: {self.user_id}, Title: {self.title}>, URL: {self.url}>'
@@ -32,6 +43,11 @@ class Video(db.Model):
             'user_id': self.user_id,
             'title': self.title,
             'url': self.url,
+            'hls_url': self.hls_url,
+            'poster_url': self.poster_url,
+            'sprite_url': self.sprite_url,
+            'sprite_vtt_url': self.sprite_vtt_url,
+            'media_info': self.media_info,
             'starred': self.starred,
             'created_at': self.created_at,
             'updated_at': self.updated_at
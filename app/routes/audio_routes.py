@@ -0,0 +1,7 @@
+from flask import Blueprint
+
+from app.controllers.audio_controller import get_audio_peaks
+
+audio_bp = Blueprint('audio', __name__, url_prefix='/audios')
+
+audio_bp.route('/<int:audio_id>/peaks', methods=['GET'])(get_audio_peaks)
@@ -0,0 +1,7 @@
+from flask import Blueprint
+
+from app.controllers.storage_controller import get_stored_file
+
+storage_bp = Blueprint('storage', __name__, url_prefix='/storage')
+
+storage_bp.route('/<path:key>', methods=['GET'])(get_stored_file)
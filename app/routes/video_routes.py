@@ -8,6 +8,7 @@ from app.controllers.video_controller import (
     duplicate_video,
     generate_video_with_ffmpeg,
     generate_videos_effect_from_image,
+    get_proxy_video,
     get_user_videos,
     update_video,
 )
@@ -23,3 +24,4 @@ video_bp.route('/generate', methods=['POST'])(generate_videos_effect_from_image)
 video_bp.route('/status/<task_id>', methods=['GET'])(check_video_status)
 video_bp.route('/generate-with-ffmpeg', methods=['POST'])(generate_video_with_ffmpeg)
 video_bp.route('/concat/status/<task_id>', methods=['GET'])(check_video_concat_status)
+video_bp.route('/proxy/<proxy_id>', methods=['GET'])(get_proxy_video)
@@ -3,7 +3,6 @@ import os
 from uuid import uuid4
 
 import pollinations
-import requests
 from openai import OpenAI
 
 from app.config.extensions import celery
@@ -11,6 +10,9 @@ from app.config.logging_config import setup_logging
 from app.models import Image, User
 from app.utils.ai_agents import PROMPT_IMAGE
 from app.utils.constant import IMAGE_FOLDER, OPEN_ROUTER_API_KEY
+from app.utils.media_cache import fetch_media
+from app.utils.video.probe import describe_image
+from app.utils.workspace import ScratchWorkspace
 
 client = OpenAI(
     base_url="https://openrouter.ai/api/v1",
@@ -24,6 +26,7 @@ logger = setup_logging()
 def process_image_generation(self, user_id, model, paragraph_id, content, num_images=2):
     task_id = self.request.id
     logger.info(f"[Task ID: {task_id}] Starting image generation for user_id: {user_id} with model: {model}")
+    workspace = ScratchWorkspace(task_id)
 
     try:
         if not content:
@@ -80,12 +83,13 @@ def process_image_generation(self, user_id, model, paragraph_id, content, num_im
 
         logger.info(f"[Task ID: {task_id}] Initializing Pollinations model")
         model = pollinations.Image(nologo=True)
+        workspace.open()
 
         results = []
 
         for i, img_prompt in enumerate(image_prompts):
             logger.info(f"[Task ID: {task_id}] Generating image {i + 1}/{len(image_prompts)}: {img_prompt}")
-            image_filename = os.path.join(os.getcwd(), f"image_{uuid4()}.png")
+            image_filename = workspace.file(f"image_{uuid4()}.png")
 
             try:
                 image_url = model(img_prompt)
@@ -106,11 +110,12 @@ def process_image_generation(self, user_id, model, paragraph_id, content, num_im
                         file_data = f.read()
                 elif isinstance(image_url, str):
                     logger.info(f"[Task ID: {task_id}] Downloading image from URL: {image_url}")
-                    img_response = requests.get(image_url, timeout=10)
-                    img_response.raise_for_status()
+                    media_entry = fetch_media(image_url, image_filename)
+                    if media_entry is None:
+                        raise RuntimeError(f"Failed to download image from {image_url}")
 
                     # Verify content type
-                    content_type = img_response.headers.get('content-type', '')
+                    content_type = media_entry.get('content_type') or ''
                     if not content_type.startswith('image/'):
                         logger.error(f"[Task ID: {task_id}] Invalid content type: {content_type}")
                         results.append({
@@ -121,10 +126,8 @@ def process_image_generation(self, user_id, model, paragraph_id, content, num_im
                         })
                         continue
 
-                    file_data = img_response.content
-                    # Save temporarily to validate
-                    with open(image_filename, 'wb') as f:
-                        f.write(file_data)
+                    with open(image_filename, 'rb') as f:
+                        file_data = f.read()
                 else:
                     logger.error(f"[Task ID: {task_id}] Invalid image URL format: {type(image_url)}")
                     results.append({
@@ -146,8 +149,8 @@ def process_image_generation(self, user_id, model, paragraph_id, content, num_im
                     })
                     continue
 
-                # Upload to Cloudinary - Fix: Process upload directly instead of using apply_async
-                logger.info(f"[Task ID: {task_id}] Uploading image {i + 1} to Cloudinary")
+                # Upload to storage - Fix: Process upload directly instead of using apply_async
+                logger.info(f"[Task ID: {task_id}] Uploading image {i + 1} to storage")
                 try:
                     # Process the upload directly
                     uploaded_result = process_image_upload_directly(user_id, file_data, image_filename)
@@ -207,34 +210,30 @@ def process_image_generation(self, user_id, model, paragraph_id, content, num_im
         return {'success': False, 'error': str(exc)}
 
     finally:
+        workspace.close()
         logger.info(f"[Task ID: {task_id}] Task completed")
 
 
 def process_image_upload_directly(user_id, file_data, filename="uploaded_image"):
-    import os
-    from uuid import uuid4
+    import io
 
-    import cloudinary.uploader
     from PIL import Image as PILImage
 
     from app.config.extensions import db
+    from app.utils.upload.storage import get_storage
 
     logger.info(f"Starting direct image upload for user_id: {user_id}, filename: {filename}")
     public_id = None
-    temp_filename = None
 
     try:
-        temp_filename = f"temp_image_{uuid4()}.png"
-        with open(temp_filename, 'wb') as f:
-            f.write(file_data)
-
         try:
-            with PILImage.open(temp_filename) as img:
+            with PILImage.open(io.BytesIO(file_data)) as img:
+                media_info = describe_image(img)
                 logger.info(f"Image validated: {img.format} {img.size}")
                 if img.format not in ('JPEG', 'PNG', 'GIF', 'WEBP'):
-                    img.save(temp_filename)
-                    with open(temp_filename, 'rb') as f:
-                        file_data = f.read()
+                    converted = io.BytesIO()
+                    img.save(converted, format='PNG')
+                    file_data = converted.getvalue()
         except Exception as img_error:
             logger.error(f"Image validation failed: {img_error}", exc_info=True)
             return {'success': False, 'error': f"Invalid image data: {str(img_error)}"}
@@ -243,16 +242,16 @@ def process_image_upload_directly(user_id, file_data, filename="uploaded_image")
         public_id = f"{IMAGE_FOLDER}/{user_id}/{unique_id}"
 
         logger.info(
-            f"Attempting to upload image '{filename}' for user {user_id} to Cloudinary (public_id: {public_id}).")
-        upload_result = cloudinary.uploader.upload(
+            f"Attempting to upload image '{filename}' for user {user_id} to storage (public_id: {public_id}).")
+        upload_result = get_storage().put(
             file_data,
+            public_id,
             resource_type="image",
-            public_id=public_id,
             overwrite=True,
             format="png"
         )
-        secure_url = upload_result['secure_url']
-        logger.info(f"Successfully uploaded image '{filename}' for user {user_id}. Cloudinary URL: {secure_url}")
+        secure_url = upload_result['url']
+        logger.info(f"Successfully uploaded image '{filename}' for user {user_id}. URL: {secure_url}")
 
         logger.info(f"Attempting to save image record for user {user_id} to the database.")
         user = User.query.get(user_id)
@@ -262,25 +261,19 @@ def process_image_upload_directly(user_id, file_data, filename="uploaded_image")
 
         new_image = Image(
             user_id=user_id,
-            url=secure_url
+            url=secure_url,
+            media_info=media_info
         )
         db.session.add(new_image)
         db.session.commit()
 
         logger.info(f"Successfully saved image record for user {user_id} to the database.")
         logger.info(f"Image upload completed successfully for user_id: {user_id}.")
-        return {'success': True, 'url': secure_url, 'public_id': public_id, 'id': new_image.id}
+        return {'success': True, 'url': secure_url, 'public_id': public_id, 'id': new_image.id,
+                'media_info': media_info}
 
     except Exception as exc:
         logger.error(
             f"Exception occurred during direct image upload for user {user_id}, filename: {filename}. Error: {exc}",
             exc_info=True)
         return {'success': False, 'error': str(exc)}
-
-    finally:
-        if temp_filename and os.path.exists(temp_filename):
-            try:
-                os.remove(temp_filename)
-                logger.debug(f"Removed temporary file: {temp_filename}")
-            except Exception as e:
-                logger.warning(f"Failed to remove temporary file: {temp_filename}. Error: {e}")
@@ -1,21 +1,24 @@
+import io
 import logging
-import os
 from uuid import uuid4
 
-import cloudinary.uploader
 from PIL import Image as PILImage
 
 from app.config.extensions import celery, db
 from app.config.logging_config import setup_logging
 from app.models import Audio, Image, User, Video
+from app.utils.audio_peaks import compute_audio_peaks
+from app.utils.blob_store import blob_path, release_blob_after_task
 from app.utils.constant import AUDIO_FOLDER, AVATAR_FOLDER, IMAGE_FOLDER, VIDEO_FOLDER
+from app.utils.upload.storage import StorageError, get_storage
+from app.utils.video.probe import describe_image, probe_media
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
 
 @celery.task(bind=True, max_retries=3)
-def process_avatar_upload(self, user_id, file_data):
+def process_avatar_upload(self, user_id, blob_id):
     task_id = self.request.id
     logger.info(f"[Task ID: {task_id}] Starting avatar upload task for user_id: {user_id}")
     try:
@@ -23,20 +26,20 @@ def process_avatar_upload(self, user_id, file_data):
         public_id = f"{AVATAR_FOLDER}/{user_id}/{unique_id}"
 
         logger.info(
-            f"[Task ID: {task_id}] Attempting to upload avatar for user {user_id} to Cloudinary (public_id: {public_id}).")
-        upload_result = cloudinary.uploader.upload(
-            file_data,
+            f"[Task ID: {task_id}] Attempting to upload avatar for user {user_id} to storage (public_id: {public_id}).")
+        upload_result = get_storage().put(
+            blob_path(blob_id),
+            public_id,
             resource_type="image",
-            public_id=public_id,
             overwrite=True,
             format="png",
             transformation=[
                 {"width": 500, "height": 500, "crop": "limit"}
             ]
         )
-        secure_url = upload_result['secure_url']
+        secure_url = upload_result['url']
         logger.info(
-            f"[Task ID: {task_id}] Successfully uploaded avatar for user {user_id}. Cloudinary URL: {secure_url}")
+            f"[Task ID: {task_id}] Successfully uploaded avatar for user {user_id}. URL: {secure_url}")
 
         logger.info(f"[Task ID: {task_id}] Attempting to update avatar URL for user {user_id} in the database.")
 
@@ -67,28 +70,34 @@ def process_avatar_upload(self, user_id, file_data):
             logger.error(
                 f"[Task ID: {task_id}] An unexpected error occurred during the retry mechanism for user {user_id}. Error: {retry_exc}")
             return {'success': False, 'error': f"Retry mechanism failed: {str(retry_exc)}"}
+    finally:
+        release_blob_after_task(blob_id)
 
 
 @celery.task(bind=True, max_retries=3)
-def process_video_upload(self, user_id, file_data, filename, title=None):
+def process_video_upload(self, user_id, blob_id, filename, title=None):
     task_id = self.request.id
     logger.info(f"[Task ID: {task_id}] Starting video upload task for user_id: {user_id}, filename: {filename}")
     try:
         unique_id = str(uuid4())
         public_id = f"{VIDEO_FOLDER}/{user_id}/{unique_id}"
 
+        # Probed once here so renders and the frontend never have to inspect the file again
+        media_info = probe_media(blob_path(blob_id))
+        logger.info(f"[Task ID: {task_id}] Video '{filename}' metadata: {media_info}")
+
         logger.info(
-            f"[Task ID: {task_id}] Attempting to upload video '{filename}' for user {user_id} to Cloudinary (public_id: {public_id}).")
-        upload_result = cloudinary.uploader.upload(
-            file_data,
+            f"[Task ID: {task_id}] Attempting to upload video '{filename}' for user {user_id} to storage (public_id: {public_id}).")
+        upload_result = get_storage().put(
+            blob_path(blob_id),
+            public_id,
             resource_type="video",
-            public_id=public_id,
             overwrite=True,
             chunk_size=6000000  # 6MB chunks for large files
         )
-        secure_url = upload_result['secure_url']
+        secure_url = upload_result['url']
         logger.info(
-            f"[Task ID: {task_id}] Successfully uploaded video '{filename}' for user {user_id}. Cloudinary URL: {secure_url}")
+            f"[Task ID: {task_id}] Successfully uploaded video '{filename}' for user {user_id}. URL: {secure_url}")
 
         video_title = title or filename
         logger.info(
@@ -96,7 +105,8 @@ def process_video_upload(self, user_id, file_data, filename, title=None):
         video = Video(
             user_id=user_id,
             url=secure_url,
-            title=video_title
+            title=video_title,
+            media_info=media_info
         )
         db.session.add(video)
         db.session.commit()
@@ -104,7 +114,7 @@ def process_video_upload(self, user_id, file_data, filename, title=None):
         logger.info(f"[Task ID: {task_id}] Successfully added video record for user {user_id} to the database.")
         logger.info(
             f"[Task ID: {task_id}] Video upload task completed successfully for user_id: {user_id}, filename: {filename}.")
-        return {'success': True, 'url': secure_url}
+        return {'success': True, 'url': secure_url, 'media_info': media_info}
 
     except Exception as exc:
         logger.error(
@@ -122,35 +132,49 @@ def process_video_upload(self, user_id, file_data, filename, title=None):
             logger.error(
                 f"[Task ID: {task_id}] An unexpected error occurred during the retry mechanism for user {user_id}, filename: {filename}. Error: {retry_exc}")
             return {'success': False, 'error': f"Retry mechanism failed: {str(retry_exc)}"}
+    finally:
+        release_blob_after_task(blob_id)
 
 
 @celery.task(bind=True, max_retries=3)
-def process_audio_upload(self, user_id, file_data, filename):
+def process_audio_upload(self, user_id, blob_id, filename):
     task_id = self.request.id
     logger.info(f"[Task ID: {task_id}] Starting audio upload task for user_id: {user_id}, filename: {filename}")
     try:
         unique_id = str(uuid4())
         public_id = f"{AUDIO_FOLDER}/{user_id}/{unique_id}"
 
+        media_info = probe_media(blob_path(blob_id))
+        logger.info(f"[Task ID: {task_id}] Audio '{filename}' metadata: {media_info}")
+
         logger.info(
-            f"[Task ID: {task_id}] Attempting to upload audio '{filename}' for user {user_id} to Cloudinary (public_id: {public_id}, resource_type: video).")
-        upload_result = cloudinary.uploader.upload(
-            file_data,
+            f"[Task ID: {task_id}] Attempting to upload audio '{filename}' for user {user_id} to storage (public_id: {public_id}, resource_type: video).")
+        upload_result = get_storage().put(
+            blob_path(blob_id),
+            public_id,
             resource_type="video",
-            public_id=public_id,
             overwrite=True,
             chunk_size=3000000  # 3MB chunks
         )
-        secure_url = upload_result['secure_url']
+        secure_url = upload_result['url']
         logger.info(
-            f"[Task ID: {task_id}] Successfully uploaded audio '{filename}' for user {user_id}. Cloudinary URL: {secure_url}")
+            f"[Task ID: {task_id}] Successfully uploaded audio '{filename}' for user {user_id}. URL: {secure_url}")
+
+        peaks = None
+        try:
+            peaks = compute_audio_peaks(blob_path(blob_id))
+        except Exception as peaks_exc:
+            logger.warning(
+                f"[Task ID: {task_id}] Could not compute waveform peaks for audio '{filename}'. Error: {peaks_exc}")
 
         logger.info(
             f"[Task ID: {task_id}] Attempting to add audio record for user {user_id} (Title: '{filename}') to the database.")
         audio = Audio(
             user_id=user_id,
             url=secure_url,
-            title=filename
+            title=filename,
+            peaks=peaks,
+            media_info=media_info
         )
         db.session.add(audio)
         db.session.commit()
@@ -158,7 +182,7 @@ def process_audio_upload(self, user_id, file_data, filename):
         logger.info(f"[Task ID: {task_id}] Successfully added audio record for user {user_id} to the database.")
         logger.info(
             f"[Task ID: {task_id}] Audio upload task completed successfully for user_id: {user_id}, filename: {filename}.")
-        return {'success': True, 'url': secure_url}
+        return {'success': True, 'url': secure_url, 'audio_id': audio.id, 'media_info': media_info}
 
     except Exception as exc:
         logger.error(
@@ -176,104 +200,8 @@ def process_audio_upload(self, user_id, file_data, filename):
             logger.error(
                 f"[Task ID: {task_id}] An unexpected error occurred during the retry mechanism for user {user_id}, filename: {filename}. Error: {retry_exc}")
             return {'success': False, 'error': f"Retry mechanism failed: {str(retry_exc)}"}
-
-
-@celery.task(bind=True, max_retries=3)
-def process_image_upload(self, user_id, file_data, filename="uploaded_image"):
-    task_id = self.request.id
-    logger.info(f"[Task ID: {task_id}] Starting image upload task for user_id: {user_id}, filename: {filename}")
-    public_id = None
-    temp_filename = None
-
-    try:
-        temp_filename = f"temp_image_{uuid4()}.png"
-        with open(temp_filename, 'wb') as f:
-            f.write(file_data)
-
-        try:
-            with PILImage.open(temp_filename) as img:
-                logger.info(f"[Task ID: {task_id}] Image validated: {img.format} {img.size}")
-                if img.format not in ('JPEG', 'PNG', 'GIF', 'WEBP'):
-                    logger.info(f"[Task ID: {task_id}] Converting image to PNG format")
-                    # img = img.convert('RGBA')
-                    img.save(temp_filename)
-                    with open(temp_filename, 'rb') as f:
-                        file_data = f.read()
-        except Exception as img_error:
-            logger.error(f"[Task ID: {task_id}] Image validation failed: {img_error}", exc_info=True)
-            return {'success': False, 'error': f"Invalid image data: {str(img_error)}"}
-
-        unique_id = str(uuid4())
-        public_id = f"{IMAGE_FOLDER}/{user_id}/{unique_id}"
-
-        logger.info(
-            f"[Task ID: {task_id}] Attempting to upload image '{filename}' for user {user_id} to Cloudinary (public_id: {public_id}).")
-        upload_result = cloudinary.uploader.upload(
-            file_data,
-            resource_type="image",
-            public_id=public_id,
-            overwrite=True,
-            format="png"
-        )
-        secure_url = upload_result['secure_url']
-        logger.info(
-            f"[Task ID: {task_id}] Successfully uploaded image '{filename}' for user {user_id}. Cloudinary URL: {secure_url}")
-
-        logger.info(f"[Task ID: {task_id}] Attempting to save image record for user {user_id} to the database.")
-        user = User.query.get(user_id)
-        if not user:
-            logger.error(
-                f"[Task ID: {task_id}] User not found in database for user_id: {user_id} while saving image record.")
-            return {'success': False, 'error': f"User not found for user_id: {user_id}"}
-
-        new_image = Image(
-            user_id=user_id,
-            url=secure_url
-        )
-        db.session.add(new_image)
-        db.session.commit()
-
-        logger.info(f"[Task ID: {task_id}] Successfully saved image record for user {user_id} to the database.")
-
-        logger.info(f"[Task ID: {task_id}] Image upload task completed successfully for user_id: {user_id}.")
-        return {'success': True, 'url': secure_url, 'public_id': public_id, 'id': new_image.id}
-    except Exception as exc:
-        db.session.rollback()
-        logger.error(
-            f"[Task ID: {task_id}] Exception occurred during image upload for user {user_id}, filename: {filename}. Error: {exc}",
-            exc_info=True)
-        try:
-            retry_count = self.request.retries + 1
-            logger.warning(
-                f"[Task ID: {task_id}] Retrying image upload for user {user_id}, filename: {filename}... Attempt {retry_count}/{self.max_retries}. Countdown: 5s.")
-            self.retry(exc=exc, countdown=5)
-        except self.MaxRetriesExceededError as e:
-            logger.error(
-                f"[Task ID: {task_id}] Image upload failed permanently for user {user_id}, filename: {filename} after {self.max_retries} retries. Error: {e}")
-            if public_id:
-                try:
-                    logger.warning(
-                        f"[Task ID: {task_id}] Attempting to delete potentially orphaned Cloudinary image after max retries: {public_id}")
-                    # cloudinary.uploader.destroy(public_id, resource_type="image")
-                    logger.info(
-                        f"[Task ID: {task_id}] Successfully deleted potentially orphaned Cloudinary image: {public_id}")
-                except Exception as cleanup_exc:
-                    logger.error(
-                        f"[Task ID: {task_id}] Failed to delete potentially orphaned Cloudinary image {public_id} after max retries. Error: {cleanup_exc}",
-                        exc_info=True)
-            return {'success': False, 'error': f"Max retries exceeded: {str(e)}"}
-        except Exception as retry_exc:
-            logger.critical(
-                f"[Task ID: {task_id}] An unexpected error occurred during the retry mechanism for user {user_id}, filename: {filename}. Error: {retry_exc}",
-                exc_info=True)
-            return {'success': False, 'error': f"Retry mechanism failed: {str(retry_exc)}"}
     finally:
-        if temp_filename and os.path.exists(temp_filename):
-            try:
-                os.remove(temp_filename)
-                logger.debug(f"[Task ID: {task_id}] Removed temporary file: {temp_filename}")
-            except Exception as e:
-                logger.warning(f"[Task ID: {task_id}] Failed to remove temporary file: {temp_filename}. Error: {e}")
+        release_blob_after_task(blob_id)
 
 
 def upload_image_directly(user_id, file_data, filename="uploaded_image"):
@@ -285,28 +213,35 @@ def upload_image_directly(user_id, file_data, filename="uploaded_image"):
             logger.warning(f"Direct Upload: Empty file data received for {filename} (User: {user_id})")
             return {'success': False, 'filename': filename, 'error': 'Empty file data received.'}
 
+        media_info = None
+        try:
+            with PILImage.open(io.BytesIO(file_data)) as img:
+                media_info = describe_image(img)
+        except Exception as img_error:
+            logger.warning(f"Direct Upload: Could not read image metadata for {filename} (User: {user_id}): {img_error}")
+
         unique_id = str(uuid4())
         public_id = f"{IMAGE_FOLDER}/{user_id}/{unique_id}"
 
-        logger.info(f"Direct Upload: Attempting to upload image '{filename}' for user {user_id} to Cloudinary (public_id: {public_id}).")
+        logger.info(f"Direct Upload: Attempting to upload image '{filename}' for user {user_id} to storage (public_id: {public_id}).")
 
-        upload_result = cloudinary.uploader.upload(
+        upload_result = get_storage().put(
             file_data,
+            public_id,
             resource_type="image",
-            public_id=public_id,
             overwrite=True,
             format="png"
         )
-        secure_url = upload_result.get('secure_url')
-        generated_public_id = upload_result.get('public_id')
+        secure_url = upload_result.get('url')
+        generated_public_id = upload_result.get('key')
 
         if not secure_url or not generated_public_id:
             logger.error(
-                f"Direct Upload: Cloudinary upload failed for {filename} (User: {user_id}) - Missing URL or public_id in response: {upload_result}")
-            return {'success': False, 'filename': filename, 'error': 'Cloudinary upload failed (invalid response).'}
+                f"Direct Upload: Storage upload failed for {filename} (User: {user_id}) - Missing URL or public_id in response: {upload_result}")
+            return {'success': False, 'filename': filename, 'error': 'Storage upload failed (invalid response).'}
 
         logger.info(
-            f"Direct Upload: Successfully uploaded image '{filename}' for user {user_id}. Cloudinary URL: {secure_url}")
+            f"Direct Upload: Successfully uploaded image '{filename}' for user {user_id}. URL: {secure_url}")
 
         logger.info(f"Direct Upload: Attempting to save image record for user {user_id} to the database.")
 
@@ -316,16 +251,17 @@ def upload_image_directly(user_id, file_data, filename="uploaded_image"):
                 f"Direct Upload: User not found in database (ID: {user_id}) while saving image record for {filename}.")
             try:
                 logger.warning(
-                    f"Direct Upload: Deleting orphaned Cloudinary image {generated_public_id} because user {user_id} not found.")
-                # cloudinary.uploader.destroy(generated_public_id, resource_type="image")
+                    f"Direct Upload: Deleting orphaned stored image {generated_public_id} because user {user_id} not found.")
+                # get_storage().delete(generated_public_id, resource_type="image")
             except Exception as cleanup_exc:
                 logger.error(
-                    f"Direct Upload: Failed to delete orphaned Cloudinary image {generated_public_id}: {cleanup_exc}")
+                    f"Direct Upload: Failed to delete orphaned stored image {generated_public_id}: {cleanup_exc}")
             return {'success': False, 'filename': filename, 'error': f"User not found for user_id: {user_id}"}
 
         new_image = Image(
             user_id=user_id,
             url=secure_url,
+            media_info=media_info
         )
         db.session.add(new_image)
         db.session.commit()
@@ -333,14 +269,15 @@ def upload_image_directly(user_id, file_data, filename="uploaded_image"):
         logger.info(
             f"Direct Upload: Successfully saved image record (ID: {new_image.id}) for user {user_id} to the database.")
 
-        return {'success': True, 'filename': filename, 'url': secure_url, 'image_id': new_image.id}
+        return {'success': True, 'filename': filename, 'url': secure_url, 'image_id': new_image.id,
+                'media_info': media_info}
 
-    except cloudinary.exceptions.Error as cloud_error:
+    except StorageError as cloud_error:
         db.session.rollback()
         logger.error(
-            f"Direct Upload: Cloudinary API error for {filename} (User: {user_id}, Public ID attempted: {public_id}): {cloud_error}",
+            f"Direct Upload: Storage error for {filename} (User: {user_id}, Public ID attempted: {public_id}): {cloud_error}",
             exc_info=True)
-        return {'success': False, 'filename': filename, 'error': f"Cloudinary upload error: {str(cloud_error)}"}
+        return {'success': False, 'filename': filename, 'error': f"Storage upload error: {str(cloud_error)}"}
     except Exception as exc:
         db.session.rollback()
         logger.error(
@@ -1,20 +1,44 @@
 import os
 import shutil
-import tempfile
 from uuid import uuid4
 
-import cloudinary.uploader
-import numpy as np
+from celery import chord
+from celery.exceptions import Ignore
 from moviepy.editor import ImageClip
-from moviepy.video.fx import all as vfx
-from PIL import Image, UnidentifiedImageError
+from PIL import Image as PILImage
+from PIL import UnidentifiedImageError
 from werkzeug.utils import secure_filename
 
 from app.config.extensions import celery, db
 from app.config.logging_config import setup_logging
-from app.models import Video
-from app.utils.constant import EFFECT_TRANSITION_DURATION, EFFECTS_TO_APPLY, TARGET_FPS, VIDEO_FOLDER, ZOOM_FACTOR
+from app.models import Image, Video
+from app.utils.blob_store import blob_path, put_blob, release_blob, release_blob_after_task
+from app.utils.constant import (
+    DEFAULT_ENCODER_PROFILE,
+    DEFAULT_OUTPUT_PROFILE,
+    EFFECT_TRANSITION_DURATION,
+    EFFECTS_ENGINE,
+    EFFECTS_FAN_OUT,
+    EFFECTS_TO_APPLY,
+    FFMPEG_EFFECTS_ENGINE,
+    HLS_ENABLED,
+    PROXY_ENCODER_PROFILE,
+    PROXY_FPS,
+    TARGET_FPS,
+    VIDEO_FOLDER,
+    ZOOM_FACTOR,
+)
 from app.utils.function_helpers import create_video
+from app.utils.upload.pipeline import submit_directory_upload, submit_upload, wait_for_uploads
+from app.utils.video.effects import SUPPORTED_EFFECTS, render_effects_single_pass, render_effects_with_ffmpeg
+from app.utils.video.normalize import normalize_image
+from app.utils.video.packaging import HLS_MASTER_PLAYLIST, package_hls
+from app.utils.video.previews import SPRITE_VTT_NAME, generate_previews, write_sprite_vtt
+from app.utils.video.profiles import get_output_size, moviepy_writer_options, output_encoder_threads
+from app.utils.video.progress import RenderProgress
+from app.utils.video.proxy import save_proxy, sweep_expired_proxies
+from app.utils.video.zoom import KenBurnsZoom
+from app.utils.workspace import ScratchQuotaExceeded, ScratchWorkspace
 
 logger = setup_logging()
 
@@ -29,137 +53,123 @@ def cleanup_resources(*args):
                 pass
 
 
-def apply_zoom(clip, zoom_factor=1.15):
-    if not clip.duration or clip.duration <= 0:
-        return clip
-    original_w, original_h = clip.size
-
-    def zoom_frame_transform(get_frame, t):
-        frame = get_frame(t)
-        if len(frame.shape) < 2:
-            return frame
-        h, w = frame.shape[:2]
-        if h == 0 or w == 0:
-            return frame
-        current_duration = clip.duration if clip.duration > 0 else 1
-        scale = 1 + (zoom_factor - 1) * (t / current_duration)
-        new_w, new_h = int(w * scale), int(h * scale)
-        if new_w <= 0 or new_h <= 0:
-            return frame
-        try:
-            pil_image = Image.fromarray(frame)
-            resized_image = pil_image.resize((new_w, new_h), Image.Resampling.LANCZOS)
-            resized_frame = np.array(resized_image)
-            start_x = max(0, (new_w - w) // 2)
-            start_y = max(0, (new_h - h) // 2)
-            end_x = min(new_w, start_x + w)
-            end_y = min(new_h, start_y + h)
-            cropped_frame = resized_frame[start_y:end_y, start_x:end_x]
-            if cropped_frame.shape[0] != original_h or cropped_frame.shape[1] != original_w:
-                final_pil = Image.fromarray(cropped_frame)
-                final_frame = np.array(final_pil.resize((original_w, original_h), Image.Resampling.LANCZOS))
-                return final_frame
-            else:
-                return cropped_frame
-        except Exception as e:
-            logger.error(f"Error resizing frame: {e}", exc_info=True)
-            if frame.shape[0] == original_h and frame.shape[1] == original_w:
-                return frame
-            else:
-                num_channels = frame.shape[2] if len(frame.shape) > 2 else 3
-                return np.zeros((original_h, original_w, num_channels), dtype=frame.dtype)
-
-    return clip.fl(zoom_frame_transform, apply_to=['mask'] if clip.mask else [])
+def _store_previews(task_id, user_id, video_path, output_dir):
+    """Generates and stores a video's poster frame and scrub sprite sheet with its WebVTT index.
+
+    Returns {'poster_url', 'sprite_url', 'sprite_vtt_url'}, or {} if they could not be made; previews only save
+    listing and scrubbing from fetching the video, so they never fail a render.
+    """
+    key_prefix = f"{VIDEO_FOLDER}/{user_id}/previews_{uuid4()}"
+    uploads = []
+    try:
+        previews = generate_previews(video_path, output_dir)
+        if previews is None:
+            return {}
+        uploads.append(submit_upload(previews['poster'], f"{key_prefix}/poster", resource_type="image"))
+        uploads.append(submit_upload(previews['sprite'], f"{key_prefix}/sprite", resource_type="image"))
+        sprite_url = uploads[1].result()['url']
+        # The index points at the stored sprite sheet, so it is written once that URL is known
+        vtt_path = write_sprite_vtt(os.path.join(output_dir, SPRITE_VTT_NAME), sprite_url, previews['layout'],
+                                    previews['duration'])
+        uploads.append(submit_upload(vtt_path, f"{key_prefix}/{SPRITE_VTT_NAME}", resource_type="raw"))
+        urls = {'poster_url': uploads[0].result()['url'], 'sprite_url': sprite_url,
+                'sprite_vtt_url': uploads[2].result()['url']}
+    except Exception as e:
+        # Storage errors, failed uploads and scratch-disk errors alike; the render itself has already succeeded
+        logger.warning(f"[Task ID: {task_id}] Could not store previews for {video_path}: {e}")
+        return {}
+    finally:
+        wait_for_uploads(uploads)
+
+    logger.info(f"[Task ID: {task_id}] Stored previews for {video_path}: {urls['poster_url']}")
+    return urls
 
 
 def process_image_effects(img_file, duration_per_part, target_size, effects_list, zoom_factor, fps, transition_duration,
-                          task_id, user_id):
-    logger.info(f"[Task ID: {task_id}] Processing image: {os.path.basename(img_file)} for user {user_id}")
+                          task_id, user_id, encoder_profile=DEFAULT_ENCODER_PROFILE, workdir=None, source_name=None):
+    source_name = source_name or os.path.basename(img_file)
+    logger.info(f"[Task ID: {task_id}] Processing image: {source_name} for user {user_id}")
     base_clip = None
-    zoomed_clip_base = None
     generated_videos = []
+    output_files = {}
+    uploads = {}
+    preview_dirs = []
 
-    try:
-        # Load and prepare base clip
-        base_clip = ImageClip(img_file).set_duration(duration_per_part).set_fps(fps)
-        if base_clip.size != target_size:
-            base_clip = base_clip.resize(width=target_size[0], height=target_size[1])
-
-        # Apply base zoom effect
-        zoomed_clip_base = apply_zoom(base_clip.copy(), zoom_factor=zoom_factor)
-        zoomed_clip_base = zoomed_clip_base.set_duration(duration_per_part)
+    def queue_upload(effect_type, output_filename):
+        # Uploads run on the pipeline's threads while this thread keeps encoding or flushing the other effects
+        public_id = f"{VIDEO_FOLDER}/{user_id}/{uuid4()}"
+        logger.info(f"[Task ID: {task_id}] Queueing upload of {output_filename} to storage (public_id: {public_id})")
+        uploads[effect_type] = submit_upload(
+            output_filename,
+            public_id,
+            resource_type="video",
+            overwrite=True,
+            chunk_size=6000000
+        )
 
-        # Process each effect
+    try:
         for effect_type in effects_list:
-            # Generate unique filename in current working directory
-            output_filename = os.path.join(os.getcwd(), f"{effect_type}_{uuid4()}.mp4")
-            final_effect_clip = None
+            if effect_type not in SUPPORTED_EFFECTS:
+                logger.warning(f"[Task ID: {task_id}] Effect type '{effect_type}' not implemented. Skipping.")
+                continue
+            # Generate unique filename in the task's workspace
+            output_files[effect_type] = os.path.join(workdir or os.getcwd(), f"{effect_type}_{uuid4()}.mp4")
+
+        logger.info(
+            f"[Task ID: {task_id}] Rendering {len(output_files)} effect(s) in a single pass with the "
+            f"{EFFECTS_ENGINE} engine and '{encoder_profile}' encoder profile: {list(output_files)}")
+        if EFFECTS_ENGINE == FFMPEG_EFFECTS_ENGINE:
+            render_errors = render_effects_with_ffmpeg(
+                img_file, target_size, fps, duration_per_part, zoom_factor, transition_duration, output_files,
+                encoder_profile=encoder_profile
+            )
+            for effect_type, output_filename in output_files.items():
+                if effect_type not in render_errors:
+                    queue_upload(effect_type, output_filename)
+        else:
+            # Load and prepare base clip
+            base_clip = ImageClip(img_file).set_duration(duration_per_part).set_fps(fps)
+            if base_clip.size != target_size:
+                base_clip = base_clip.resize(width=target_size[0], height=target_size[1])
+
+            # The zoom is shared by every effect, so each zoomed frame is computed once and fanned out
+            zoom = KenBurnsZoom(base_clip.get_frame(0), duration_per_part, fps, zoom_factor)
+            render_errors = render_effects_single_pass(
+                zoom.frame, zoom.frame_count, zoom.out_size, fps, duration_per_part, transition_duration, output_files,
+                # One writer per effect encodes at the same time, so they share the render's thread budget
+                write_options=moviepy_writer_options(encoder_profile, output_encoder_threads(len(output_files))),
+                on_complete=queue_upload
+            )
 
+        for effect_type in output_files:
             try:
-                clip_to_modify = zoomed_clip_base.copy()
-                transition = min(transition_duration, duration_per_part / 2)
-                slide_transition = min(transition_duration, duration_per_part)
-
-                if effect_type == 'zoom_only':
-                    final_effect_clip = clip_to_modify
-                elif effect_type == 'fade_in':
-                    final_effect_clip = vfx.fadein(clip_to_modify, duration=transition)
-                elif effect_type == 'fade_out':
-                    final_effect_clip = vfx.fadeout(clip_to_modify, duration=transition)
-                elif effect_type == 'slide_in_left':
-                    w, h = clip_to_modify.size
-
-                    def slide_position(t):
-                        if t < slide_transition:
-                            x_pos = -w + (w * (t / slide_transition))
-                            return (x_pos, 'center')
-                        else:
-                            return ('center', 'center')
-
-                    final_effect_clip = clip_to_modify.set_position(slide_position)
-                else:
-                    logger.warning(f"[Task ID: {task_id}] Effect type '{effect_type}' not implemented. Skipping.")
-                    cleanup_resources(clip_to_modify)
-                    continue
+                if effect_type in render_errors:
+                    raise render_errors[effect_type]
+
+                upload_result = uploads[effect_type].result()
+                secure_url = upload_result['url']
+                logger.info(f"[Task ID: {task_id}] Uploaded video to storage: {secure_url}")
+
+                preview_dirs.append(os.path.join(workdir or os.getcwd(), f"previews_{effect_type}_{uuid4().hex}"))
+                previews = _store_previews(task_id, user_id, output_files[effect_type], preview_dirs[-1])
+
+                # Save to database
+                video = Video(
+                    user_id=user_id,
+                    url=secure_url,
+                    title=f"Effect_{effect_type}_{source_name}",
+                    **previews
+                )
+                db.session.add(video)
+                db.session.commit()
 
-                # Write the video clip
-                if final_effect_clip:
-                    final_effect_clip = final_effect_clip.set_duration(duration_per_part)
-                    final_effect_clip.write_videofile(
-                        output_filename, fps=fps, codec='libx264', audio=False, threads=1,
-                        logger=None, preset='medium'
-                    )
-
-                    # Upload to Cloudinary
-                    public_id = f"{VIDEO_FOLDER}/{user_id}/{uuid4()}"
-                    logger.info(
-                        f"[Task ID: {task_id}] Uploading video {output_filename} to Cloudinary (public_id: {public_id})")
-                    with open(output_filename, 'rb') as video_file:
-                        upload_result = cloudinary.uploader.upload(
-                            video_file,
-                            resource_type="video",
-                            public_id=public_id,
-                            overwrite=True,
-                            chunk_size=6000000
-                        )
-                    secure_url = upload_result['secure_url']
-                    logger.info(f"[Task ID: {task_id}] Uploaded video to Cloudinary: {secure_url}")
-
-                    # Save to database
-                    video = Video(
-                        user_id=user_id,
-                        url=secure_url,
-                        title=f"Effect_{effect_type}_{os.path.basename(img_file)}"
-                    )
-                    db.session.add(video)
-                    db.session.commit()
-
-                    generated_videos.append({
-                        'success': True,
-                        'effect': effect_type,
-                        'url': secure_url,
-                        'video_id': video.id
-                    })
+                generated_videos.append({
+                    'success': True,
+                    'effect': effect_type,
+                    'url': secure_url,
+                    'video_id': video.id,
+                    **previews
+                })
 
             except Exception as e:
                 logger.error(f"[Task ID: {task_id}] Error applying effect '{effect_type}' to image {img_file}: {e}",
@@ -169,15 +179,6 @@ def process_image_effects(img_file, duration_per_part, target_size, effects_list
                     'effect': effect_type,
                     'error': str(e)
                 })
-            finally:
-                cleanup_resources(final_effect_clip)
-                # Clean up the video file
-                if os.path.exists(output_filename):
-                    try:
-                        os.remove(output_filename)
-                        logger.debug(f"[Task ID: {task_id}] Removed video file: {output_filename}")
-                    except OSError as e:
-                        logger.warning(f"[Task ID: {task_id}] Could not remove video file {output_filename}: {e}")
 
     except (IOError, SyntaxError, UnidentifiedImageError) as img_err:
         logger.error(f"[Task ID: {task_id}] Failed to load/process image {img_file}: {img_err}", exc_info=True)
@@ -186,55 +187,88 @@ def process_image_effects(img_file, duration_per_part, target_size, effects_list
         logger.error(f"[Task ID: {task_id}] Critical error processing image {img_file}: {e}", exc_info=True)
         return {'success': False, 'error': str(e), 'results': []}
     finally:
-        cleanup_resources(zoomed_clip_base, base_clip)
+        cleanup_resources(base_clip)
+        wait_for_uploads(uploads.values())
+        # Clean up the video files
+        for output_filename in output_files.values():
+            if os.path.exists(output_filename):
+                try:
+                    os.remove(output_filename)
+                    logger.debug(f"[Task ID: {task_id}] Removed video file: {output_filename}")
+                except OSError as e:
+                    logger.warning(f"[Task ID: {task_id}] Could not remove video file {output_filename}: {e}")
+        for preview_dir in preview_dirs:
+            shutil.rmtree(preview_dir, ignore_errors=True)
 
     return {'success': len(generated_videos) > 0, 'results': generated_videos}
 
 
 @celery.task(bind=True, max_retries=3)
-def process_image_to_video_effects(self, user_id, file_data, filename, duration_per_part):
+def process_image_to_video_effects(self, user_id, blob_id, filename, duration_per_part,
+                                   encoder_profile=DEFAULT_ENCODER_PROFILE, output_profile=DEFAULT_OUTPUT_PROFILE,
+                                   effects=EFFECTS_TO_APPLY, zoom_factor=ZOOM_FACTOR,
+                                   transition_duration=EFFECT_TRANSITION_DURATION):
     task_id = self.request.id
     logger.info(
         f"[Task ID: {task_id}] Starting video effects task for user {user_id}, filename: {filename}, duration_per_part: {duration_per_part}s")
 
-    temp_dir = None
+    workspace = ScratchWorkspace(task_id)
     temp_image_path = None
+    normalized_blob_id = None
     try:
-        # Save image to temporary file
-        temp_dir = tempfile.mkdtemp()
-        temp_image_path = os.path.join(temp_dir, secure_filename(filename))
-        with open(temp_image_path, 'wb') as f:
-            f.write(file_data)
+        workspace.open()
+        target_size = get_output_size(output_profile, encoder_profile)
+        logger.info(f"[Task ID: {task_id}] Target video size set to: {target_size} (WxH) for '{output_profile}' output")
 
-        # Validate image
+        # Decode, validate and fit the upload to the output size once, so every effect renders at a bounded size
+        temp_image_path = workspace.file(f"normalized_{uuid4().hex}.png")
         try:
-            with Image.open(temp_image_path) as img:
-                img.verify()
-        except (IOError, UnidentifiedImageError) as img_err:
+            normalize_image(blob_path(blob_id), temp_image_path, target_size)
+        except (IOError, UnidentifiedImageError, PILImage.DecompressionBombError) as img_err:
             logger.error(f"[Task ID: {task_id}] Invalid image file {filename}: {img_err}", exc_info=True)
             return {'success': False, 'error': f"Invalid image file: {str(img_err)}", 'results': []}
 
-        # Determine target size
-        with ImageClip(temp_image_path) as temp_clip:
-            target_size = temp_clip.size
-        logger.info(f"[Task ID: {task_id}] Target video size set to: {target_size} (WxH)")
+        if EFFECTS_FAN_OUT:
+            # Render and upload each effect in parallel on the render queue. The chord callback inherits
+            # this task's id, so check_video_status sees the aggregated result under the same id.
+            logger.info(
+                f"[Task ID: {task_id}] Fanning out {len(effects)} effect(s) for {filename} to the render queue")
+            # Effect tasks get the normalized image, one reference each, instead of the original upload
+            with open(temp_image_path, 'rb') as normalized_file:
+                normalized_blob_id = put_blob(normalized_file, temp_image_path, refs=len(effects))
+            header = [
+                render_image_effect.s(user_id, normalized_blob_id, filename, duration_per_part, target_size,
+                                      effect_type, encoder_profile, zoom_factor, transition_duration)
+                for effect_type in effects
+            ]
+            try:
+                raise self.replace(chord(header, collect_image_effects.s()))
+            except Ignore:
+                # The chord was sent, so the effect tasks now own the normalized blob's references
+                normalized_blob_id = None
+                raise
 
         # Process effects
         result = process_image_effects(
             img_file=temp_image_path,
             duration_per_part=duration_per_part,
             target_size=target_size,
-            effects_list=EFFECTS_TO_APPLY,
-            zoom_factor=ZOOM_FACTOR,
+            effects_list=effects,
+            zoom_factor=zoom_factor,
             fps=TARGET_FPS,
-            transition_duration=EFFECT_TRANSITION_DURATION,
+            transition_duration=transition_duration,
             task_id=task_id,
-            user_id=user_id
+            user_id=user_id,
+            encoder_profile=encoder_profile,
+            workdir=workspace.path,
+            source_name=secure_filename(filename)
         )
 
         logger.info(f"[Task ID: {task_id}] Video effects task completed for user {user_id}, filename: {filename}")
         return result
 
+    except Ignore:
+        raise
     except Exception as exc:
         logger.error(
             f"[Task ID: {task_id}] Exception in video effects task for user {user_id}, filename: {filename}: {exc}",
@@ -250,53 +284,180 @@ def process_image_to_video_effects(self, user_id, file_data, filename, duration_
             return {'success': False, 'error': f"Max retries exceeded: {str(e)}", 'results': []}
     finally:
         # Clean up temporary files
-        if temp_dir and os.path.exists(temp_dir):
-            try:
-                shutil.rmtree(temp_dir)
-                logger.debug(f"[Task ID: {task_id}] Removed temporary directory: {temp_dir}")
-            except OSError as e:
-                logger.warning(f"[Task ID: {task_id}] Could not remove temporary directory {temp_dir}: {e}")
+        workspace.close()
+        release_blob_after_task(blob_id)
+        if normalized_blob_id:
+            # The fan-out never took the normalized image, and a retry normalizes the upload again
+            release_blob(normalized_blob_id, len(effects))
 
 
 @celery.task(bind=True, max_retries=3)
-def concat_video(self, user_id, data_dict):
+def render_image_effect(self, user_id, blob_id, filename, duration_per_part, target_size, effect_type,
+                        encoder_profile=DEFAULT_ENCODER_PROFILE, zoom_factor=ZOOM_FACTOR,
+                        transition_duration=EFFECT_TRANSITION_DURATION):
     task_id = self.request.id
-    logger.info(f"[Task ID: {task_id}] Starting video generation task for user {user_id}")
+    logger.info(f"[Task ID: {task_id}] Rendering effect '{effect_type}' for user {user_id}, filename: {filename}")
+
+    workspace = ScratchWorkspace(task_id)
+    try:
+        workspace.open()
+        return process_image_effects(
+            img_file=blob_path(blob_id),
+            duration_per_part=duration_per_part,
+            target_size=tuple(target_size),
+            effects_list=[effect_type],
+            zoom_factor=zoom_factor,
+            fps=TARGET_FPS,
+            transition_duration=transition_duration,
+            task_id=task_id,
+            user_id=user_id,
+            encoder_profile=encoder_profile,
+            workdir=workspace.path,
+            source_name=secure_filename(filename)
+        )
+
+    except Exception as exc:
+        logger.error(f"[Task ID: {task_id}] Exception rendering effect '{effect_type}' for {filename}: {exc}",
+                     exc_info=True)
+        try:
+            retry_count = self.request.retries + 1
+            logger.warning(
+                f"[Task ID: {task_id}] Retrying effect '{effect_type}' for {filename}. Attempt {retry_count}/{self.max_retries}. Countdown: 5s.")
+            self.retry(exc=exc, countdown=5)
+        except self.MaxRetriesExceededError as e:
+            logger.error(
+                f"[Task ID: {task_id}] Effect '{effect_type}' failed permanently for {filename} after {self.max_retries} retries: {e}")
+            return {'success': False, 'error': f"Max retries exceeded: {str(e)}",
+                    'results': [{'success': False, 'effect': effect_type, 'error': str(e)}]}
+    finally:
+        workspace.close()
+        release_blob_after_task(blob_id)
+
+
+@celery.task(bind=True)
+def collect_image_effects(self, effect_results):
+    # Merge the per-effect results back into the shape process_image_effects returns for a whole image
+    results = []
+    errors = []
+    for effect_result in effect_results:
+        if not isinstance(effect_result, dict):
+            continue
+        results.extend(effect_result.get('results', []))
+        if effect_result.get('error'):
+            errors.append(effect_result['error'])
+
+    logger.info(f"[Task ID: {self.request.id}] Collected {len(results)} effect result(s)")
+    merged = {'success': len(results) > 0, 'results': results}
+    if errors and not results:
+        merged['error'] = "; ".join(errors)
+    return merged
+
+
+def _lookup_media_info(user_id, data_dict):
+    # Timeline sources the user uploaded were probed at ingest; anything else is normalized unconditionally
+    urls = {clip.get("sourceUrl") for clip in data_dict.get("clips", [])}
+    media_info = {}
+    for model in (Video, Image):
+        rows = model.query.filter(model.user_id == user_id, model.url.in_(urls), model.media_info.isnot(None)).all()
+        media_info.update({row.url: row.media_info for row in rows})
+    return media_info
+
+
+def _collect_hls_upload(task_id, package_uploads):
+    # A missing HLS ladder only costs adaptive streaming, so it never fails the render
+    if not package_uploads:
+        return None
+    try:
+        results = {relpath: future.result() for relpath, future in package_uploads.items()}
+        hls_url = results[HLS_MASTER_PLAYLIST]['url']
+    except Exception as e:
+        # Storage errors and failed uploads alike, as in _store_previews; the render itself has already succeeded
+        logger.warning(f"[Task ID: {task_id}] Could not store the HLS package: {e}")
+        return None
+    logger.info(f"[Task ID: {task_id}] Stored HLS package ({len(results)} files): {hls_url}")
+    return hls_url
+
+
+@celery.task(bind=True, max_retries=3)
+def concat_video(self, user_id, data_dict, encoder_profile=DEFAULT_ENCODER_PROFILE, output_profiles=None):
+    task_id = self.request.id
+    output_profiles = output_profiles or [DEFAULT_OUTPUT_PROFILE]
+    logger.info(
+        f"[Task ID: {task_id}] Starting video generation task for user {user_id} with '{encoder_profile}' encoder profile"
+        f" for {', '.join(output_profiles)} output(s)")
+    workspace = ScratchWorkspace(task_id)
+    uploads = {}
+    hls_uploads = {}
 
     try:
         # Process the image to video effects
-        result = create_video(data_dict)
+        workspace.open()
+        result = create_video(data_dict, encoder_profile, progress=RenderProgress(self), workspace=workspace,
+                              output_profiles=output_profiles, media_info=_lookup_media_info(user_id, data_dict))
 
         if result is None:
             logger.error(f"[Task ID: {task_id}] Failed to create video for user {user_id}")
             return {'success': False, 'error': "Failed to create video"}
 
-        # Upload the video to Cloudinary
-        public_id = f"{VIDEO_FOLDER}/{user_id}/{uuid4()}"
-        logger.info(f"[Task ID: {task_id}] Uploading video to Cloudinary (public_id: {public_id})")
-        with open(result, 'rb') as video_file:
-            upload_result = cloudinary.uploader.upload(
-                video_file,
+        # Upload every output to storage on the upload pipeline at once
+        for output_profile, output_path in result.items():
+            public_id = f"{VIDEO_FOLDER}/{user_id}/{uuid4()}"
+            logger.info(f"[Task ID: {task_id}] Uploading {output_profile} video to storage (public_id: {public_id})")
+            uploads[output_profile] = submit_upload(
+                output_path,
+                public_id,
                 resource_type="video",
-                public_id=public_id,
                 overwrite=True,
                 chunk_size=6000000
             )
-        secure_url = upload_result['secure_url']
-        logger.info(f"[Task ID: {task_id}] Uploaded video to Cloudinary: {secure_url}")
 
-        # Save the video URL to the database
-        video = Video(
-            user_id=user_id,
-            url=secure_url,
-            title=f"Generated_Video_{uuid4()}"
-        )
-        db.session.add(video)
+        # Package the HLS ladders while the MP4s upload; they are stored next to them as raw files
+        if HLS_ENABLED:
+            for output_profile, output_path in result.items():
+                master_playlist = package_hls(output_path, workspace.file(f"hls_{output_profile}"), encoder_profile)
+                if master_playlist is None:
+                    logger.warning(f"[Task ID: {task_id}] Could not package the {output_profile} video for HLS")
+                    continue
+                hls_uploads[output_profile] = submit_directory_upload(
+                    os.path.dirname(master_playlist), f"{VIDEO_FOLDER}/{user_id}/hls_{uuid4()}"
+                )
+
+        title = f"Generated_Video_{uuid4()}"
+        outputs = []
+        for output_profile in output_profiles:
+            secure_url = uploads[output_profile].result()['url']
+            logger.info(f"[Task ID: {task_id}] Uploaded {output_profile} video to storage: {secure_url}")
+            hls_url = _collect_hls_upload(task_id, hls_uploads.get(output_profile))
+            previews = _store_previews(task_id, user_id, result[output_profile],
+                                      workspace.file(f"previews_{output_profile}"))
+
+            # Save the video URL to the database
+            video = Video(
+                user_id=user_id,
+                url=secure_url,
+                title=title if len(output_profiles) == 1 else f"{title}_{output_profile}",
+                hls_url=hls_url,
+                **previews
+            )
+            db.session.add(video)
+            outputs.append({'output_profile': output_profile, 'url': secure_url, 'hls_url': hls_url, **previews,
+                            'video': video})
         db.session.commit()
-        logger.info(f"[Task ID: {task_id}] Video saved to database with ID: {video.id}")
-        logger.info(f"[Task ID: {task_id}] Video generation task completed for user {user_id}")
-        return {'success': True, 'url': secure_url, 'video_id': video.id}
 
+        for output in outputs:
+            output['video_id'] = output.pop('video').id
+        logger.info(f"[Task ID: {task_id}] Video(s) saved to database with ID(s): "
+                    f"{[output['video_id'] for output in outputs]}")
+        logger.info(f"[Task ID: {task_id}] Video generation task completed for user {user_id}")
+        # url and video_id stay those of the first output for existing clients
+        return {'success': True, 'url': outputs[0]['url'], 'hls_url': outputs[0]['hls_url'],
+                'poster_url': outputs[0].get('poster_url'), 'sprite_vtt_url': outputs[0].get('sprite_vtt_url'),
+                'video_id': outputs[0]['video_id'], 'outputs': outputs}
+
+    except ScratchQuotaExceeded as e:
+        # Retrying would only hit the same limit again
+        logger.error(f"[Task ID: {task_id}] Video generation for user {user_id} exceeded its scratch quota: {e}")
+        return {'success': False, 'error': str(e)}
     except Exception as exc:
         logger.error(f"[Task ID: {task_id}] Exception in video generation task for user {user_id}: {exc}",
                      exc_info=True)
@@ -310,9 +471,46 @@ def concat_video(self, user_id, data_dict):
                 f"[Task ID: {task_id}] Task failed permanently for user {user_id} after {self.max_retries} retries: {e}")
             return {'success': False, 'error': f"Max retries exceeded: {str(e)}"}
     finally:
-        if os.path.exists(result):
-            try:
-                os.remove(result)
-                logger.debug(f"[Task ID: {task_id}] Removed temporary video file: {result}")
-            except OSError as e:
-                logger.warning(f"[Task ID: {task_id}] Could not remove temporary video file {result}: {e}")
+        wait_for_uploads([*uploads.values(), *(future for package in hls_uploads.values()
+                                               for future in package.values())])
+        workspace.close()
+
+
+@celery.task(bind=True, max_retries=3)
+def render_proxy_video(self, user_id, data_dict):
+    task_id = self.request.id
+    logger.info(f"[Task ID: {task_id}] Starting proxy render task for user {user_id}")
+    workspace = ScratchWorkspace(task_id)
+
+    try:
+        sweep_expired_proxies()
+
+        workspace.open()
+        result = create_video(data_dict, PROXY_ENCODER_PROFILE, fps=PROXY_FPS,
+                              progress=RenderProgress(self, status='Rendering proxy'), workspace=workspace,
+                              media_info=_lookup_media_info(user_id, data_dict))
+        if result is None:
+            logger.error(f"[Task ID: {task_id}] Failed to create proxy video for user {user_id}")
+            return {'success': False, 'error': "Failed to create proxy video"}
+
+        # The proxy stays on local disk for a short while instead of going to storage
+        proxy_id = save_proxy(result[DEFAULT_OUTPUT_PROFILE], user_id, data_dict)
+        logger.info(f"[Task ID: {task_id}] Proxy render task completed for user {user_id}: {proxy_id}")
+        return {'success': True, 'proxy_id': proxy_id}
+
+    except ScratchQuotaExceeded as e:
+        logger.error(f"[Task ID: {task_id}] Proxy render for user {user_id} exceeded its scratch quota: {e}")
+        return {'success': False, 'error': str(e)}
+    except Exception as exc:
+        logger.error(f"[Task ID: {task_id}] Exception in proxy render task for user {user_id}: {exc}", exc_info=True)
+        try:
+            retry_count = self.request.retries + 1
+            logger.warning(
+                f"[Task ID: {task_id}] Retrying task for user {user_id}. Attempt {retry_count}/{self.max_retries}. Countdown: 5s.")
+            self.retry(exc=exc, countdown=5)
+        except self.MaxRetriesExceededError as e:
+            logger.error(
+                f"[Task ID: {task_id}] Task failed permanently for user {user_id} after {self.max_retries} retries: {e}")
+            return {'success': False, 'error': f"Max retries exceeded: {str(e)}"}
+    finally:
+        workspace.close()
@@ -6,21 +6,13 @@ import google.oauth2.credentials
 import googleapiclient.discovery
 import googleapiclient.errors
 import googleapiclient.http
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util import Retry
 
 from app.config.extensions import celery, db
 from app.config.logging_config import setup_logging
 from app.models import YoutubeUpload
-from app.utils.constant import (
-    API_SERVICE_NAME,
-    API_VERSION,
-    CHUNK_SIZE,
-    DOWNLOAD_BACKOFF_FACTOR,
-    DOWNLOAD_RETRIES,
-    DOWNLOAD_TIMEOUT,
-)
+from app.utils.blob_store import blob_path, release_blob_after_task
+from app.utils.constant import API_SERVICE_NAME, API_VERSION, CHUNK_SIZE
+from app.utils.media_cache import fetch_media
 
 logger = setup_logging()
 
@@ -127,56 +119,43 @@ def download_video_from_url(video_url, task_instance=None):
         with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4", dir=temp_dir) as temp_file:
             temp_file_path = temp_file.name
 
-            session = requests.Session()
-            retries = Retry(total=DOWNLOAD_RETRIES,
-                            backoff_factor=DOWNLOAD_BACKOFF_FACTOR,
-                            status_forcelist=[500, 502, 503, 504])  # Retry on server errors
-            session.mount('http://', HTTPAdapter(max_retries=retries))
-            # session.mount('https://', HTTPAdapter(max_retries=retries))
+        progress = {'downloaded': 0, 'total': 0, 'last_update': time.time()}
 
-            response = session.get(video_url, stream=True, timeout=DOWNLOAD_TIMEOUT)
-            response.raise_for_status()
-
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded_size = 0
-            last_progress_update_time = time.time()
+        if task_instance:
+            task_instance.update_state(state='DOWNLOADING', meta={
+                'current': 0, 'total': 100, 'status': 'Starting download...', 'bytes_total': 0
+            })
 
-            if task_instance:
+        def report_progress(downloaded_size, total_size):
+            progress.update(downloaded=downloaded_size, total=total_size)
+            now = time.time()
+            if task_instance and total_size > 0 and (now - progress['last_update'] > 1):
+                percent = int(downloaded_size / total_size * 100)
                 task_instance.update_state(state='DOWNLOADING', meta={
-                    'current': 0, 'total': 100, 'status': 'Starting download...', 'bytes_total': total_size
+                    'current': percent, 'total': 100,
+                    'status': f'Downloading: {percent}% ({downloaded_size}/{total_size} bytes)',
+                    'bytes_downloaded': downloaded_size, 'bytes_total': total_size
                 })
+                progress['last_update'] = now
 
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    temp_file.write(chunk)
-                    downloaded_size += len(chunk)
-                    now = time.time()
-                    if task_instance and total_size > 0 and (now - last_progress_update_time > 1):
-                        percent = int(downloaded_size / total_size * 100)
-                        task_instance.update_state(state='DOWNLOADING', meta={
-                            'current': percent, 'total': 100,
-                            'status': f'Downloading: {percent}% ({downloaded_size}/{total_size} bytes)',
-                            'bytes_downloaded': downloaded_size, 'bytes_total': total_size
-                        })
-                        last_progress_update_time = now
+        # Served from the node-local media cache when this video was fetched before
+        entry = fetch_media(video_url, temp_file_path, progress_callback=report_progress)
+        if entry is None:
+            logger.error(f"Error downloading video from URL {video_url}")
+            if os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
+            return None
 
+        downloaded_size = os.path.getsize(temp_file_path)
         logger.info(f"Video downloaded successfully to: {temp_file_path}")
         if task_instance:
             task_instance.update_state(state='DOWNLOADING', meta={
                 'current': 100, 'total': 100,
                 'status': f'Download complete ({downloaded_size} bytes)',
-                'bytes_downloaded': downloaded_size, 'bytes_total': total_size
+                'bytes_downloaded': downloaded_size, 'bytes_total': progress['total'] or downloaded_size
             })
         return temp_file_path
 
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error downloading video from URL {video_url}: {e}", exc_info=True)
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.remove(temp_file_path)
-            except OSError as rm_err:
-                logger.error(f"Error removing partial download {temp_file_path}: {rm_err}", exc_info=True)
-        return None
     except Exception as e:
         logger.error(f"Unexpected error during video download: {e}", exc_info=True)
         if temp_file_path and os.path.exists(temp_file_path):
@@ -258,10 +237,9 @@ def upload_from_url_task(self, user_id, credentials_dict, video_url, metadata):
 
 @celery.task(bind=True, max_retries=3, default_retry_delay=60,
              soft_time_limit=7200, time_limit=7200)
-def upload_from_file_task(self, user_id, credentials_dict, file_path, metadata):
+def upload_from_file_task(self, user_id, credentials_dict, blob_id, metadata):
     try:
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"Input file path not found: {file_path}")
+        file_path = blob_path(blob_id)
 
         logger.info(f"Task {self.request.id}: Building YouTube client.")
         youtube = _build_youtube_client_from_dict(credentials_dict)
@@ -317,9 +295,8 @@ def upload_from_file_task(self, user_id, credentials_dict, file_path, metadata):
         self.update_state(state='FAILURE', meta={'error': f"An unexpected error occurred: {str(e)}"})
         return {'success': False, 'error': f"An unexpected error occurred: {str(e)}"}
     finally:
-        if file_path and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-                logger.info(f"Cleaned up provided file: {file_path}")
-            except OSError as e:
-                logger.error(f"Error cleaning up provided file {file_path}: {e}", exc_info=True)
+        try:
+            release_blob_after_task(blob_id)
+            logger.info(f"Released uploaded file: {blob_id}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Error releasing uploaded file {blob_id}: {e}", exc_info=True)
@@ -0,0 +1,82 @@
+import numpy as np
+from pydub import AudioSegment
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import PEAKS_BASE_SAMPLES_PER_BUCKET, PEAKS_LEVEL_COUNT, PEAKS_LEVEL_FACTOR
+
+logger = setup_logging()
+
+
+def _reduce_buckets(mins, maxs, bucket_size):
+    # Pad with edge values so the last partial bucket keeps its real extremes
+    remainder = len(mins) % bucket_size
+    if remainder:
+        pad = bucket_size - remainder
+        mins = np.pad(mins, (0, pad), mode='edge')
+        maxs = np.pad(maxs, (0, pad), mode='edge')
+    return mins.reshape(-1, bucket_size).min(axis=1), maxs.reshape(-1, bucket_size).max(axis=1)
+
+
+def _quantize(values):
+    return np.clip(np.round(values * 127), -127, 127).astype(np.int8)
+
+
+def compute_peaks_from_samples(samples, sample_rate, channels=1, base_samples_per_bucket=PEAKS_BASE_SAMPLES_PER_BUCKET,
+                               level_count=PEAKS_LEVEL_COUNT, level_factor=PEAKS_LEVEL_FACTOR):
+    samples = np.asarray(samples, dtype=np.float32)
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels)
+        frame_mins, frame_maxs = samples.min(axis=1), samples.max(axis=1)
+    else:
+        frame_mins = frame_maxs = samples
+
+    frame_count = len(frame_mins)
+    levels = []
+    if frame_count:
+        mins, maxs = _reduce_buckets(frame_mins, frame_maxs, base_samples_per_bucket)
+        samples_per_bucket = base_samples_per_bucket
+        for _ in range(level_count):
+            interleaved = np.empty(len(mins) * 2, dtype=np.int8)
+            interleaved[0::2] = _quantize(mins)
+            interleaved[1::2] = _quantize(maxs)
+            levels.append({
+                'samples_per_bucket': samples_per_bucket,
+                'length': len(mins),
+                'data': interleaved.tolist()
+            })
+            if len(mins) <= 1:
+                break
+            mins, maxs = _reduce_buckets(mins, maxs, level_factor)
+            samples_per_bucket *= level_factor
+
+    return {
+        'version': 1,
+        'bits': 8,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'duration': frame_count / sample_rate if sample_rate else 0,
+        'levels': levels
+    }
+
+
+def compute_audio_peaks(source):
+    # `source` can be a file path or a file-like object, anything pydub can decode
+    audio = AudioSegment.from_file(source)
+    samples = np.array(audio.get_array_of_samples(), dtype=np.float32)
+    samples /= float(1 << (8 * audio.sample_width - 1))
+    peaks = compute_peaks_from_samples(samples, audio.frame_rate, audio.channels)
+    logger.info(f"Computed {len(peaks['levels'])} peak levels for {peaks['duration']:.2f}s of audio")
+    return peaks
+
+
+def select_peaks_level(peaks, width=None):
+    levels = peaks.get('levels') if peaks else None
+    if not levels:
+        return None
+    if not width:
+        return levels[-1]
+    # Coarsest level that still has at least `width` buckets, so the client never upsamples
+    for level in reversed(levels):
+        if level['length'] >= width:
+            return level
+    return levels[0]
@@ -0,0 +1,135 @@
+import fcntl
+import os
+import re
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+from uuid import uuid4
+
+from celery.exceptions import Retry
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import BLOB_MAX_AGE_SECONDS, BLOB_STORE_DIR, CHUNK_SIZE
+
+logger = setup_logging()
+
+# Blob ids keep the upload's extension so decoders that sniff by name (imageio, pydub) still work on the stored file
+BLOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}(\.[a-z0-9]{1,10})?$')
+EXTENSION_PATTERN = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+
+def _check_blob_id(blob_id):
+    # Ids arrive in task messages, so they must never resolve outside the store
+    if not isinstance(blob_id, str) or not BLOB_ID_PATTERN.match(blob_id):
+        raise ValueError(f"Invalid blob id: {blob_id!r}")
+    return blob_id
+
+
+def blob_path(blob_id):
+    path = os.path.join(BLOB_STORE_DIR, _check_blob_id(blob_id))
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Blob {blob_id} does not exist or was already released")
+    return path
+
+
+def _refs_path(blob_id):
+    return os.path.join(BLOB_STORE_DIR, f"{_check_blob_id(blob_id)}.refs")
+
+
+@contextmanager
+def _locked_refs(blob_id):
+    # The refs file doubles as the lock, so web and worker processes sharing the volume serialize on it
+    with open(_refs_path(blob_id), 'r+') as refs_file:
+        fcntl.flock(refs_file, fcntl.LOCK_EX)
+        try:
+            yield refs_file
+        finally:
+            fcntl.flock(refs_file, fcntl.LOCK_UN)
+
+
+def _write_refs(refs_file, count):
+    refs_file.seek(0)
+    refs_file.truncate()
+    refs_file.write(str(count))
+    refs_file.flush()
+
+
+def put_blob(stream, filename='', refs=1):
+    """Streams `stream` into the store and returns its blob id, holding `refs` references.
+
+    Each task that receives the id must release one reference when it is done with the blob.
+    """
+    os.makedirs(BLOB_STORE_DIR, exist_ok=True)
+    extension = os.path.splitext(filename)[1].lower()
+    blob_id = f"{uuid4().hex}{extension if EXTENSION_PATTERN.match(extension) else ''}"
+
+    with open(_refs_path(blob_id), 'w') as refs_file:
+        refs_file.write(str(refs))
+    temp_path = os.path.join(BLOB_STORE_DIR, f".{blob_id}.tmp")
+    try:
+        with open(temp_path, 'wb') as f:
+            shutil.copyfileobj(stream, f, CHUNK_SIZE)
+        os.replace(temp_path, os.path.join(BLOB_STORE_DIR, blob_id))
+    except Exception:
+        for path in (temp_path, _refs_path(blob_id)):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    logger.debug(f"Stored blob {blob_id} with {refs} reference(s)")
+    return blob_id
+
+
+def blob_size(blob_id):
+    return os.path.getsize(blob_path(blob_id))
+
+
+def release_blob(blob_id, count=1):
+    """Drops `count` references and removes the blob once nobody holds it. Returns the remaining count."""
+    try:
+        with _locked_refs(blob_id) as refs_file:
+            refs = int(refs_file.read() or 0) - count
+            if refs > 0:
+                _write_refs(refs_file, refs)
+                return refs
+            blob_file = os.path.join(BLOB_STORE_DIR, blob_id)
+            if os.path.exists(blob_file):
+                os.remove(blob_file)
+            os.remove(_refs_path(blob_id))
+    except FileNotFoundError:
+        logger.warning(f"Blob {blob_id} was already removed")
+        return 0
+
+    logger.debug(f"Removed blob {blob_id}")
+    return 0
+
+
+def release_blob_after_task(blob_id):
+    """Releases the task's reference from its finally block, unless the task is being retried and still needs it."""
+    if isinstance(sys.exc_info()[1], Retry):
+        return None
+    return release_blob(blob_id)
+
+
+def sweep_expired_blobs():
+    """Removes blobs whose tasks never released them (lost messages, killed workers). Run when a worker starts."""
+    if not os.path.isdir(BLOB_STORE_DIR):
+        return 0
+
+    removed = 0
+    now = time.time()
+    for name in os.listdir(BLOB_STORE_DIR):
+        path = os.path.join(BLOB_STORE_DIR, name)
+        try:
+            if now - os.path.getmtime(path) <= BLOB_MAX_AGE_SECONDS:
+                continue
+            os.remove(path)
+            if not name.endswith(('.refs', '.tmp')):
+                removed += 1
+        except OSError:
+            continue
+
+    if removed:
+        logger.info(f"Removed {removed} expired blob(s)")
+    return removed
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 from dotenv import load_dotenv
 from edge_tts.constants import DEFAULT_VOICE
@@ -11,6 +12,11 @@ CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME')
 CLOUDINARY_API_KEY = os.getenv('CLOUDINARY_API_KEY')
 CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
 CLOUDINARY_URL = os.getenv('CLOUDINARY_URL')
+CLOUDINARY_STORAGE_BACKEND = "cloudinary"
+LOCAL_STORAGE_BACKEND = "local"
+STORAGE_BACKEND = (os.getenv('STORAGE_BACKEND') or CLOUDINARY_STORAGE_BACKEND).lower()  # Where media is persisted
+LOCAL_STORAGE_DIR = os.getenv('LOCAL_STORAGE_DIR') or os.path.join(tempfile.gettempdir(), 'be-tkpm-storage')
+LOCAL_STORAGE_URL = (os.getenv('LOCAL_STORAGE_URL') or 'http://localhost:5000/storage').rstrip('/')
 AVATAR_FOLDER = os.getenv('AVATAR_FOLDER')
 VIDEO_FOLDER = os.getenv('VIDEO_FOLDER')
 AUDIO_FOLDER = os.getenv('AUDIO_FOLDER')
@@ -51,15 +57,97 @@ CHUNK_SIZE = 3 * 1024 * 1024
 DOWNLOAD_RETRIES = 3
 DOWNLOAD_BACKOFF_FACTOR = 1
 DOWNLOAD_TIMEOUT = (10, 60)
+DOWNLOAD_CONCURRENCY = int(os.getenv('DOWNLOAD_CONCURRENCY') or 4)  # Timeline assets fetched at once per render
+UPLOAD_CONCURRENCY = int(os.getenv('UPLOAD_CONCURRENCY') or 3)  # Finished renders uploaded at once per worker process
+UPLOAD_PART_SIZE = 6 * 1000 * 1000  # Files larger than one part are uploaded in parts; Cloudinary needs at least 5MB
+UPLOAD_PART_CONCURRENCY = int(os.getenv('UPLOAD_PART_CONCURRENCY') or 4)  # Parts of one file uploaded at once
+UPLOAD_PART_RETRIES = 3
+UPLOAD_BACKOFF_FACTOR = 1
 
 CASCADE_RULES = "all, delete-orphan"
 
 EFFECT_TRANSITION_DURATION = 1.0  # Duration of fade/slide effects in seconds
 ZOOM_FACTOR = 1.15  # How much to zoom in (e.g., 1.15 = 15% zoom)
+MAX_ZOOM_FACTOR = 2.0  # Largest zoom factor a request may ask for
+MAX_TRANSITION_DURATION = 5.0  # Longest fade/slide a request may ask for, in seconds
 TARGET_FPS = 24  # Frames per second for output video clips
 EFFECTS_TO_APPLY = ['zoom_only', 'slide_in_left', 'fade_in', 'fade_out']
+MOVIEPY_EFFECTS_ENGINE = "moviepy"
+FFMPEG_EFFECTS_ENGINE = "ffmpeg"
+EFFECTS_ENGINE = (os.getenv('EFFECTS_ENGINE') or MOVIEPY_EFFECTS_ENGINE).lower()  # Renderer for image-to-video effects
+EFFECTS_FAN_OUT = (os.getenv('EFFECTS_FAN_OUT') or 'True').lower() == 'true'  # One render task per effect
+RENDER_QUEUE = os.getenv('RENDER_QUEUE') or 'render'
 FFMPEG_PATH = "ffmpeg"
+FFPROBE_PATH = "ffprobe"
 FPS = 25
 VIDEO_FORMAT = "yuv420p"
 TARGET_WIDTH = 1280
 TARGET_HEIGHT = 720
+
+# Output frame sizes selectable per render request; sources are fitted and padded to one of them
+OUTPUT_PROFILES = {
+    'landscape': (TARGET_WIDTH, TARGET_HEIGHT),
+    'portrait': (1080, 1920),
+}
+DEFAULT_OUTPUT_PROFILE = os.getenv('DEFAULT_OUTPUT_PROFILE') or 'landscape'
+
+# Named x264 settings selectable per render request; `scale` shrinks the output resolution
+ENCODER_PROFILES = {
+    'preview': {'preset': 'ultrafast', 'crf': 30, 'scale': 0.5, 'tune_still_images': False},
+    'final': {'preset': 'medium', 'crf': 20, 'scale': 1.0, 'tune_still_images': False},
+    'stillimage': {'preset': 'medium', 'crf': 20, 'scale': 1.0, 'tune_still_images': True},
+}
+DEFAULT_ENCODER_PROFILE = 'final'
+RENDER_CPU_BUDGET = os.getenv('RENDER_CPU_BUDGET')  # CPUs this worker may use for encoding, auto-detected if unset
+# Renders expected to run at once on this worker. Most of the worker's processes run short non-render tasks, so this
+# is kept apart from the Procfile's --concurrency
+RENDER_CONCURRENCY = int(os.getenv('RENDER_CONCURRENCY') or 2)
+SEGMENT_ENCODER_THREADS = 2  # x264 threads per timeline segment when segments are encoded in parallel
+TIMELINE_SINGLE_PASS_MAX_CLIPS = 40  # Larger timelines are encoded per segment to bound open decoders
+KEYFRAME_INTERVAL_SECONDS = 2  # Regular keyframes let finished renders be cut into HLS segments without re-encoding
+
+# Finished renders are also packaged for adaptive streaming; the render itself is the top rung, stream-copied
+HLS_ENABLED = (os.getenv('HLS_ENABLED') or 'True').lower() == 'true'
+HLS_SEGMENT_SECONDS = 6  # A multiple of KEYFRAME_INTERVAL_SECONDS so every rung cuts at the same keyframes
+# Lower rungs by the short side of the frame; only those smaller than the render are encoded
+HLS_RENDITIONS = (
+    {'short_side': 720, 'maxrate': '3000k'},
+    {'short_side': 480, 'maxrate': '1400k'},
+    {'short_side': 360, 'maxrate': '800k'},
+)
+
+# Poster frames and scrub sprite sheets are cut from a keyframe-only decode of each finished video
+POSTER_TIME_SECONDS = 3  # Or halfway through shorter videos
+SPRITE_THUMBNAIL_WIDTH = 160
+SPRITE_COLUMNS = 10
+SPRITE_MAX_THUMBNAILS = 100  # Longer videos space their thumbnails further apart instead
+
+# Proxy renders are quick, low-resolution previews of a timeline kept on disk instead of Cloudinary. Workers write
+# them and the web process serves them, so like BLOB_STORE_DIR the directory must be shared and has no default
+PROXY_ENCODER_PROFILE = 'preview'
+PROXY_FPS = 12
+PROXY_CACHE_DIR = os.getenv('PROXY_CACHE_DIR')
+PROXY_TTL_SECONDS = int(os.getenv('PROXY_TTL_SECONDS') or 3600)
+
+# Encoded timeline segments are kept on local disk so re-renders only encode the clips that changed
+SEGMENT_CACHE_DIR = os.getenv('SEGMENT_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'be-tkpm-segments')
+SEGMENT_CACHE_MAX_BYTES = int(os.getenv('SEGMENT_CACHE_MAX_BYTES') or 2 * 1024 ** 3)  # 0 disables the cache
+
+# Remote assets (stock clips, narration, generated images) are fetched once per node and revalidated by ETag
+MEDIA_CACHE_DIR = os.getenv('MEDIA_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'be-tkpm-media')
+MEDIA_CACHE_MAX_BYTES = int(os.getenv('MEDIA_CACHE_MAX_BYTES') or 5 * 1024 ** 3)  # 0 disables the cache
+
+# Each render/upload task gets a private scratch directory, on tmpfs when a full quota fits there
+SCRATCH_DIR = os.getenv('SCRATCH_DIR')  # Overrides the tmpfs/disk choice when set
+SCRATCH_TMPFS_DIR = os.getenv('SCRATCH_TMPFS_DIR') or '/dev/shm'
+SCRATCH_QUOTA_BYTES = int(os.getenv('SCRATCH_QUOTA_BYTES') or 4 * 1024 ** 3)
+SCRATCH_ORPHAN_MAX_AGE_SECONDS = 24 * 3600  # Workspaces older than this are swept even if their owner looks alive
+
+# Uploads are written once to a volume shared by the web and worker containers; tasks receive only a reference.
+# There is no default: a per-host temp dir would not be visible to workers running on another host
+BLOB_STORE_DIR = os.getenv('BLOB_STORE_DIR')
+BLOB_MAX_AGE_SECONDS = int(os.getenv('BLOB_MAX_AGE_SECONDS') or 24 * 3600)  # Unreleased blobs are swept after this
+
+PEAKS_BASE_SAMPLES_PER_BUCKET = 512  # Finest waveform resolution stored for the timeline editor
+PEAKS_LEVEL_COUNT = 4  # Number of waveform resolutions, each coarser by PEAKS_LEVEL_FACTOR
+PEAKS_LEVEL_FACTOR = 4
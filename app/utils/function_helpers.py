@@ -4,6 +4,8 @@ import os
 import re
 import subprocess
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from uuid import uuid4
 
 import langdetect
@@ -16,7 +18,21 @@ from pydub import AudioSegment
 
 from app.config.logging_config import setup_logging
 from app.utils.ai_agents import PROMPT_CORRECT_TEXT
-from app.utils.constant import FFMPEG_PATH, FPS, OPEN_ROUTER_API_KEY, TARGET_HEIGHT, TARGET_WIDTH, VIDEO_FORMAT
+from app.utils.constant import (
+    DEFAULT_OUTPUT_PROFILE,
+    DOWNLOAD_CONCURRENCY,
+    FFMPEG_PATH,
+    FPS,
+    OPEN_ROUTER_API_KEY,
+    SEGMENT_CACHE_MAX_BYTES,
+    TIMELINE_SINGLE_PASS_MAX_CLIPS,
+    VIDEO_FORMAT,
+)
+from app.utils.media_cache import fetch_media
+from app.utils.video.profiles import ffmpeg_encoder_args, get_encoder_threads, get_output_size, get_segment_workers
+from app.utils.video.progress import RenderProgress
+from app.utils.video.segment_cache import fetch_cached_segment, segment_cache_key, store_segment
+from app.utils.video.timeline import compile_output_split, compile_timeline, normalize_filter
 from app.utils.whisper_support_language import whisper_support_language
 
 client = OpenAI(
@@ -127,7 +143,7 @@ def format_srt_timestamp(seconds):
     return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
 
 
-def convert_audio_to_text(file_path, language, model_name):
+def convert_audio_to_text(file_path, language, model_name, workdir=None):
     temp_wav_file = None
     srt_file_path = None
     segments_json = None
@@ -193,7 +209,7 @@ def convert_audio_to_text(file_path, language, model_name):
             logger.warning("No valid text segments found after processing.")
             return None, None
 
-        srt_file_path = os.path.join(os.getcwd(), f"srt_{uuid4()}.srt")
+        srt_file_path = os.path.join(workdir or tempfile.gettempdir(), f"srt_{uuid4()}.srt")
 
         logger.info(f"Saving SRT file to: {srt_file_path}")
         with open(srt_file_path, "w", encoding="utf-8") as f:
@@ -216,8 +232,47 @@ def convert_audio_to_text(file_path, language, model_name):
                 logger.error(f"Error removing temporary WAV file {temp_wav_file}: {oe}")
 
 
-def run_ffmpeg_command(command_list):
+def _run_ffmpeg_with_progress(command_list, progress_callback):
+    # `-progress pipe:1` prints key=value blocks to stdout; stderr goes to a file so neither pipe can fill up and block
+    command_list = [command_list[0], "-progress", "pipe:1", "-nostats", *command_list[1:]]
+    logger.info(f"Executing FFmpeg command: {' '.join(map(str, command_list))}")
+    with tempfile.TemporaryFile(mode='w+', encoding='utf-8', errors='replace') as stderr_file:
+        process = subprocess.Popen(command_list, stdout=subprocess.PIPE, stderr=stderr_file, text=True,
+                                   encoding='utf-8', errors='replace')
+        try:
+            for line in process.stdout:
+                key, _, value = line.strip().partition('=')
+                # out_time_us and the older, misnamed out_time_ms are both in microseconds
+                if key in ('out_time_us', 'out_time_ms') and value.lstrip('-').isdigit():
+                    try:
+                        progress_callback(max(int(value), 0) / 1_000_000)
+                    except Exception as e:
+                        logger.warning(f"FFmpeg progress callback failed: {e}")
+        except BaseException:
+            # Never leave ffmpeg running (or a zombie) when the read loop is interrupted
+            process.kill()
+            raise
+        finally:
+            process.stdout.close()
+            process.wait()
+
+        if process.returncode != 0:
+            stderr_file.seek(0)
+            logger.error(f"Error executing FFmpeg command: {' '.join(map(str, command_list))}")
+            logger.error(f"FFmpeg STDERR: {stderr_file.read()[-2000:]}")
+            return False
+    return True
+
+
+def run_ffmpeg_command(command_list, progress_callback=None):
+    """Runs an ffmpeg command, returning True on success.
+
+    `progress_callback(out_time_seconds)` is called as ffmpeg reports how much output it has written.
+    """
     try:
+        if progress_callback:
+            return _run_ffmpeg_with_progress(command_list, progress_callback)
+
         logger.info(f"Executing FFmpeg command: {' '.join(map(str, command_list))}")
         process = subprocess.run(command_list, check=True, capture_output=True, text=True, encoding='utf-8',
                                  errors='replace')
@@ -240,125 +295,287 @@ def run_ffmpeg_command(command_list):
         return False
 
 
-def download_file(url, local_filename):
-    logger.info(f"Downloading {url} to {local_filename}...")
+def remove_file(file_path):
     try:
-        os.makedirs(os.path.dirname(local_filename), exist_ok=True)
-        with requests.get(url, stream=True, timeout=30) as r:
-            r.raise_for_status()
-            with open(local_filename, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
-        logger.info(f"Downloaded {local_filename} successfully.")
-        return local_filename
-    except requests.exceptions.Timeout:
-        logger.error(f"Error downloading {url}: Timeout")
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            logger.debug(f"Removed temporary file: {file_path}")
+    except Exception as e:
+        logger.warning(f"Failed to remove temporary file {file_path}: {e}")
+
+
+def encode_segment(clip, download, local_clip_path, output_segment_path, vf_common_options, encoder_profile=None,
+                   threads=None, progress_callback=None, keyframe_offset=0):
+    """Waits for a clip's download, then encodes it into a normalized segment. Returns the segment path or None.
+
+    `keyframe_offset` is where the segment starts in the timeline, so its keyframes land on the timeline's clock.
+    """
+    clip_id = clip["id"]
+    clip_type = clip["type"]
+    duration = clip["duration"]
+
+    if not download.result():
+        logger.error(f"Failed to download clip {clip_id} ({clip['sourceUrl']}). Skipping.")
         return None
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error downloading {url}: {e}", exc_info=True)
+
+    cache_key = None
+    if SEGMENT_CACHE_MAX_BYTES > 0:
+        cache_key = segment_cache_key(local_clip_path, clip_type, duration, vf_common_options, encoder_profile,
+                                      keyframe_offset)
+        if fetch_cached_segment(cache_key, output_segment_path):
+            logger.info(f"Reused cached segment for {clip_type} {clip_id}")
+            if progress_callback:
+                progress_callback(float(duration))
+            remove_file(local_clip_path)
+            return output_segment_path
+
+    ffmpeg_cmd_segment = [FFMPEG_PATH]
+
+    if clip_type == "image":
+        logger.info(f"Processing image: {clip_id}")
+        ffmpeg_cmd_segment.extend([
+            "-loop", "1",  # Loop input image
+            "-i", local_clip_path,
+            "-t", str(duration),
+            "-vf", vf_common_options,
+            *ffmpeg_encoder_args(encoder_profile, still_image=True, threads=threads, keyframe_offset=keyframe_offset),
+            "-an",  # No audio for image segments
+            "-y",  # Overwrite output file if it exists
+            output_segment_path
+        ])
+    else:
+        logger.info(f"Processing video: {clip_id}")
+        ffmpeg_cmd_segment.extend([
+            "-i", local_clip_path,
+            "-t", str(duration),  # Trim/extend video to its specified duration
+            "-vf", vf_common_options,
+            # Re-encode for uniform parameters
+            *ffmpeg_encoder_args(encoder_profile, threads=threads, keyframe_offset=keyframe_offset),
+            "-an",  # Remove existing audio from segment
+            "-y",  # Overwrite output file if it exists
+            output_segment_path
+        ])
+
+    started_at = time.monotonic()
+    success = run_ffmpeg_command(ffmpeg_cmd_segment, progress_callback)
+    logger.info(f"Encoded {clip_type} {clip_id} in {time.monotonic() - started_at:.2f}s")
+
+    # Original clip can be removed immediately after processing
+    remove_file(local_clip_path)
+
+    if not success:
+        logger.error(f"Failed to process {clip_type} {clip_id}. Skipping.")
         return None
-    except Exception as e:
-        logger.error(f"An unexpected error occurred during download of {url}: {e}", exc_info=True)
+    if cache_key:
+        store_segment(cache_key, output_segment_path)
+    return output_segment_path
+
+
+def concat_segments_copy(segment_files, output_path):
+    """Joins segments with the concat demuxer and stream copy. Only valid when they share codec parameters."""
+    list_path = f"{os.path.splitext(output_path)[0]}_segments.txt"
+    try:
+        with open(list_path, 'w') as f:
+            for segment_path in segment_files:
+                # The concat demuxer list quotes paths in single quotes
+                escaped_path = os.path.abspath(segment_path).replace("'", "'\\''")
+                f.write(f"file '{escaped_path}'\n")
+
+        return run_ffmpeg_command([
+            FFMPEG_PATH,
+            "-f", "concat",
+            "-safe", "0",  # Allow absolute paths in the list
+            "-i", list_path,
+            "-c", "copy",
+            "-y",
+            output_path
+        ])
+    finally:
+        if os.path.exists(list_path):
+            os.remove(list_path)
+
+
+def render_timeline_single_pass(timeline_segments, main_audio_path, total_duration, output_sizes, vf_common_options,
+                                encoder_profile=None, progress_callback=None, workdir=None):
+    """Renders the whole timeline in one ffmpeg process once every asset has landed.
+
+    One output is encoded per size in `output_sizes`. Returns their paths in the same order, or None.
+    """
+    segments = []
+    for segment in timeline_segments:
+        if segment['download'].result():
+            segments.append(segment)
+        else:
+            logger.error(f"Failed to download clip {segment['id']}. Skipping.")
+    if not segments:
+        return None
+
+    output_filenames = [os.path.join(workdir or os.getcwd(), f"output_video_{uuid4()}.mp4") for _ in output_sizes]
+    command = compile_timeline(
+        segments, main_audio_path, total_duration, list(zip(output_filenames, output_sizes)), vf_common_options,
+        encoder_profile
+    )
+
+    logger.info(f"Rendering {len(segments)} clips to {len(output_sizes)} output(s) in a single pass")
+    started_at = time.monotonic()
+    if not run_ffmpeg_command(command, progress_callback):
+        cleanup_temp_files(output_filenames)
         return None
+    logger.info(f"Rendered timeline in a single pass in {time.monotonic() - started_at:.2f}s")
+    return output_filenames
 
 
-def create_video(data_dict):
+def split_render_outputs(source_path, output_sizes, encoder_profile=None, progress_callback=None, workdir=None):
+    """Re-frames a finished render into one output per size in a single decode. Returns their paths or None."""
+    output_filenames = [os.path.join(workdir or os.getcwd(), f"output_video_{uuid4()}.mp4") for _ in output_sizes]
+    command = compile_output_split(source_path, list(zip(output_filenames, output_sizes)), encoder_profile)
+
+    started_at = time.monotonic()
+    if not run_ffmpeg_command(command, progress_callback):
+        cleanup_temp_files(output_filenames)
+        return None
+    logger.info(f"Split render into {len(output_sizes)} output(s) in {time.monotonic() - started_at:.2f}s")
+    return output_filenames
+
+
+def create_video(data_dict, encoder_profile=None, fps=FPS, progress=None, workspace=None, output_profiles=None,
+                 media_info=None):
+    """Renders a timeline once per output profile, decoding every source a single time.
+
+    The timeline is composed at the first profile's size; other profiles are scaled and padded from it.
+    `media_info` maps source URLs to their ingest metadata, so sources that already match the output skip the
+    matching normalization steps. Returns {output_profile: path} or None if the render failed.
+    """
+    # Intermediates go to the task's scratch workspace when it has one
+    workdir = workspace.path if workspace else os.getcwd()
     # Keep track of all created files for cleanup
     temp_files = []
 
+    output_profiles = list(output_profiles or [DEFAULT_OUTPUT_PROFILE])
+    output_sizes = [get_output_size(output_profile, encoder_profile) for output_profile in output_profiles]
+    vf_common_options = normalize_filter(output_sizes[0], fps)
+
+    sorted_clips = sorted(data_dict["clips"], key=lambda c: c["startTime"])
+    # Sources probed at ingest only get the normalization steps they still need
+    media_info = media_info or {}
+    clip_filters = [normalize_filter(output_sizes[0], fps, media_info.get(clip["sourceUrl"])) for clip in sorted_clips]
+    processed_segment_files = []
+
+    # Every asset is downloaded concurrently; each segment is encoded as soon as its own download lands
+    download_pool = ThreadPoolExecutor(max_workers=DOWNLOAD_CONCURRENCY)
     logger.info("Downloading Media")
     downloaded_files = {}
+    main_audio_download = None
+    main_audio_filename = None
     main_audio_url = data_dict.get("audioUrl")
     if main_audio_url:
         main_audio_filename_ext = main_audio_url.split('.')[-1].split('?')[0] if '.' in main_audio_url else "mp3"
-        main_audio_filename = os.path.join(os.getcwd(), f"main_audio_{uuid4()}.{main_audio_filename_ext}")
+        main_audio_filename = os.path.join(workdir, f"main_audio_{uuid4()}.{main_audio_filename_ext}")
         temp_files.append(main_audio_filename)  # Add to cleanup list
-
-        if not download_file(main_audio_url, main_audio_filename):
-            logger.error(
-                "Failed to download main audio. Video will be created without main audio if possible, or abort if critical.")
-            downloaded_files["main_audio"] = None
-        else:
-            downloaded_files["main_audio"] = main_audio_filename
+        main_audio_download = download_pool.submit(fetch_media, main_audio_url, main_audio_filename)
     else:
         logger.error("No main audioUrl provided.")
-        downloaded_files["main_audio"] = None
-
-    processed_segment_files = []
-
-    logger.info("Processing Clips")
-    sorted_clips = sorted(data_dict["clips"], key=lambda c: c["startTime"])
-
-    vf_common_options = (
-        f"scale={TARGET_WIDTH}:{TARGET_HEIGHT}:force_original_aspect_ratio=decrease,"
-        f"pad={TARGET_WIDTH}:{TARGET_HEIGHT}:(ow-iw)/2:(oh-ih)/2:color=black,"
-        f"setsar=1,fps={FPS},format={VIDEO_FORMAT}"
-    )
 
+    clip_downloads = []
     for i, clip in enumerate(sorted_clips):
-        clip_id = clip["id"]
-        clip_type = clip["type"]
         source_url = clip["sourceUrl"]
-        duration = clip["duration"]
-
         original_filename_ext = "tmp"
         if '.' in source_url.split('/')[-1]:
             original_filename_ext = source_url.split('.')[-1].split('?')[0]
 
-        local_clip_path = os.path.join(os.getcwd(), f"clip_{i}_{clip_id}_{uuid4()}.{original_filename_ext}")
+        local_clip_path = os.path.join(workdir, f"clip_{i}_{clip['id']}_{uuid4()}.{original_filename_ext}")
         temp_files.append(local_clip_path)  # Add to cleanup list
 
-        output_segment_path = os.path.join(os.getcwd(), f"segment_{i}_{clip_id}_{uuid4()}.mp4")
-        temp_files.append(output_segment_path)  # Add to cleanup list
-
-        if not download_file(source_url, local_clip_path):
-            logger.error(f"Failed to download clip {clip_id} ({source_url}). Skipping.")
-            continue
+        download = None
+        if clip["type"] in ("image", "video"):
+            download = download_pool.submit(fetch_media, source_url, local_clip_path)
+        clip_downloads.append((local_clip_path, download))
 
-        ffmpeg_cmd_segment = [FFMPEG_PATH]
-
-        if clip_type == "image":
-            logger.info(f"Processing image: {clip_id}")
-            ffmpeg_cmd_segment.extend([
-                "-loop", "1",  # Loop input image
-                "-i", local_clip_path,
-                "-t", str(duration),
-                "-vf", vf_common_options,
-                "-an",  # No audio for image segments
-                "-y",  # Overwrite output file if it exists
-                output_segment_path
-            ])
-        elif clip_type == "video":
-            logger.info(f"Processing video: {clip_id}")
-            ffmpeg_cmd_segment.extend([
-                "-i", local_clip_path,
-                "-t", str(duration),  # Trim/extend video to its specified duration
-                "-vf", vf_common_options,
-                "-c:v", "libx264",  # Re-encode for compatibility and uniform parameters
-                "-preset", "medium",  # A balance between speed and quality
-                "-an",  # Remove existing audio from segment
-                "-y",  # Overwrite output file if it exists
-                output_segment_path
-            ])
-        else:
-            logger.warning(f"Unsupported clip type: {clip_type} for clip {clip_id}. Skipping.")
+    timeline_segments = []
+    segment_offset = 0  # Where each segment starts once the segments are joined
+    for i, (clip, (local_clip_path, download), clip_filter) in enumerate(zip(sorted_clips, clip_downloads,
+                                                                             clip_filters)):
+        if download is None:
             continue
+        timeline_segments.append({
+            'index': i, 'id': clip["id"], 'type': clip["type"], 'path': local_clip_path, 'duration': clip["duration"],
+            'download': download, 'vf': clip_filter, 'offset': segment_offset
+        })
+        segment_offset += float(clip["duration"])
+    segment_offsets = {segment['index']: segment['offset'] for segment in timeline_segments}
+    timeline_duration = data_dict.get("totalDuration") or sum(float(clip["duration"]) for clip in sorted_clips)
+    progress = progress or RenderProgress()
+
+    # Single pass decodes every source once but leaves no segments behind, so with the segment cache enabled every
+    # timeline is encoded per segment; that fills the cache and lets later renders of the same clips reuse it
+    if SEGMENT_CACHE_MAX_BYTES <= 0 and 0 < len(timeline_segments) <= TIMELINE_SINGLE_PASS_MAX_CLIPS:
+        main_audio_path = main_audio_filename if main_audio_download and main_audio_download.result() else None
+        progress.add_stage('timeline', timeline_duration)
+        output_filenames = render_timeline_single_pass(
+            timeline_segments, main_audio_path, data_dict.get("totalDuration"), output_sizes, vf_common_options,
+            encoder_profile, progress.tracker('timeline'), workdir
+        )
+        if output_filenames:
+            download_pool.shutdown()
+            cleanup_temp_files(temp_files)
+            if workspace:
+                workspace.check_quota()
+            logger.info(f"Successfully created video(s): {output_filenames}")
+            return dict(zip(output_profiles, output_filenames))
+        logger.warning("Single-pass timeline render failed, falling back to the multi-stage render")
+        progress.reset()
 
-        if not run_ffmpeg_command(ffmpeg_cmd_segment):
-            logger.error(f"Failed to process {clip_type} {clip_id}. Skipping.")
-            continue
+    logger.info("Processing Clips")
+    segment_workers = get_segment_workers(len(sorted_clips))
+    segment_threads = max(1, get_encoder_threads() // segment_workers)
+    logger.info(f"Encoding {len(sorted_clips)} segments with {segment_workers} workers, {segment_threads} threads each")
 
-        # Add to processed segments only if ffmpeg was successful
-        processed_segment_files.append(output_segment_path)
+    # Segment encodes carry most of the work; concat and mux are mostly stream copies
+    for i, clip in enumerate(sorted_clips):
+        progress.add_stage(f"segment_{i}", clip["duration"])
+    progress.add_stage('mux', timeline_duration, weight=timeline_duration * 0.1)
+    if len(output_profiles) > 1:
+        # Re-framing decodes the render once but encodes every other profile
+        progress.add_stage('outputs', timeline_duration, weight=timeline_duration * (len(output_profiles) - 1))
+
+    segment_jobs = []
+    with ThreadPoolExecutor(max_workers=segment_workers) as encode_pool:
+        for i, clip in enumerate(sorted_clips):
+            local_clip_path, download = clip_downloads[i]
+            if download is None:
+                logger.warning(f"Unsupported clip type: {clip['type']} for clip {clip['id']}. Skipping.")
+                continue
 
-        # Original clip can be removed immediately after processing
-        try:
-            if os.path.exists(local_clip_path):
-                os.remove(local_clip_path)
-                temp_files.remove(local_clip_path)  # Remove from cleanup list once deleted
-                logger.debug(f"Removed temporary file: {local_clip_path}")
-        except Exception as e:
-            logger.warning(f"Failed to remove temporary file {local_clip_path}: {e}")
+            output_segment_path = os.path.join(workdir, f"segment_{i}_{clip['id']}_{uuid4()}.mp4")
+            temp_files.append(output_segment_path)  # Add to cleanup list
+            segment_jobs.append((encode_pool.submit(
+                encode_segment, clip, download, local_clip_path, output_segment_path, clip_filters[i],
+                encoder_profile, segment_threads, progress.tracker(f"segment_{i}"), segment_offsets[i]
+            ), clip["type"]))
+
+        # Futures are collected in submission order, so concatenation keeps the timeline order. Keyframe placement does
+        # not affect whether streams can be joined, so it is left out of the comparison
+        segment_encoder_args = set()
+        for job, clip_type in segment_jobs:
+            output_segment_path = job.result()
+            if output_segment_path:
+                processed_segment_files.append(output_segment_path)
+                segment_encoder_args.add(tuple(
+                    ffmpeg_encoder_args(encoder_profile, still_image=clip_type == "image", threads=segment_threads)
+                ))
+
+    if workspace:
+        workspace.check_quota()
+
+    if main_audio_download is None:
+        downloaded_files["main_audio"] = None
+    elif not main_audio_download.result():
+        logger.error(
+            "Failed to download main audio. Video will be created without main audio if possible, or abort if critical.")
+        downloaded_files["main_audio"] = None
+    else:
+        downloaded_files["main_audio"] = main_audio_filename
+    download_pool.shutdown()
 
     if not processed_segment_files:
         logger.error("No video segments were processed successfully. Aborting.")
@@ -368,7 +585,7 @@ def create_video(data_dict):
 
     # Concatenate Video Segments using the concat filter
     logger.info("Concatenating Video Segments")
-    intermediate_video_no_audio = os.path.join(os.getcwd(), f"intermediate_no_audio_{uuid4()}.mp4")
+    intermediate_video_no_audio = os.path.join(workdir, f"intermediate_no_audio_{uuid4()}.mp4")
     temp_files.append(intermediate_video_no_audio)  # Add to cleanup list
 
     if len(processed_segment_files) == 1:
@@ -392,33 +609,39 @@ def create_video(data_dict):
             logger.warning(f"Failed to remove temporary file {processed_segment_files[0]}: {e}")
 
     else:
-        inputs_for_concat_filter = []
-        filter_complex_str_parts = []
-        for i, segment_path in enumerate(processed_segment_files):
-            inputs_for_concat_filter.extend(["-i", segment_path])
-            filter_complex_str_parts.append(
-                f"[{i}:v:0]")  # Assumes video stream is the first stream (0) in each segment
-
-        filter_complex_str = "".join(filter_complex_str_parts) + \
-                             f"concat=n={len(processed_segment_files)}:v=1:a=0[v]"
-        # v=1 means 1 video stream output, a=0 means 0 audio stream output
-
-        concat_command = [FFMPEG_PATH] + \
-                         inputs_for_concat_filter + \
-                         ["-filter_complex", filter_complex_str,
-                          "-map", "[v]",  # Map the output of concat filter
-                          "-c:v", "libx264",  # Re-encode during concat for maximum stability
-                          "-preset", "medium",
-                          "-pix_fmt", VIDEO_FORMAT,
-                          "-r", str(FPS),  # Ensure consistent frame rate
-                          "-y",  # Overwrite output
-                          intermediate_video_no_audio]
-
-        if not run_ffmpeg_command(concat_command):
-            logger.error("Failed to concatenate video segments. Aborting.")
-            # Clean up any files created before failure
-            cleanup_temp_files(temp_files)
-            return None
+        # Segments share size, fps and pixel format through their normalize filters; when they were also encoded with
+        # the same x264 settings their streams are compatible and can be joined without re-encoding
+        if len(segment_encoder_args) == 1 and concat_segments_copy(processed_segment_files,
+                                                                    intermediate_video_no_audio):
+            logger.info(f"Concatenated {len(processed_segment_files)} segments with stream copy")
+        else:
+            logger.warning("Segments cannot be stream-copied, falling back to the concat filter")
+            inputs_for_concat_filter = []
+            filter_complex_str_parts = []
+            for i, segment_path in enumerate(processed_segment_files):
+                inputs_for_concat_filter.extend(["-i", segment_path])
+                filter_complex_str_parts.append(
+                    f"[{i}:v:0]")  # Assumes video stream is the first stream (0) in each segment
+
+            filter_complex_str = "".join(filter_complex_str_parts) + \
+                                 f"concat=n={len(processed_segment_files)}:v=1:a=0[v]"
+            # v=1 means 1 video stream output, a=0 means 0 audio stream output
+
+            concat_command = [FFMPEG_PATH] + \
+                             inputs_for_concat_filter + \
+                             ["-filter_complex", filter_complex_str,
+                              "-map", "[v]",  # Map the output of concat filter
+                              *ffmpeg_encoder_args(encoder_profile),  # Re-encode during concat for maximum stability
+                              "-pix_fmt", VIDEO_FORMAT,
+                              "-r", str(fps),  # Ensure consistent frame rate
+                              "-y",  # Overwrite output
+                              intermediate_video_no_audio]
+
+            if not run_ffmpeg_command(concat_command):
+                logger.error("Failed to concatenate video segments. Aborting.")
+                # Clean up any files created before failure
+                cleanup_temp_files(temp_files)
+                return None
 
         # Clean up segment files after concatenation
         for segment_path in processed_segment_files:
@@ -464,20 +687,32 @@ def create_video(data_dict):
     if total_duration_spec is not None:
         final_command.extend(["-t", str(total_duration_spec)])  # Trim/extend to total_duration_spec
 
-    output_filename = f"output_video_{uuid4()}.mp4"
+    output_filename = os.path.join(workdir, f"output_video_{uuid4()}.mp4")
 
-    final_command.extend(["-y", output_filename])
+    # The moov atom goes first so playback can start before the whole file has downloaded
+    final_command.extend(["-movflags", "+faststart", "-y", output_filename])
 
-    success = run_ffmpeg_command(final_command)
+    success = run_ffmpeg_command(final_command, progress.tracker('mux'))
 
     cleanup_temp_files(temp_files)
 
     if not success:
         logger.info("Failed to add audio and finalize video. Check logs.")
         return None
-    else:
-        logger.info(f"Successfully created video: {output_filename}")
-        return output_filename
+
+    outputs = {output_profiles[0]: output_filename}
+    if len(output_profiles) > 1:
+        logger.info(f"Re-framing the render for {', '.join(output_profiles[1:])}")
+        derived_filenames = split_render_outputs(output_filename, output_sizes[1:], encoder_profile,
+                                                 progress.tracker('outputs'), workdir)
+        if not derived_filenames:
+            logger.error("Failed to re-frame the render for the other output profiles.")
+            cleanup_temp_files([output_filename])
+            return None
+        outputs.update(zip(output_profiles[1:], derived_filenames))
+
+    logger.info(f"Successfully created video(s): {outputs}")
+    return outputs
 
 
 def cleanup_temp_files(file_list):
@@ -0,0 +1,158 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from uuid import uuid4
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import MEDIA_CACHE_DIR, MEDIA_CACHE_MAX_BYTES
+from app.utils.video.downloads import download_file
+
+logger = setup_logging()
+
+HASH_CHUNK_SIZE = 1024 * 1024
+OBJECTS_DIR = os.path.join(MEDIA_CACHE_DIR, 'objects')
+INDEX_DIR = os.path.join(MEDIA_CACHE_DIR, 'index')
+LOCKS_DIR = os.path.join(MEDIA_CACHE_DIR, 'locks')
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_or_copy(source, destination):
+    # A hard link keeps the data alive for the caller even if the cache entry is evicted meanwhile
+    if os.path.exists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+@contextmanager
+def _file_lock(name):
+    # flock is shared across processes, so prefork workers on the same node serialize on it
+    with open(os.path.join(LOCKS_DIR, f"{name}.lock"), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_index(url_key):
+    try:
+        with open(os.path.join(INDEX_DIR, f"{url_key}.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_index(url_key, entry):
+    index_path = os.path.join(INDEX_DIR, f"{url_key}.json")
+    temp_path = f"{index_path}.{uuid4().hex}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(entry, f)
+    os.replace(temp_path, index_path)
+
+
+def _entry_from_response(url, response):
+    return {
+        'url': url,
+        'etag': response.headers.get('etag'),
+        'last_modified': response.headers.get('last-modified'),
+        'content_type': response.headers.get('content-type', '')
+    }
+
+
+def fetch_media(url, destination, progress_callback=None):
+    """Places the content of `url` at `destination`, fetching it only if the node-local cache has no fresh copy.
+
+    Cached copies are revalidated with the stored ETag/Last-Modified. Returns the cache entry
+    ({'url', 'etag', 'last_modified', 'content_type', 'sha256', 'size'}) or None if the download failed.
+    """
+    if MEDIA_CACHE_MAX_BYTES <= 0:
+        response = download_file(url, destination, progress_callback=progress_callback)
+        return _entry_from_response(url, response) if response is not None else None
+
+    for directory in (OBJECTS_DIR, INDEX_DIR, LOCKS_DIR):
+        os.makedirs(directory, exist_ok=True)
+
+    url_key = hashlib.sha256(url.encode()).hexdigest()
+    with _file_lock(url_key):
+        entry = _read_index(url_key)
+        headers = {}
+        if entry and os.path.exists(os.path.join(OBJECTS_DIR, entry['sha256'])):
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        temp_path = os.path.join(OBJECTS_DIR, f".{uuid4().hex}.tmp")
+        try:
+            response = download_file(url, temp_path, headers=headers, progress_callback=progress_callback)
+            if response is None:
+                return None
+
+            if response.status_code == 304 and headers:
+                logger.info(f"Media cache hit for {url}")
+            else:
+                sha256 = file_sha256(temp_path)
+                entry = dict(_entry_from_response(url, response), sha256=sha256, size=os.path.getsize(temp_path))
+                os.replace(temp_path, os.path.join(OBJECTS_DIR, sha256))
+                _write_index(url_key, entry)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        object_path = os.path.join(OBJECTS_DIR, entry['sha256'])
+        try:
+            link_or_copy(object_path, destination)
+            os.utime(object_path)  # Mark as recently used for LRU eviction
+        except OSError as e:
+            # Evicted between revalidation and linking; fetch it directly instead
+            logger.warning(f"Cached media for {url} disappeared ({e}), downloading it again")
+            response = download_file(url, destination, progress_callback=progress_callback)
+            if response is None:
+                return None
+
+    evict_media()
+    return entry
+
+
+def evict_media(max_bytes=MEDIA_CACHE_MAX_BYTES):
+    """Removes least recently used objects until the cache fits in `max_bytes`. Stale index entries are ignored."""
+    with _file_lock('evict'):
+        entries = []
+        with os.scandir(OBJECTS_DIR) as it:
+            for entry in it:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total_size <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+                removed += 1
+            except OSError:
+                continue
+
+    if removed:
+        logger.info(f"Evicted {removed} cached media object(s), cache size is now {total_size} bytes")
+    return removed
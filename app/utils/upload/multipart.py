@@ -0,0 +1,72 @@
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cloudinary.exceptions
+import cloudinary.uploader
+import cloudinary.utils
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import UPLOAD_BACKOFF_FACTOR, UPLOAD_PART_CONCURRENCY, UPLOAD_PART_RETRIES, UPLOAD_PART_SIZE
+
+logger = setup_logging()
+
+# Errors that would fail again on retry; anything else (timeouts, 5xx, rate limits) is retried per part
+PERMANENT_ERRORS = (cloudinary.exceptions.BadRequest, cloudinary.exceptions.AuthorizationRequired,
+                    cloudinary.exceptions.NotAllowed, cloudinary.exceptions.NotFound)
+
+
+def part_ranges(file_size, part_size=UPLOAD_PART_SIZE):
+    return [(start, min(start + part_size, file_size)) for start in range(0, file_size, part_size)]
+
+
+def _upload_part(mapped, file_name, start, end, file_size, upload_id, options):
+    headers = {
+        "Content-Range": f"bytes {start}-{end - 1}/{file_size}",
+        "X-Unique-Upload-Id": upload_id
+    }
+    for attempt in range(UPLOAD_PART_RETRIES + 1):
+        try:
+            # Slicing the map copies just this part, so memory stays at one part per in-flight upload
+            return cloudinary.uploader.upload_large_part((file_name, mapped[start:end]), http_headers=headers,
+                                                         **options)
+        except PERMANENT_ERRORS:
+            raise
+        except Exception as e:
+            if attempt == UPLOAD_PART_RETRIES:
+                raise
+            delay = UPLOAD_BACKOFF_FACTOR * (2 ** attempt)
+            logger.warning(f"Upload of bytes {start}-{end - 1} of {file_name} failed "
+                           f"(attempt {attempt + 1}/{UPLOAD_PART_RETRIES + 1}): {e}. Retrying in {delay}s.")
+            time.sleep(delay)
+
+
+def upload_multipart(path, part_size=UPLOAD_PART_SIZE, max_workers=UPLOAD_PART_CONCURRENCY, **options):
+    """Uploads `path` to Cloudinary in parts sent concurrently, like cloudinary.uploader.upload_large.
+
+    All parts but the last go up in parallel; the last one is sent once they are stored, since it is the one
+    Cloudinary assembles the asset on. Only failed parts are retried. Returns the final upload result.
+    """
+    file_size = os.path.getsize(path)
+    file_name = options.pop('filename', os.path.basename(path))
+    options.pop('chunk_size', None)
+    upload_id = cloudinary.utils.random_public_id()
+    ranges = part_ranges(file_size, part_size)
+    started = time.monotonic()
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        *parts, last = ranges
+        if parts:
+            with ThreadPoolExecutor(max_workers=max(min(max_workers, len(parts)), 1),
+                                    thread_name_prefix='upload-part') as pool:
+                futures = [
+                    pool.submit(_upload_part, mapped, file_name, start, end, file_size, upload_id, options)
+                    for start, end in parts
+                ]
+                for future in futures:
+                    future.result()
+        result = _upload_part(mapped, file_name, *last, file_size, upload_id, options)
+
+    logger.info(f"Uploaded {path} ({file_size} bytes) in {len(ranges)} part(s) in {time.monotonic() - started:.2f}s")
+    return result
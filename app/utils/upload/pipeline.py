@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import UPLOAD_CONCURRENCY
+from app.utils.upload.storage import get_storage
+
+logger = setup_logging()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_upload_pool():
+    """Returns the process-wide upload pool. Uploads are network-bound, so they run beside the CPU-bound encoder."""
+    global _pool
+    with _pool_lock:
+        # Created lazily so each prefork child gets its own threads
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(UPLOAD_CONCURRENCY, 1), thread_name_prefix='upload')
+    return _pool
+
+
+def _upload(path, key, resource_type, options):
+    started = time.monotonic()
+    result = get_storage().put(path, key, resource_type, **options)
+    logger.info(f"Uploaded {path} to {result['url']} in {time.monotonic() - started:.2f}s")
+    return result
+
+
+def submit_upload(path, key, resource_type='video', **options):
+    """Queues `path` for StorageBackend.put under `key` and returns a future of its result.
+
+    The file must stay on disk until the future is done; use wait_for_uploads before cleaning it up.
+    """
+    return get_upload_pool().submit(_upload, path, key, resource_type, options)
+
+
+def submit_directory_upload(directory, key_prefix, resource_type='raw', **options):
+    """Queues every file under `directory`, keyed by its relative path under `key_prefix`. Returns {relpath: future}.
+
+    Keys keep the file extensions, so files that reference each other by relative path (HLS playlists and their
+    segments) still resolve once stored.
+    """
+    futures = {}
+    for root, _, filenames in os.walk(directory):
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            relpath = os.path.relpath(path, directory).replace(os.sep, '/')
+            futures[relpath] = submit_upload(path, f"{key_prefix}/{relpath}", resource_type, **options)
+    return futures
+
+
+def wait_for_uploads(futures):
+    # Called from cleanup paths: drop uploads that have not started and let running ones finish with their files
+    futures = [future for future in futures if future is not None]
+    for future in futures:
+        future.cancel()
+    wait(futures)
@@ -0,0 +1,230 @@
+import glob
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+import cloudinary.api
+import cloudinary.exceptions
+import cloudinary.uploader
+import cloudinary.utils
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import (
+    CHUNK_SIZE,
+    CLOUDINARY_STORAGE_BACKEND,
+    DOWNLOAD_TIMEOUT,
+    LOCAL_STORAGE_BACKEND,
+    LOCAL_STORAGE_DIR,
+    LOCAL_STORAGE_URL,
+    STORAGE_BACKEND,
+    UPLOAD_CONCURRENCY,
+    UPLOAD_PART_SIZE,
+)
+from app.utils.media_cache import link_or_copy
+from app.utils.upload.multipart import upload_multipart
+from app.utils.video.downloads import get_download_session
+
+logger = setup_logging()
+
+CLOUDINARY_BATCH_SIZE = 100  # Most public ids the Admin API deletes per call
+
+
+class StorageError(Exception):
+    pass
+
+
+class StorageBackend:
+    """Persists media under slash-separated keys such as f"{VIDEO_FOLDER}/{user_id}/{uuid}".
+
+    `resource_type` uses Cloudinary's vocabulary ('image', 'video' for video and audio, 'raw' for anything else, whose
+    keys include the file extension). `put` returns
+    {'url', 'key', 'bytes'}; the returned key is the one to pass to the other methods.
+    """
+
+    name = None
+
+    def put(self, source, key, resource_type='image', **options):
+        """Stores `source` (a path, bytes or a readable file object) under `key`."""
+        raise NotImplementedError
+
+    def stream(self, key, resource_type='image'):
+        """Yields the stored content in chunks."""
+        raise NotImplementedError
+
+    def get_url(self, key, resource_type='image'):
+        raise NotImplementedError
+
+    def delete(self, key, resource_type='image'):
+        """Removes `key`. Returns False if there was nothing to remove."""
+        raise NotImplementedError
+
+    def put_many(self, items, max_workers=UPLOAD_CONCURRENCY):
+        """Stores several items ({'source', 'key', 'resource_type', **options}) at once.
+
+        Returns the results in order; an item that failed gets its StorageError in place of a result.
+        """
+        def put_item(item):
+            try:
+                return self.put(**item)
+            except StorageError as e:
+                return e
+
+        items = list(items)
+        with ThreadPoolExecutor(max_workers=max(min(max_workers, len(items)), 1)) as pool:
+            return list(pool.map(put_item, items))
+
+    def delete_many(self, keys, resource_type='image'):
+        return {key: self.delete(key, resource_type) for key in keys}
+
+
+class CloudinaryStorage(StorageBackend):
+    name = CLOUDINARY_STORAGE_BACKEND
+
+    def put(self, source, key, resource_type='image', **options):
+        try:
+            part_size = max(options.get('chunk_size') or 0, UPLOAD_PART_SIZE)
+            if isinstance(source, str) and os.path.getsize(source) > part_size:
+                # Large renders and uploads go up in concurrent parts instead of one sequential stream
+                result = upload_multipart(source, part_size=part_size, public_id=key, resource_type=resource_type,
+                                          **options)
+            elif isinstance(source, str):
+                with open(source, 'rb') as f:
+                    result = cloudinary.uploader.upload(f, public_id=key, resource_type=resource_type, **options)
+            else:
+                result = cloudinary.uploader.upload(source, public_id=key, resource_type=resource_type, **options)
+        except (cloudinary.exceptions.Error, OSError) as e:
+            raise StorageError(f"Cloudinary upload of {key} failed: {e}") from e
+
+        if not result.get('secure_url'):
+            raise StorageError(f"Cloudinary upload of {key} returned no URL: {result}")
+        return {'url': result['secure_url'], 'key': result.get('public_id', key), 'bytes': result.get('bytes')}
+
+    def stream(self, key, resource_type='image'):
+        try:
+            with get_download_session().get(self.get_url(key, resource_type), stream=True,
+                                            timeout=DOWNLOAD_TIMEOUT) as r:
+                r.raise_for_status()
+                yield from r.iter_content(chunk_size=CHUNK_SIZE)
+        except Exception as e:
+            raise StorageError(f"Could not read {key} from Cloudinary: {e}") from e
+
+    def get_url(self, key, resource_type='image'):
+        return cloudinary.utils.cloudinary_url(key, resource_type=resource_type, secure=True)[0]
+
+    def delete(self, key, resource_type='image'):
+        try:
+            result = cloudinary.uploader.destroy(key, resource_type=resource_type, invalidate=True)
+        except cloudinary.exceptions.Error as e:
+            raise StorageError(f"Cloudinary delete of {key} failed: {e}") from e
+        return result.get('result') == 'ok'
+
+    def delete_many(self, keys, resource_type='image'):
+        # The Admin API deletes whole batches per request instead of one round trip per key
+        keys = list(keys)
+        deleted = {}
+        for start in range(0, len(keys), CLOUDINARY_BATCH_SIZE):
+            batch = keys[start:start + CLOUDINARY_BATCH_SIZE]
+            try:
+                result = cloudinary.api.delete_resources(batch, resource_type=resource_type, invalidate=True)
+            except cloudinary.exceptions.Error as e:
+                raise StorageError(f"Cloudinary batch delete failed: {e}") from e
+            statuses = result.get('deleted', {})
+            deleted.update({key: statuses.get(key) == 'deleted' for key in batch})
+        return deleted
+
+
+class LocalStorage(StorageBackend):
+    """Keeps media on the local filesystem and serves it from the /storage route.
+
+    Meant for offline load tests and benchmarks. Cloudinary-only options such as transformations are ignored;
+    `format` only sets the stored file's extension.
+    """
+
+    name = LOCAL_STORAGE_BACKEND
+
+    def __init__(self, root=LOCAL_STORAGE_DIR, base_url=LOCAL_STORAGE_URL):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url
+
+    def _path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise StorageError(f"Invalid storage key: {key!r}")
+        return path
+
+    def local_path(self, key):
+        # Keys may be given without the extension put() added, like Cloudinary public ids
+        path = self._path(key)
+        if os.path.isfile(path):
+            return path
+        matches = sorted(glob.glob(f"{glob.escape(path)}.*"))
+        if not matches:
+            raise StorageError(f"{key} is not in local storage")
+        return matches[0]
+
+    def put(self, source, key, resource_type='image', **options):
+        extension = f".{options['format']}" if options.get('format') else ''
+        # Raw keys carry their own extension, as Cloudinary public ids for raw files do
+        if not extension and resource_type != 'raw':
+            name = source if isinstance(source, str) else getattr(source, 'name', None)
+            extension = os.path.splitext(name)[1] if isinstance(name, str) else ''
+        stored_key = f"{key}{extension}"
+        path = self._path(stored_key)
+
+        temp_path = f"{path}.{uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if isinstance(source, str):
+                link_or_copy(source, temp_path)
+            elif isinstance(source, (bytes, bytearray)):
+                with open(temp_path, 'wb') as f:
+                    f.write(source)
+            else:
+                with open(temp_path, 'wb') as f:
+                    shutil.copyfileobj(source, f, CHUNK_SIZE)
+            os.replace(temp_path, path)
+        except OSError as e:
+            raise StorageError(f"Could not store {stored_key} locally: {e}") from e
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return {'url': self.get_url(stored_key, resource_type), 'key': stored_key, 'bytes': os.path.getsize(path)}
+
+    def stream(self, key, resource_type='image'):
+        with open(self.local_path(key), 'rb') as f:
+            yield from iter(lambda: f.read(CHUNK_SIZE), b'')
+
+    def get_url(self, key, resource_type='image'):
+        return f"{self.base_url}/{os.path.relpath(self.local_path(key), self.root).replace(os.sep, '/')}"
+
+    def delete(self, key, resource_type='image'):
+        try:
+            os.remove(self.local_path(key))
+        except (StorageError, OSError):
+            return False
+        return True
+
+
+STORAGE_BACKENDS = {
+    CLOUDINARY_STORAGE_BACKEND: CloudinaryStorage,
+    LOCAL_STORAGE_BACKEND: LocalStorage,
+}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Returns the configured STORAGE_BACKEND."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if STORAGE_BACKEND not in STORAGE_BACKENDS:
+                raise ValueError(f"Unknown storage backend '{STORAGE_BACKEND}'. "
+                                 f"Available backends: {', '.join(STORAGE_BACKENDS)}")
+            _storage = STORAGE_BACKENDS[STORAGE_BACKEND]()
+            logger.info(f"Using the {STORAGE_BACKEND} storage backend")
+    return _storage
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import (
+    CHUNK_SIZE,
+    DOWNLOAD_BACKOFF_FACTOR,
+    DOWNLOAD_CONCURRENCY,
+    DOWNLOAD_RETRIES,
+    DOWNLOAD_TIMEOUT,
+)
+
+logger = setup_logging()
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_download_session():
+    """Returns the process-wide HTTP session, so repeated downloads from the same host reuse connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # Retries are handled per asset in download_file, which also covers failures mid-stream
+            adapter = HTTPAdapter(pool_connections=DOWNLOAD_CONCURRENCY, pool_maxsize=DOWNLOAD_CONCURRENCY)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+    return _session
+
+
+def _is_retryable(error):
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                              requests.exceptions.ChunkedEncodingError))
+
+
+def download_file(url, local_filename, retries=DOWNLOAD_RETRIES, backoff_factor=DOWNLOAD_BACKOFF_FACTOR, headers=None,
+                  progress_callback=None):
+    """Streams `url` into `local_filename` with per-asset retries.
+
+    Returns the (closed) response so callers can read its headers, or None on failure. A 304 answer to conditional
+    `headers` leaves `local_filename` untouched. `progress_callback(downloaded_bytes, total_bytes)` follows each chunk.
+    """
+    logger.info(f"Downloading {url} to {local_filename}...")
+    os.makedirs(os.path.dirname(local_filename) or '.', exist_ok=True)
+    session = get_download_session()
+
+    for attempt in range(retries + 1):
+        try:
+            with session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT, headers=headers) as r:
+                r.raise_for_status()
+                if r.status_code == 304:
+                    logger.info(f"{url} not modified.")
+                    return r
+
+                total_size = int(r.headers.get('content-length', 0))
+                downloaded_size = 0
+                with open(local_filename, 'wb') as f:
+                    for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        downloaded_size += len(chunk)
+                        if progress_callback:
+                            progress_callback(downloaded_size, total_size)
+            logger.info(f"Downloaded {local_filename} successfully.")
+            return r
+        except requests.exceptions.RequestException as e:
+            if attempt < retries and _is_retryable(e):
+                delay = backoff_factor * (2 ** attempt)
+                logger.warning(
+                    f"Error downloading {url} (attempt {attempt + 1}/{retries + 1}): {e}. Retrying in {delay}s.")
+                time.sleep(delay)
+                continue
+            logger.error(f"Error downloading {url}: {e}", exc_info=True)
+            return None
+        except Exception as e:
+            logger.error(f"An unexpected error occurred during download of {url}: {e}", exc_info=True)
+            return None
+    return None
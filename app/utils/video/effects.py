@@ -0,0 +1,167 @@
+import numpy as np
+from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import FFMPEG_PATH, VIDEO_FORMAT
+from app.utils.function_helpers import run_ffmpeg_command
+from app.utils.video.profiles import ffmpeg_encoder_args, output_encoder_threads
+
+logger = setup_logging()
+
+SUPPORTED_EFFECTS = ('zoom_only', 'slide_in_left', 'fade_in', 'fade_out')
+# zoompan rounds its crop offsets to whole pixels; zooming an oversampled input keeps that jitter sub-pixel
+ZOOMPAN_OVERSAMPLE = 2
+
+
+def _scale_frame(frame, factor):
+    if factor >= 1:
+        return frame
+    return (frame * np.float32(max(factor, 0))).astype(np.uint8)
+
+
+def derive_effect_frame(effect_type, frame, t, duration, transition_duration):
+    """Derives one effect's frame from the shared zoomed frame at time `t`."""
+    if effect_type == 'zoom_only':
+        return frame
+
+    if effect_type == 'fade_in':
+        fade = min(transition_duration, duration / 2)
+        return _scale_frame(frame, t / fade) if fade > 0 else frame
+
+    if effect_type == 'fade_out':
+        fade = min(transition_duration, duration / 2)
+        return _scale_frame(frame, (duration - t) / fade) if fade > 0 else frame
+
+    if effect_type == 'slide_in_left':
+        slide = min(transition_duration, duration)
+        if slide <= 0 or t >= slide:
+            return frame
+        # Frame enters from the left edge over a black background
+        w = frame.shape[1]
+        hidden = min(int(round(w * (1 - t / slide))), w)
+        slid = np.zeros_like(frame)
+        slid[:, :w - hidden] = frame[:, hidden:]
+        return slid
+
+    raise ValueError(f"Effect type '{effect_type}' not implemented.")
+
+
+def render_effects_single_pass(frame_source, frame_count, size, fps, duration, transition_duration, outputs,
+                               write_options=None, on_complete=None):
+    """Renders every effect in `outputs` ({effect_type: path}) from one pass over the shared frames.
+
+    Each base frame is computed once by `frame_source(index)` and fanned out to one encoder per effect.
+    `on_complete(effect_type, path)` is called as soon as an output is finalized, while the others still flush.
+    Returns {effect_type: error} for the effects that failed; the others are complete on disk.
+    """
+    write_options = write_options or {}
+    writers = {}
+    errors = {}
+
+    try:
+        for effect_type, output_path in outputs.items():
+            try:
+                writers[effect_type] = FFMPEG_VideoWriter(
+                    output_path, size, fps, codec=write_options.get('codec', 'libx264'),
+                    preset=write_options.get('preset', 'medium'), threads=write_options.get('threads', 1),
+                    ffmpeg_params=write_options.get('ffmpeg_params')
+                )
+            except Exception as e:
+                logger.error(f"Could not start encoder for effect '{effect_type}': {e}", exc_info=True)
+                errors[effect_type] = e
+
+        for index in range(frame_count):
+            if not writers:
+                break
+            t = index / fps
+            base_frame = frame_source(index)
+            for effect_type, writer in list(writers.items()):
+                try:
+                    frame = derive_effect_frame(effect_type, base_frame, t, duration, transition_duration)
+                    writer.write_frame(np.ascontiguousarray(frame))
+                except Exception as e:
+                    logger.error(f"Error rendering frame {index} for effect '{effect_type}': {e}", exc_info=True)
+                    errors[effect_type] = e
+                    writers.pop(effect_type)
+                    try:
+                        writer.close()
+                    except Exception:
+                        pass
+    finally:
+        for effect_type, writer in writers.items():
+            try:
+                writer.close()
+            except Exception as e:
+                logger.error(f"Error finalizing encoder for effect '{effect_type}': {e}", exc_info=True)
+                errors.setdefault(effect_type, e)
+                continue
+            if on_complete and effect_type not in errors:
+                on_complete(effect_type, outputs[effect_type])
+
+    return errors
+
+
+def build_effects_filter_graph(effects, size, fps, duration, zoom_factor, transition_duration):
+    """Expresses the shared zoom and every effect as one filter graph. Returns (filter_complex, output labels)."""
+    width, height = size
+    frame_count = max(int(round(duration * fps)), 1)
+    fade = min(transition_duration, duration / 2)
+    slide = min(transition_duration, duration)
+
+    split_labels = [f"[z{i}]" for i in range(len(effects))]
+    chains = [
+        f"[0:v]scale={width * ZOOMPAN_OVERSAMPLE}:{height * ZOOMPAN_OVERSAMPLE},setsar=1,"
+        f"zoompan=z='1+({zoom_factor}-1)*on/{fps}/{duration}':"
+        f"x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':d={frame_count}:s={width}x{height}:fps={fps},"
+        # Pinned to RGB like the MoviePy engine; left to negotiation, an overlay branch moves the whole graph to a
+        # format in which fade's black level is off by about a frame
+        f"format=rgb24,split={len(effects)}" + "".join(split_labels)
+    ]
+
+    output_labels = []
+    for i, effect_type in enumerate(effects):
+        label = f"[out{i}]"
+        if effect_type == 'zoom_only':
+            chains.append(f"[z{i}]null{label}")
+        elif effect_type == 'fade_in':
+            chains.append(f"[z{i}]fade=t=in:st=0:d={fade}{label}")
+        elif effect_type == 'fade_out':
+            chains.append(f"[z{i}]fade=t=out:st={duration - fade}:d={fade}{label}")
+        elif effect_type == 'slide_in_left':
+            chains.append(f"color=c=black:s={width}x{height}:r={fps}:d={duration}[bg{i}]")
+            chains.append(f"[bg{i}][z{i}]overlay=x='min(0,-w+w*t/{slide})':y=0:shortest=1{label}")
+        else:
+            raise ValueError(f"Effect type '{effect_type}' not implemented.")
+        output_labels.append(label)
+
+    return ";".join(chains), output_labels
+
+
+def render_effects_with_ffmpeg(img_file, size, fps, duration, zoom_factor, transition_duration, outputs,
+                               encoder_profile=None):
+    """Renders every effect in `outputs` ({effect_type: path}) from `img_file` in a single ffmpeg process.
+
+    Returns {effect_type: error} for the effects that failed, mirroring render_effects_single_pass.
+    """
+    effects = list(outputs)
+    if not effects:
+        return {}
+
+    filter_complex, output_labels = build_effects_filter_graph(
+        effects, size, fps, duration, zoom_factor, transition_duration
+    )
+    command = [FFMPEG_PATH, "-i", img_file, "-filter_complex", filter_complex]
+    threads = output_encoder_threads(len(effects))
+    for effect_type, label in zip(effects, output_labels):
+        command.extend([
+            "-map", label,
+            *ffmpeg_encoder_args(encoder_profile, threads=threads),
+            "-pix_fmt", VIDEO_FORMAT,
+            "-an",
+            "-y", outputs[effect_type]
+        ])
+
+    if run_ffmpeg_command(command):
+        return {}
+    error = RuntimeError("ffmpeg effects render failed")
+    return {effect_type: error for effect_type in effects}
@@ -0,0 +1,33 @@
+import time
+
+from PIL import Image, ImageOps
+
+from app.config.logging_config import setup_logging
+
+logger = setup_logging()
+
+PAD_COLOR = (0, 0, 0)
+EXIF_ORIENTATION = 0x0112
+
+
+def normalize_image(source_path, output_path, size):
+    """Decodes `source_path` once and writes it to `output_path` as a `size` PNG, fitted and padded with black.
+
+    Effects then render at the output size whatever the upload's resolution. Raises the usual Pillow errors
+    (UnidentifiedImageError, OSError) for files that are not valid images. Returns the source (width, height).
+    """
+    started = time.monotonic()
+    with Image.open(source_path) as img:
+        rotated = img.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8)
+        source_size = img.size[::-1] if rotated else img.size
+        scale = min(size[0] / source_size[0], size[1] / source_size[1])
+        # JPEGs can be decoded at a fraction of their size, far cheaper than decoding 24MP and resizing.
+        # Twice the fitted size is kept so the LANCZOS pass still has detail to work with.
+        img.draft('RGB', (int(img.size[0] * scale * 2), int(img.size[1] * scale * 2)))
+        frame = ImageOps.exif_transpose(img).convert('RGB')
+        frame = ImageOps.pad(frame, size, method=Image.LANCZOS, color=PAD_COLOR)
+        frame.save(output_path, format='PNG', compress_level=1)
+
+    logger.info(f"Normalized {source_path} from {source_size[0]}x{source_size[1]} to {size[0]}x{size[1]} "
+                f"in {time.monotonic() - started:.2f}s")
+    return source_size
@@ -0,0 +1,128 @@
+import os
+import time
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import FFMPEG_PATH, HLS_RENDITIONS, HLS_SEGMENT_SECONDS, VIDEO_FORMAT
+from app.utils.function_helpers import run_ffmpeg_command
+from app.utils.video.probe import probe_media, probe_video_packets
+from app.utils.video.profiles import ffmpeg_encoder_args, output_encoder_threads
+
+logger = setup_logging()
+
+HLS_MASTER_PLAYLIST = 'master.m3u8'
+
+
+def hls_rungs(width, height):
+    """Returns (width, height, maxrate) for each HLS rendition smaller than a `width`x`height` render."""
+    short_side = min(width, height)
+    rungs = []
+    for rendition in HLS_RENDITIONS:
+        if rendition['short_side'] >= short_side:
+            continue
+        scale = rendition['short_side'] / short_side
+        # libx264 with yuv420p needs even dimensions
+        rungs.append((max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2),
+                      rendition['maxrate']))
+    return rungs
+
+
+def _stream_encoder_args(index, encoder_profile, threads):
+    # Qualify every encoder option with the output stream it is for, so the copied top rung is left alone
+    args = ffmpeg_encoder_args(encoder_profile, threads=threads)
+    qualified = []
+    for flag, value in zip(args[::2], args[1::2]):
+        qualified.extend([f"-c:v:{index}" if flag == "-c:v" else f"{flag}:v:{index}", value])
+    return qualified
+
+
+def segments_cut_on_keyframes(packets):
+    """Tells whether a video's own keyframes fall where the encoded rungs will cut their segments.
+
+    Encoded rungs get a keyframe on the first frame at or after every multiple of KEYFRAME_INTERVAL_SECONDS, and the
+    HLS muxer cuts each variant at its first keyframe past every multiple of HLS_SEGMENT_SECONDS. A stream-copied rung
+    only cuts on the same frames when it has a keyframe on each of those frames itself.
+    """
+    boundary = 0
+    for pts, is_keyframe in packets:
+        if pts < boundary - 1e-4:
+            continue
+        if not is_keyframe:
+            return False
+        boundary = (pts // HLS_SEGMENT_SECONDS + 1) * HLS_SEGMENT_SECONDS
+    return True
+
+
+def compile_hls_package(source_path, output_dir, rungs, has_audio, encoder_profile=None, copy_top_rung=True):
+    """Compiles one ffmpeg command that writes an HLS ladder for `source_path` into `output_dir`.
+
+    The source's own video stream is the top rung. It is stream-copied when `copy_top_rung` is set, which is only
+    safe when its keyframes fall on every segment boundary (see segments_cut_on_keyframes); otherwise it is
+    re-encoded from the same decode. Each of `rungs` is scaled from that decode and encoded with its bitrate capped.
+    Encoded rungs force keyframes on the same clock, so every variant cuts its segments on the same frames.
+    """
+    command = [FFMPEG_PATH, "-i", source_path]
+    labels = ([] if copy_top_rung else ["top"]) + [f"rung{i}" for i in range(len(rungs))]
+    if labels:
+        filters = [f"[0:v:0]split={len(labels)}" + "".join(f"[{label}_in]" for label in labels)]
+        if not copy_top_rung:
+            filters.append(f"[top_in]format={VIDEO_FORMAT}[top]")
+        filters.extend(f"[rung{i}_in]scale={width}:{height},setsar=1,format={VIDEO_FORMAT}[rung{i}]"
+                       for i, (width, height, _) in enumerate(rungs))
+        command.extend(["-filter_complex", ";".join(filters)])
+
+    threads = output_encoder_threads(len(labels))
+    if copy_top_rung:
+        command.extend(["-map", "0:v:0", "-c:v:0", "copy"])
+    else:
+        command.extend(["-map", "[top]", *_stream_encoder_args(0, encoder_profile, threads)])
+    for i, (_, _, maxrate) in enumerate(rungs, start=1):
+        command.extend(["-map", f"[rung{i - 1}]", *_stream_encoder_args(i, encoder_profile, threads),
+                        f"-maxrate:v:{i}", maxrate, f"-bufsize:v:{i}", maxrate])
+
+    variant_count = len(rungs) + 1
+    if has_audio:
+        # Every variant carries the same audio, copied rather than re-encoded
+        for _ in range(variant_count):
+            command.extend(["-map", "0:a:0"])
+        command.extend(["-c:a", "copy"])
+        stream_map = " ".join(f"v:{i},a:{i}" for i in range(variant_count))
+    else:
+        stream_map = " ".join(f"v:{i}" for i in range(variant_count))
+
+    command.extend([
+        "-f", "hls",
+        "-hls_time", str(HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", os.path.join(output_dir, "%v", "segment_%03d.ts"),
+        "-master_pl_name", HLS_MASTER_PLAYLIST,
+        "-var_stream_map", stream_map,
+        "-y", os.path.join(output_dir, "%v", "index.m3u8")
+    ])
+    return command
+
+
+def package_hls(source_path, output_dir, encoder_profile=None, progress_callback=None):
+    """Packages a finished MP4 as an HLS ladder in `output_dir`.
+
+    Playlists reference their segments by relative path, so the directory can be stored as is under one key prefix.
+    Returns the master playlist path, or None if the source could not be packaged.
+    """
+    info = probe_media(source_path)
+    if not info or not info['has_video']:
+        logger.error(f"Cannot package {source_path} for HLS: no readable video stream")
+        return None
+
+    rungs = hls_rungs(info['width'], info['height'])
+    packets = probe_video_packets(source_path)
+    copy_top_rung = bool(packets) and segments_cut_on_keyframes(packets)
+    if not copy_top_rung:
+        logger.info(f"Keyframes of {source_path} are off the segment boundaries, re-encoding its top HLS rung")
+    os.makedirs(output_dir, exist_ok=True)
+    command = compile_hls_package(source_path, output_dir, rungs, info['has_audio'], encoder_profile, copy_top_rung)
+
+    started_at = time.monotonic()
+    if not run_ffmpeg_command(command, progress_callback):
+        return None
+    logger.info(f"Packaged {source_path} as HLS with {len(rungs) + 1} rendition(s) in "
+                f"{time.monotonic() - started_at:.2f}s")
+    return os.path.join(output_dir, HLS_MASTER_PLAYLIST)
@@ -0,0 +1,115 @@
+import math
+import os
+import time
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import (
+    FFMPEG_PATH,
+    KEYFRAME_INTERVAL_SECONDS,
+    POSTER_TIME_SECONDS,
+    SPRITE_COLUMNS,
+    SPRITE_MAX_THUMBNAILS,
+    SPRITE_THUMBNAIL_WIDTH,
+)
+from app.utils.function_helpers import run_ffmpeg_command
+from app.utils.video.probe import probe_media
+
+logger = setup_logging()
+
+POSTER_NAME = 'poster.jpg'
+SPRITE_NAME = 'sprite.jpg'
+SPRITE_VTT_NAME = 'thumbnails.vtt'
+
+
+def poster_time(duration):
+    # Rounded down to a keyframe, the only frames a keyframe-only decode sees
+    return math.floor(min(POSTER_TIME_SECONDS, duration / 2) / KEYFRAME_INTERVAL_SECONDS) * KEYFRAME_INTERVAL_SECONDS
+
+
+def sprite_layout(duration, width, height):
+    """Returns how a `duration`-second `width`x`height` video is laid out as a sprite sheet of thumbnails."""
+    # Thumbnails fall on keyframes, so the interval is a whole number of keyframe intervals
+    interval = KEYFRAME_INTERVAL_SECONDS * max(1, math.ceil(duration / (KEYFRAME_INTERVAL_SECONDS *
+                                                                        SPRITE_MAX_THUMBNAILS)))
+    count = max(1, math.ceil(duration / interval))
+    columns = min(count, SPRITE_COLUMNS)
+    return {
+        'interval': interval,
+        'count': count,
+        'columns': columns,
+        'rows': math.ceil(count / columns),
+        'width': SPRITE_THUMBNAIL_WIDTH,
+        'height': max(2, round(SPRITE_THUMBNAIL_WIDTH * height / width / 2) * 2),
+    }
+
+
+def compile_previews(source_path, poster_path, sprite_path, duration, layout):
+    """Compiles one ffmpeg command that writes the poster frame and the sprite sheet from a keyframe-only decode."""
+    filters = [
+        "[0:v:0]split=2[poster_in][sprite_in]",
+        f"[poster_in]select='gte(t,{poster_time(duration)})'[poster]",
+        # tile only emits full sheets, so the last keyframe is held long enough to fill the final cell
+        f"[sprite_in]tpad=stop_mode=clone:stop_duration={layout['interval']},fps=1/{layout['interval']},"
+        f"scale={layout['width']}:{layout['height']},setsar=1,tile={layout['columns']}x{layout['rows']}[sprite]",
+    ]
+    return [
+        FFMPEG_PATH,
+        "-skip_frame", "nokey",  # Renders have a keyframe every KEYFRAME_INTERVAL_SECONDS, enough for both
+        "-i", source_path,
+        "-filter_complex", ";".join(filters),
+        "-map", "[poster]", "-frames:v", "1", "-q:v", "3", "-y", poster_path,
+        "-map", "[sprite]", "-frames:v", "1", "-q:v", "5", "-y", sprite_path,
+    ]
+
+
+def _vtt_timestamp(seconds):
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{int(hours):02}:{int(minutes):02}:{seconds:06.3f}"
+
+
+def write_sprite_vtt(vtt_path, sprite_url, layout, duration):
+    """Writes the WebVTT index players use to map a scrub position to its thumbnail in the sprite sheet."""
+    lines = ["WEBVTT", ""]
+    for i in range(layout['count']):
+        start = i * layout['interval']
+        end = min(start + layout['interval'], duration)
+        x = (i % layout['columns']) * layout['width']
+        y = (i // layout['columns']) * layout['height']
+        lines.extend([
+            f"{_vtt_timestamp(start)} --> {_vtt_timestamp(end)}",
+            f"{sprite_url}#xywh={x},{y},{layout['width']},{layout['height']}",
+            ""
+        ])
+    with open(vtt_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+    return vtt_path
+
+
+def generate_previews(source_path, output_dir):
+    """Writes a poster frame and a scrub sprite sheet for a finished video into `output_dir`.
+
+    Returns {'poster', 'sprite', 'layout', 'duration'}, or None if the video could not be read. The WebVTT index is
+    written separately with write_sprite_vtt once the sprite sheet's URL is known.
+    """
+    info = probe_media(source_path)
+    if not info or not info['has_video'] or not info['duration']:
+        logger.error(f"Cannot generate previews for {source_path}: no readable video stream")
+        return None
+
+    duration = info['duration']
+    layout = sprite_layout(duration, info['width'], info['height'])
+    os.makedirs(output_dir, exist_ok=True)
+    poster_path = os.path.join(output_dir, POSTER_NAME)
+    sprite_path = os.path.join(output_dir, SPRITE_NAME)
+
+    started_at = time.monotonic()
+    if not run_ffmpeg_command(compile_previews(source_path, poster_path, sprite_path, duration, layout)):
+        return None
+    # ffmpeg succeeds with an empty output when a branch never produced a frame
+    if not (os.path.exists(poster_path) and os.path.exists(sprite_path)):
+        logger.error(f"Generating previews for {source_path} produced no poster or sprite")
+        return None
+    logger.info(f"Generated poster and {layout['count']}-thumbnail sprite for {source_path} in "
+                f"{time.monotonic() - started_at:.2f}s")
+    return {'poster': poster_path, 'sprite': sprite_path, 'layout': layout, 'duration': duration}
@@ -0,0 +1,133 @@
+import json
+import subprocess
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import FFPROBE_PATH
+from app.utils.video.normalize import EXIF_ORIENTATION
+
+logger = setup_logging()
+
+PROBE_TIMEOUT_SECONDS = 30
+
+
+def _float_or_none(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _frame_rate(rate):
+    # ffprobe reports rates as fractions such as "30000/1001"; "0/0" means unknown
+    try:
+        numerator, _, denominator = rate.partition('/')
+        return round(float(numerator) / float(denominator or 1), 3) or None
+    except (AttributeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def _rotation(stream):
+    # Phones record portrait video as landscape frames plus a rotation, either as a tag or as display matrix side data
+    rotation = _float_or_none(stream.get('tags', {}).get('rotate'))
+    for side_data in stream.get('side_data_list', []):
+        if 'rotation' in side_data:
+            rotation = _float_or_none(side_data['rotation'])
+    return int(rotation or 0) % 360
+
+
+def probe_media(path):
+    """Reads a media file's duration and first video and audio streams with ffprobe.
+
+    Width and height are the displayed size, after rotation. Returns None if the file cannot be probed.
+    """
+    command = [FFPROBE_PATH, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path]
+    try:
+        process = subprocess.run(command, check=True, capture_output=True, text=True, encoding='utf-8',
+                                 errors='replace', timeout=PROBE_TIMEOUT_SECONDS)
+        data = json.loads(process.stdout or '{}')
+    except subprocess.CalledProcessError as e:
+        logger.warning(f"Could not probe {path}: {e.stderr.strip()[-500:]}")
+        return None
+    except (OSError, subprocess.TimeoutExpired, ValueError) as e:
+        logger.warning(f"Could not probe {path}: {e}")
+        return None
+
+    streams = data.get('streams', [])
+    video = next((stream for stream in streams if stream.get('codec_type') == 'video'), None)
+    audio = next((stream for stream in streams if stream.get('codec_type') == 'audio'), None)
+    container = data.get('format', {})
+
+    info = {
+        'duration': _float_or_none(container.get('duration')),
+        'format_name': container.get('format_name'),
+        'bit_rate': _float_or_none(container.get('bit_rate')),
+        'has_video': video is not None,
+        'has_audio': audio is not None,
+        'width': None,
+        'height': None,
+        'video_codec': None,
+        'fps': None,
+        'pix_fmt': None,
+        'sample_aspect_ratio': None,
+        'audio_codec': audio.get('codec_name') if audio else None,
+        'sample_rate': int(audio['sample_rate']) if audio and audio.get('sample_rate') else None,
+        'channels': audio.get('channels') if audio else None,
+    }
+    if video:
+        width, height = video.get('width'), video.get('height')
+        if _rotation(video) in (90, 270):
+            width, height = height, width
+        info.update({
+            'width': width,
+            'height': height,
+            'video_codec': video.get('codec_name'),
+            'fps': _frame_rate(video.get('avg_frame_rate')),
+            'pix_fmt': video.get('pix_fmt'),
+            'sample_aspect_ratio': video.get('sample_aspect_ratio'),
+        })
+    return info
+
+
+def probe_video_packets(path):
+    """Returns (pts_time, is_keyframe) for each packet of a file's first video stream in presentation order, or None.
+
+    Only the container is read, so this is cheap even for long renders.
+    """
+    command = [FFPROBE_PATH, "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time,flags",
+               "-print_format", "json", path]
+    try:
+        process = subprocess.run(command, check=True, capture_output=True, text=True, encoding='utf-8',
+                                 errors='replace', timeout=PROBE_TIMEOUT_SECONDS)
+        packets = json.loads(process.stdout or '{}').get('packets', [])
+    except subprocess.CalledProcessError as e:
+        logger.warning(f"Could not read packets of {path}: {e.stderr.strip()[-500:]}")
+        return None
+    except (OSError, subprocess.TimeoutExpired, ValueError) as e:
+        logger.warning(f"Could not read packets of {path}: {e}")
+        return None
+
+    return sorted(
+        (_float_or_none(packet.get('pts_time')), 'K' in packet.get('flags', ''))
+        for packet in packets if _float_or_none(packet.get('pts_time')) is not None
+    )
+
+
+def describe_image(img):
+    """Returns the metadata of an open Pillow image, with width and height as displayed after EXIF rotation."""
+    width, height = img.size
+    orientation = img.getexif().get(EXIF_ORIENTATION)
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+    return {'width': width, 'height': height, 'format': img.format, 'mode': img.mode, 'orientation': orientation}
+
+
+def matches_output(info, size, fps=None):
+    """Tells whether ingest metadata shows a source already has the output frame size (and frame rate, if given)."""
+    if not info or (info.get('width'), info.get('height')) != tuple(size):
+        return False
+    # ffmpeg decodes images in their stored orientation, not as EXIF says they are displayed
+    if info.get('orientation') not in (None, 1):
+        return False
+    if info.get('sample_aspect_ratio') not in (None, '1:1', '0:1'):
+        return False
+    return fps is None or info.get('fps') == fps
@@ -0,0 +1,119 @@
+import math
+import os
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import (
+    DEFAULT_ENCODER_PROFILE,
+    DEFAULT_OUTPUT_PROFILE,
+    ENCODER_PROFILES,
+    KEYFRAME_INTERVAL_SECONDS,
+    OUTPUT_PROFILES,
+    RENDER_CONCURRENCY,
+    RENDER_CPU_BUDGET,
+    SEGMENT_ENCODER_THREADS,
+)
+
+logger = setup_logging()
+
+
+def _cgroup_cpu_limit():
+    # cgroup v2 exposes "<quota> <period>" (or "max <period>") for containers with a CPU limit
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def get_cpu_budget():
+    if RENDER_CPU_BUDGET:
+        try:
+            return max(1, int(RENDER_CPU_BUDGET))
+        except ValueError:
+            logger.warning(f"Invalid RENDER_CPU_BUDGET '{RENDER_CPU_BUDGET}', auto-detecting instead.")
+
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    cgroup_limit = _cgroup_cpu_limit()
+    return min(cpus, cgroup_limit) if cgroup_limit else cpus
+
+
+def get_encoder_threads():
+    return max(1, get_cpu_budget() // max(RENDER_CONCURRENCY, 1))
+
+
+def output_encoder_threads(output_count):
+    # Every output has its own x264 instance running at the same time, so they share the encoder budget
+    return max(1, get_encoder_threads() // max(output_count, 1))
+
+
+def get_segment_workers(segment_count):
+    # x264 scales poorly on short segments, so the budget goes further as several narrow encodes at once. Each encode
+    # first waits for its own download, so at least two are kept in flight even when the budget is narrow
+    budget_workers = math.ceil(get_encoder_threads() / SEGMENT_ENCODER_THREADS)
+    return max(1, min(segment_count, max(2, budget_workers)))
+
+
+def get_encoder_profile(name=None):
+    name = name or DEFAULT_ENCODER_PROFILE
+    if name not in ENCODER_PROFILES:
+        raise ValueError(f"Unknown encoder profile '{name}'. Available profiles: {', '.join(ENCODER_PROFILES)}")
+    return ENCODER_PROFILES[name]
+
+
+def scale_output_size(width, height, profile_name=None):
+    # libx264 with yuv420p needs even dimensions
+    scale = get_encoder_profile(profile_name)['scale']
+    return max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
+
+
+def get_output_size(output_profile=None, encoder_profile=None):
+    """Returns the (width, height) a render for `output_profile` encodes at, after the encoder profile's scale."""
+    output_profile = output_profile or DEFAULT_OUTPUT_PROFILE
+    if output_profile not in OUTPUT_PROFILES:
+        raise ValueError(
+            f"Unknown output profile '{output_profile}'. Available profiles: {', '.join(OUTPUT_PROFILES)}")
+    return scale_output_size(*OUTPUT_PROFILES[output_profile], encoder_profile)
+
+
+def keyframe_phase(offset):
+    return round(offset, 3) % KEYFRAME_INTERVAL_SECONDS
+
+
+def keyframe_args(offset=0):
+    # Keyframes on a fixed clock let HLS packaging and preview extraction work from keyframes alone. A segment that
+    # starts `offset` seconds into the timeline is put on the timeline's clock, so the joined render stays on it
+    phase = keyframe_phase(offset)
+    if phase:
+        return ["-force_key_frames", f"expr:gte(t+{phase:g},n_forced*{KEYFRAME_INTERVAL_SECONDS})"]
+    return ["-force_key_frames", f"expr:gte(t,n_forced*{KEYFRAME_INTERVAL_SECONDS})"]
+
+
+def ffmpeg_encoder_args(profile_name=None, still_image=False, threads=None, keyframe_offset=0):
+    profile = get_encoder_profile(profile_name)
+    args = [
+        "-c:v", "libx264",
+        "-preset", profile['preset'],
+        "-crf", str(profile['crf']),
+        "-threads", str(threads or get_encoder_threads()),
+        *keyframe_args(keyframe_offset),
+    ]
+    if still_image and profile['tune_still_images']:
+        args.extend(["-tune", "stillimage"])
+    return args
+
+
+def moviepy_writer_options(profile_name=None, threads=None):
+    profile = get_encoder_profile(profile_name)
+    return {
+        'codec': 'libx264',
+        'preset': profile['preset'],
+        'threads': threads or get_encoder_threads(),
+        'ffmpeg_params': ["-crf", str(profile['crf']), *keyframe_args()],
+    }
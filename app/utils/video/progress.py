@@ -0,0 +1,72 @@
+import threading
+import time
+
+from app.config.logging_config import setup_logging
+
+logger = setup_logging()
+
+
+class RenderProgress:
+    """Turns ffmpeg `-progress` output from one or more render stages into task state updates.
+
+    Each stage is registered with the media duration it will output and a weight; the overall percentage is the
+    weighted share of output time produced so far. Stages may report from several threads at once.
+    """
+
+    def __init__(self, task_instance=None, state='RENDERING', status='Rendering video', min_interval=2):
+        self.task_instance = task_instance
+        # Celery's task request is thread-local, so the id is captured here on the task's own thread; encode-pool
+        # threads would otherwise see no request and write their state to task id None
+        self.task_id = task_instance.request.id if task_instance else None
+        self.state = state
+        self.status = status
+        self.min_interval = min_interval
+        self.started_at = time.monotonic()
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._last_update = 0
+        self._last_percent = -1
+
+    def add_stage(self, name, duration, weight=None):
+        with self._lock:
+            duration = max(float(duration or 0), 0.001)
+            self._stages[name] = {'duration': duration, 'weight': float(weight or duration), 'done': 0.0}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def tracker(self, name):
+        """Returns a callback for run_ffmpeg_command that reports the stage's output time in seconds."""
+        return lambda out_time: self.update(name, out_time)
+
+    def percent(self):
+        total_weight = sum(stage['weight'] for stage in self._stages.values())
+        if not total_weight:
+            return 0
+        done = sum(stage['weight'] * min(stage['done'] / stage['duration'], 1) for stage in self._stages.values())
+        return int(done / total_weight * 100)
+
+    def update(self, name, out_time):
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                return
+            stage['done'] = max(stage['done'], out_time)
+            percent = self.percent()
+            now = time.monotonic()
+            if percent == self._last_percent or (now - self._last_update < self.min_interval and percent < 100):
+                return
+            self._last_update = now
+            self._last_percent = percent
+
+        elapsed = now - self.started_at
+        eta = int(elapsed * (100 - percent) / percent) if percent else None
+        logger.info(f"{self.status}: {percent}% (ETA: {eta if eta is not None else '?'}s)")
+        if self.task_instance:
+            self.task_instance.update_state(task_id=self.task_id, state=self.state, meta={
+                'current': percent,
+                'total': 100,
+                'status': f'{self.status}: {percent}%',
+                'eta_seconds': eta
+            })
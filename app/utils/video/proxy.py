@@ -0,0 +1,81 @@
+import json
+import os
+import re
+import shutil
+import time
+from uuid import uuid4
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import PROXY_CACHE_DIR, PROXY_TTL_SECONDS
+
+logger = setup_logging()
+
+_PROXY_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+PROXY_VIDEO_NAME = 'proxy.mp4'
+PROXY_META_NAME = 'timeline.json'
+
+
+def _proxy_dir(proxy_id):
+    # Proxy ids come from URLs, so anything but our own uuid hex is rejected before touching the filesystem
+    if not proxy_id or not _PROXY_ID_PATTERN.match(proxy_id):
+        return None
+    return os.path.join(PROXY_CACHE_DIR, proxy_id)
+
+
+def save_proxy(video_path, user_id, data_dict):
+    """Moves a rendered proxy into the cache together with the timeline it was rendered from."""
+    proxy_id = uuid4().hex
+    proxy_dir = _proxy_dir(proxy_id)
+    os.makedirs(proxy_dir, exist_ok=True)
+    shutil.move(video_path, os.path.join(proxy_dir, PROXY_VIDEO_NAME))
+
+    meta = {
+        'user_id': user_id,
+        'created_at': time.time(),
+        'timeline': data_dict
+    }
+    with open(os.path.join(proxy_dir, PROXY_META_NAME), 'w') as f:
+        json.dump(meta, f)
+
+    logger.info(f"Cached proxy render {proxy_id} for user {user_id}")
+    return proxy_id
+
+
+def load_proxy(proxy_id):
+    """Returns the cached proxy's metadata with its video path, or None if it is unknown or expired."""
+    proxy_dir = _proxy_dir(proxy_id)
+    if not proxy_dir:
+        return None
+
+    try:
+        with open(os.path.join(proxy_dir, PROXY_META_NAME)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if time.time() - meta.get('created_at', 0) > PROXY_TTL_SECONDS:
+        shutil.rmtree(proxy_dir, ignore_errors=True)
+        return None
+
+    meta['video_path'] = os.path.join(proxy_dir, PROXY_VIDEO_NAME)
+    return meta
+
+
+def sweep_expired_proxies():
+    if not os.path.isdir(PROXY_CACHE_DIR):
+        return 0
+
+    removed = 0
+    cutoff = time.time() - PROXY_TTL_SECONDS
+    for proxy_id in os.listdir(PROXY_CACHE_DIR):
+        proxy_dir = os.path.join(PROXY_CACHE_DIR, proxy_id)
+        try:
+            if os.path.getmtime(proxy_dir) < cutoff:
+                shutil.rmtree(proxy_dir, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+
+    if removed:
+        logger.info(f"Removed {removed} expired proxy render(s) from {PROXY_CACHE_DIR}")
+    return removed
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+from uuid import uuid4
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import SEGMENT_CACHE_DIR, SEGMENT_CACHE_MAX_BYTES
+from app.utils.media_cache import file_sha256, link_or_copy
+from app.utils.video.profiles import get_encoder_profile, keyframe_phase
+
+logger = setup_logging()
+
+
+def segment_cache_key(source_path, clip_type, duration, vf_common_options, encoder_profile=None, keyframe_offset=0):
+    # The profile's settings are part of the key, so editing a profile invalidates its cached segments. Keyframes are
+    # placed on the timeline's clock, so a segment is only reused at a position with the same keyframe phase
+    key = {
+        'source': file_sha256(source_path),
+        'type': clip_type,
+        'duration': float(duration),
+        'vf': vf_common_options,
+        'profile': get_encoder_profile(encoder_profile),
+        'keyframe_phase': keyframe_phase(keyframe_offset)
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def _cache_path(cache_key):
+    return os.path.join(SEGMENT_CACHE_DIR, f"{cache_key}.mp4")
+
+
+def fetch_cached_segment(cache_key, output_path):
+    cached_path = _cache_path(cache_key)
+    try:
+        link_or_copy(cached_path, output_path)
+        os.utime(cached_path)  # Mark as recently used for LRU eviction
+        return True
+    except OSError:
+        return False
+
+
+def store_segment(cache_key, segment_path):
+    try:
+        os.makedirs(SEGMENT_CACHE_DIR, exist_ok=True)
+        temp_path = os.path.join(SEGMENT_CACHE_DIR, f".{cache_key}.{uuid4().hex}.tmp")
+        link_or_copy(segment_path, temp_path)
+        os.replace(temp_path, _cache_path(cache_key))
+    except OSError as e:
+        logger.warning(f"Could not cache segment {segment_path}: {e}")
+        return
+    evict_segments()
+
+
+def evict_segments(max_bytes=SEGMENT_CACHE_MAX_BYTES):
+    """Removes least recently used segments until the cache fits in `max_bytes`."""
+    entries = []
+    with os.scandir(SEGMENT_CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith('.mp4'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total_size = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total_size <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total_size -= size
+            removed += 1
+        except OSError:
+            continue
+
+    if removed:
+        logger.info(f"Evicted {removed} cached segment(s), cache size is now {total_size} bytes")
+    return removed
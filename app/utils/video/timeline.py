@@ -0,0 +1,117 @@
+from app.utils.constant import FFMPEG_PATH, VIDEO_FORMAT
+from app.utils.video.probe import matches_output
+from app.utils.video.profiles import ffmpeg_encoder_args, output_encoder_threads
+
+
+def fit_filter(size):
+    """Scales a stream to fit inside `size` and pads it with black to exactly that size."""
+    width, height = size
+    return (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black,setsar=1"
+    )
+
+
+def normalize_filter(size, fps, info=None):
+    """Returns the filters that bring a source to the output frame size, frame rate and pixel format.
+
+    Steps the source's ingest metadata (`info`, from probe_media or describe_image) shows it already satisfies are
+    left out; sources without metadata get every step.
+    """
+    steps = [] if matches_output(info, size) else [fit_filter(size)]
+    if not info or info.get('fps') != fps:
+        steps.append(f"fps={fps}")
+    if not info or info.get('pix_fmt') != VIDEO_FORMAT:
+        steps.append(f"format={VIDEO_FORMAT}")
+    return ",".join(steps) or "null"
+
+
+def split_output_filters(source_label, output_sizes):
+    """Splits `source_label` into one branch per size, each fitted to its size. Returns (filters, labels)."""
+    labels = [f"out{i}" for i in range(len(output_sizes))]
+    if len(output_sizes) == 1:
+        return [f"[{source_label}]{fit_filter(output_sizes[0])}[{labels[0]}]"], labels
+
+    branches = [f"branch{i}" for i in range(len(output_sizes))]
+    filters = [f"[{source_label}]split={len(output_sizes)}" + "".join(f"[{branch}]" for branch in branches)]
+    filters.extend(
+        f"[{branch}]{fit_filter(size)}[{label}]" for branch, size, label in zip(branches, output_sizes, labels)
+    )
+    return filters, labels
+
+
+def compile_timeline(segments, audio_path, total_duration, outputs, vf_common_options, encoder_profile=None):
+    """Compiles a timeline into one ffmpeg command that normalizes, joins and muxes it in a single encode.
+
+    `segments` is a list of {'type': 'image' | 'video', 'path': ..., 'duration': ...} in timeline order; a segment's
+    own 'vf' replaces `vf_common_options` for it.
+    `outputs` is a list of (output_path, (width, height)); the timeline is composed at the first size and split into
+    one scale/pad/encode branch per output, so every source is decoded once however many outputs there are.
+    Every input stays open for the whole render, so very large timelines should use the multi-stage path.
+    """
+    command = [FFMPEG_PATH]
+    filters = []
+    for i, segment in enumerate(segments):
+        if segment['type'] == "image":
+            command.extend(["-loop", "1"])  # Loop input image
+        command.extend(["-t", str(segment['duration']), "-i", segment['path']])
+        filters.append(f"[{i}:v:0]{segment.get('vf') or vf_common_options},setpts=PTS-STARTPTS[v{i}]")
+
+    filters.append("".join(f"[v{i}]" for i in range(len(segments))) + f"concat=n={len(segments)}:v=1:a=0[v]")
+    labels = ["v"]
+    if len(outputs) > 1:
+        # The first output is composed at its own size already, so its branch scales nothing
+        branch_filters, labels = split_output_filters("v", [size for _, size in outputs])
+        filters.extend(branch_filters)
+
+    if audio_path:
+        command.extend(["-i", audio_path])
+
+    command.extend(["-filter_complex", ";".join(filters)])
+
+    all_images = all(segment['type'] == "image" for segment in segments)
+    threads = output_encoder_threads(len(outputs))
+    for (output_path, _), label in zip(outputs, labels):
+        command.extend([
+            "-map", f"[{label}]",
+            *ffmpeg_encoder_args(encoder_profile, still_image=all_images, threads=threads),
+            "-pix_fmt", VIDEO_FORMAT,
+        ])
+
+        if audio_path:
+            command.extend([
+                "-map", f"{len(segments)}:a:0",
+                "-c:a", "aac",
+                "-shortest",  # End when the shorter of video/audio ends
+            ])
+        else:
+            command.append("-an")
+
+        if total_duration is not None:
+            command.extend(["-t", str(total_duration)])
+
+        # The moov atom goes first so playback can start before the whole file has downloaded
+        command.extend(["-movflags", "+faststart", "-y", output_path])
+    return command
+
+
+def compile_output_split(source_path, outputs, encoder_profile=None):
+    """Compiles an ffmpeg command that re-frames a finished render into each of `outputs` in one decode.
+
+    `outputs` is a list of (output_path, (width, height)). The audio track is copied as is.
+    """
+    branch_filters, labels = split_output_filters("0:v:0", [size for _, size in outputs])
+    command = [FFMPEG_PATH, "-i", source_path, "-filter_complex", ";".join(branch_filters)]
+
+    threads = output_encoder_threads(len(outputs))
+    for (output_path, _), label in zip(outputs, labels):
+        command.extend([
+            "-map", f"[{label}]",
+            "-map", "0:a:0?",  # The render may have no audio
+            *ffmpeg_encoder_args(encoder_profile, threads=threads),
+            "-pix_fmt", VIDEO_FORMAT,
+            "-c:a", "copy",
+            "-movflags", "+faststart",
+            "-y", output_path
+        ])
+    return command
@@ -0,0 +1,44 @@
+import numpy as np
+from PIL import Image
+
+
+def compute_zoom_boxes(source_size, duration, fps, zoom_factor):
+    # One crop rectangle (left, top, right, bottom) per output frame, centred and shrinking linearly over the clip
+    width, height = source_size
+    frame_count = max(int(round(duration * fps)), 1)
+    progress = np.arange(frame_count, dtype=np.float64) / fps / duration
+    scale = 1 + (zoom_factor - 1) * progress
+    crop_w = width / scale
+    crop_h = height / scale
+    left = (width - crop_w) / 2
+    top = (height - crop_h) / 2
+    return np.stack([left, top, left + crop_w, top + crop_h], axis=1)
+
+
+class KenBurnsZoom:
+    """Renders a centred zoom-in from a single decoded still.
+
+    The still is decoded once and every frame is a single crop+resize of it straight to the output
+    size, instead of upscaling the whole frame, cropping it back and sometimes resizing it again.
+    """
+
+    def __init__(self, source, duration, fps, zoom_factor, out_size=None, resample=Image.Resampling.BILINEAR):
+        # Resized MoviePy clips can hand back float frames; the encoders take 8-bit RGB
+        self.image = Image.fromarray(np.asarray(source).astype(np.uint8, copy=False))
+        self.out_size = tuple(out_size) if out_size else self.image.size
+        self.resample = resample
+        self.boxes = compute_zoom_boxes(self.image.size, duration, fps, zoom_factor)
+        self._cached_index = None
+        self._cached_frame = None
+
+    @property
+    def frame_count(self):
+        return len(self.boxes)
+
+    def frame(self, index):
+        index = min(max(index, 0), self.frame_count - 1)
+        if index != self._cached_index:
+            resized = self.image.resize(self.out_size, self.resample, box=tuple(self.boxes[index]))
+            self._cached_frame = np.asarray(resized)
+            self._cached_index = index
+        return self._cached_frame
@@ -0,0 +1,186 @@
+import fcntl
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+from contextlib import contextmanager
+
+from app.config.logging_config import setup_logging
+from app.utils.constant import SCRATCH_DIR, SCRATCH_ORPHAN_MAX_AGE_SECONDS, SCRATCH_QUOTA_BYTES, SCRATCH_TMPFS_DIR
+
+logger = setup_logging()
+
+SCRATCH_FOLDER = 'be-tkpm-scratch'
+OWNER_FILE = '.owner'
+LOCK_FILE = '.lock'
+
+
+class ScratchQuotaExceeded(Exception):
+    pass
+
+
+def _free_bytes(path):
+    try:
+        usage = shutil.disk_usage(path)
+        return usage.free if os.access(path, os.W_OK) else 0
+    except OSError:
+        return 0
+
+
+def scratch_roots():
+    if SCRATCH_DIR:
+        return [SCRATCH_DIR]
+    return [os.path.join(SCRATCH_TMPFS_DIR, SCRATCH_FOLDER), os.path.join(tempfile.gettempdir(), SCRATCH_FOLDER)]
+
+
+def _directory_usage(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                continue
+    return total
+
+
+def _outstanding_reservations(root):
+    """Returns the bytes live workspaces under `root` have reserved but not written yet."""
+    outstanding = 0
+    now = time.time()
+    for name in os.listdir(root):
+        workspace_path = os.path.join(root, name)
+        try:
+            if not os.path.isdir(workspace_path) or _is_orphaned(workspace_path, now):
+                continue
+            with open(os.path.join(workspace_path, OWNER_FILE)) as f:
+                quota_bytes = json.load(f).get('quota_bytes', 0)
+        except (OSError, ValueError):
+            continue
+        outstanding += max(0, quota_bytes - _directory_usage(workspace_path))
+    return outstanding
+
+
+@contextmanager
+def _locked_root(root):
+    # Workers on the same host serialize on this lock, so two of them never count on the same free tmpfs space
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK_FILE), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def reserve_scratch_root(quota_bytes=SCRATCH_QUOTA_BYTES):
+    """Yields the root a new workspace goes in; the workspace must be created, with its owner record, inside the block.
+
+    The configured root is used as is. Otherwise tmpfs is chosen when its free space, less what the workspaces already
+    there have reserved but not written yet, still fits a full quota; else the disk temp dir. The owner record holds
+    the workspace's quota, so it is counted against tmpfs from then on.
+    """
+    if SCRATCH_DIR:
+        yield SCRATCH_DIR
+        return
+
+    tmpfs_root, disk_root = scratch_roots()
+    if os.path.isdir(SCRATCH_TMPFS_DIR) and _free_bytes(SCRATCH_TMPFS_DIR) >= quota_bytes:
+        with _locked_root(tmpfs_root):
+            if _free_bytes(SCRATCH_TMPFS_DIR) - _outstanding_reservations(tmpfs_root) >= quota_bytes:
+                yield tmpfs_root
+                return
+    yield disk_root
+
+
+class ScratchWorkspace:
+    """A private directory for one task's intermediates, removed on close even if the task fails.
+
+    Usable as a context manager or through open()/close() from existing try/finally blocks.
+    """
+
+    def __init__(self, task_id=None, quota_bytes=SCRATCH_QUOTA_BYTES):
+        self.task_id = task_id
+        self.quota_bytes = quota_bytes
+        self.path = None
+
+    def open(self):
+        with reserve_scratch_root(self.quota_bytes) as root:
+            os.makedirs(root, exist_ok=True)
+            self.path = tempfile.mkdtemp(prefix=f"{self.task_id or 'task'}-", dir=root)
+            with open(os.path.join(self.path, OWNER_FILE), 'w') as f:
+                json.dump({'pid': os.getpid(), 'host': socket.gethostname(), 'created_at': time.time(),
+                           'quota_bytes': self.quota_bytes}, f)
+        logger.info(f"[Task ID: {self.task_id}] Opened scratch workspace {self.path}")
+        return self
+
+    def close(self):
+        if self.path and os.path.exists(self.path):
+            shutil.rmtree(self.path, ignore_errors=True)
+            logger.debug(f"[Task ID: {self.task_id}] Removed scratch workspace {self.path}")
+        self.path = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    def usage(self):
+        return _directory_usage(self.path)
+
+    def check_quota(self):
+        usage = self.usage()
+        if usage > self.quota_bytes:
+            raise ScratchQuotaExceeded(
+                f"Scratch workspace uses {usage} bytes, over its {self.quota_bytes} byte quota")
+        return usage
+
+
+def _is_orphaned(workspace_path, now):
+    try:
+        with open(os.path.join(workspace_path, OWNER_FILE)) as f:
+            owner = json.load(f)
+    except (OSError, ValueError):
+        # No owner record yet: only reclaim it once it is clearly stale
+        return now - os.path.getmtime(workspace_path) > SCRATCH_ORPHAN_MAX_AGE_SECONDS
+
+    if now - owner.get('created_at', 0) > SCRATCH_ORPHAN_MAX_AGE_SECONDS:
+        return True
+    if owner.get('host') != socket.gethostname():
+        return False
+    try:
+        os.kill(owner['pid'], 0)
+    except ProcessLookupError:
+        return True
+    except (OSError, KeyError, TypeError):
+        return False
+    return False
+
+
+def sweep_orphaned_workspaces():
+    """Removes workspaces left behind by killed workers. Run once when a worker starts."""
+    removed = 0
+    now = time.time()
+    for root in scratch_roots():
+        if not os.path.isdir(root):
+            continue
+        for name in os.listdir(root):
+            workspace_path = os.path.join(root, name)
+            try:
+                if os.path.isdir(workspace_path) and _is_orphaned(workspace_path, now):
+                    shutil.rmtree(workspace_path, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue
+
+    if removed:
+        logger.info(f"Removed {removed} orphaned scratch workspace(s)")
+    return removed
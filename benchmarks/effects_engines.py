@@ -0,0 +1,78 @@
+"""Wall time of the MoviePy and ffmpeg effects engines rendering every supported effect from one still.
+
+    python -m benchmarks.effects_engines [--size 1280x720] [--duration 3] [--fps 24] [--profile final] [--runs 3]
+
+Both engines write the same outputs as process_image_effects does: one MP4 per effect, with the render's encoder
+threads shared between the effects. The best of --runs is reported, so a cold page cache does not count.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from moviepy.editor import ImageClip
+from PIL import Image
+
+from app.utils.constant import DEFAULT_ENCODER_PROFILE, EFFECT_TRANSITION_DURATION, TARGET_FPS, ZOOM_FACTOR
+from app.utils.video.effects import SUPPORTED_EFFECTS, render_effects_single_pass, render_effects_with_ffmpeg
+from app.utils.video.profiles import get_encoder_threads, moviepy_writer_options, output_encoder_threads
+from app.utils.video.zoom import KenBurnsZoom
+from benchmarks.zoom import parse_size, synthetic_still
+
+
+def render_with_moviepy(image_path, size, fps, duration, outputs, encoder_profile):
+    # Mirrors the MoviePy branch of process_image_effects, decode included
+    frame = ImageClip(image_path).get_frame(0)
+    zoom = KenBurnsZoom(frame, duration, fps, ZOOM_FACTOR, out_size=size)
+    return render_effects_single_pass(
+        zoom.frame, zoom.frame_count, zoom.out_size, fps, duration, EFFECT_TRANSITION_DURATION, outputs,
+        write_options=moviepy_writer_options(encoder_profile, output_encoder_threads(len(outputs)))
+    )
+
+
+def render_with_ffmpeg(image_path, size, fps, duration, outputs, encoder_profile):
+    return render_effects_with_ffmpeg(image_path, size, fps, duration, ZOOM_FACTOR, EFFECT_TRANSITION_DURATION,
+                                      outputs, encoder_profile=encoder_profile)
+
+
+ENGINES = {'moviepy': render_with_moviepy, 'ffmpeg': render_with_ffmpeg}
+
+
+def best_wall_time(render, runs, *args):
+    best = None
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        errors = render(*args)
+        elapsed = time.perf_counter() - started_at
+        if errors:
+            raise RuntimeError(f"Render failed: {errors}")
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=parse_size, default=(1280, 720))
+    parser.add_argument('--duration', type=float, default=3)
+    parser.add_argument('--fps', type=int, default=TARGET_FPS)
+    parser.add_argument('--profile', default=DEFAULT_ENCODER_PROFILE)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        image_path = os.path.join(workdir, 'still.png')
+        Image.fromarray(synthetic_still(args.size)).save(image_path)
+        outputs = {effect_type: os.path.join(workdir, f"{effect_type}.mp4") for effect_type in SUPPORTED_EFFECTS}
+        frames = len(outputs) * max(int(round(args.duration * args.fps)), 1)
+
+        print(f"{len(outputs)} effects, {args.size[0]}x{args.size[1]}, {args.duration:g} s at {args.fps} fps, "
+              f"'{args.profile}' profile, {get_encoder_threads()} encoder thread(s)")
+        print(f"{'engine':>8}  {'seconds':>8}  {'frames/s':>8}")
+        for name, render in ENGINES.items():
+            elapsed = best_wall_time(render, args.runs, image_path, args.size, args.fps, args.duration, outputs,
+                                     args.profile)
+            print(f"{name:>8}  {elapsed:>8.2f}  {frames / elapsed:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
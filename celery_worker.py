@@ -1,5 +1,21 @@
+from celery.signals import worker_ready
+
 from app import create_app
 from app.config.extensions import celery
+from app.utils.blob_store import sweep_expired_blobs
+from app.utils.workspace import sweep_orphaned_workspaces
 
 app = create_app()
 app.app_context().push()
+
+
+@worker_ready.connect
+def sweep_scratch_workspaces(**kwargs):
+    # Workspaces of workers killed mid-task (OOM, SIGKILL) are never closed by their own tasks
+    sweep_orphaned_workspaces()
+
+
+@worker_ready.connect
+def sweep_blob_store(**kwargs):
+    # Uploads whose tasks were lost before releasing them would otherwise stay on the shared volume forever
+    sweep_expired_blobs()
@@ -0,0 +1,48 @@
+import unittest
+
+from flask import Flask
+
+from app.config.extensions import db
+from app.models import Audio
+
+
+class AudioPeaksTest(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        Audio.__table__.create(db.engine)
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+
+    def _reload(self, audio):
+        db.session.add(audio)
+        db.session.commit()
+        audio_id = audio.id
+        db.session.expunge_all()
+        return db.session.get(Audio, audio_id)
+
+    def test_audio_without_peaks_has_no_peaks(self):
+        audio = self._reload(Audio(user_id=1, url='https://example.com/a.mp3'))
+        self.assertFalse(audio.has_peaks)
+        self.assertIsNone(audio.peaks)
+        self.assertFalse(audio.to_dict()['has_peaks'])
+
+    def test_audio_without_media_info_is_not_matched_as_probed(self):
+        self._reload(Audio(user_id=1, url='https://example.com/a.mp3'))
+        probed = Audio.query.filter(Audio.media_info.isnot(None)).all()
+        self.assertEqual(probed, [])
+
+    def test_audio_with_peaks_has_peaks(self):
+        peaks = {'sample_rate': 44100, 'levels': [[0, 1]]}
+        audio = self._reload(Audio(user_id=1, url='https://example.com/a.mp3', peaks=peaks))
+        self.assertTrue(audio.has_peaks)
+        self.assertEqual(audio.peaks, peaks)
+
+
+if __name__ == '__main__':
+    unittest.main()
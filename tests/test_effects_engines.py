@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from moviepy.editor import VideoFileClip
+from PIL import Image, ImageDraw
+
+from app.utils.video.effects import SUPPORTED_EFFECTS, render_effects_single_pass, render_effects_with_ffmpeg
+from app.utils.video.profiles import moviepy_writer_options
+from app.utils.video.zoom import KenBurnsZoom
+
+SIZE = (320, 180)
+FPS = 24
+DURATION = 2
+ZOOM_FACTOR = 1.3
+TRANSITION_DURATION = 0.5
+# Mean absolute difference per channel value (0-255) allowed between the engines' frames. Both go through lossy x264
+# and resample differently (about 2-3 apart), while a fade or slide one frame off is already about 10 apart
+MAX_MEAN_DIFFERENCE = 5
+
+
+def _write_test_image(path):
+    # Gradients and hard edges, so a misplaced zoom or slide shows up as a large difference
+    x = np.linspace(0, 255, SIZE[0], dtype=np.uint8)
+    y = np.linspace(0, 255, SIZE[1], dtype=np.uint8)
+    pixels = np.stack([np.tile(x, (SIZE[1], 1)), np.tile(y[:, None], (1, SIZE[0])),
+                       np.full((SIZE[1], SIZE[0]), 128, dtype=np.uint8)], axis=2)
+    img = Image.fromarray(pixels)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((40, 40, 120, 140), fill=(255, 255, 255))
+    draw.ellipse((200, 30, 290, 120), fill=(0, 0, 0))
+    img.save(path)
+    return np.asarray(img)
+
+
+def _read_frames(path):
+    clip = VideoFileClip(path)
+    try:
+        return [frame.astype(np.int16) for frame in clip.iter_frames()]
+    finally:
+        clip.close()
+
+
+class EffectsEnginesParityTest(unittest.TestCase):
+    """Renders every effect with both engines and compares the decoded frames."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.TemporaryDirectory()
+        image_path = os.path.join(cls.workdir.name, 'source.png')
+        pixels = _write_test_image(image_path)
+
+        cls.moviepy_outputs = {effect_type: os.path.join(cls.workdir.name, f"moviepy_{effect_type}.mp4")
+                               for effect_type in SUPPORTED_EFFECTS}
+        cls.ffmpeg_outputs = {effect_type: os.path.join(cls.workdir.name, f"ffmpeg_{effect_type}.mp4")
+                              for effect_type in SUPPORTED_EFFECTS}
+
+        zoom = KenBurnsZoom(pixels, DURATION, FPS, ZOOM_FACTOR)
+        cls.moviepy_errors = render_effects_single_pass(
+            zoom.frame, zoom.frame_count, zoom.out_size, FPS, DURATION, TRANSITION_DURATION, cls.moviepy_outputs,
+            write_options=moviepy_writer_options()
+        )
+        cls.ffmpeg_errors = render_effects_with_ffmpeg(
+            image_path, SIZE, FPS, DURATION, ZOOM_FACTOR, TRANSITION_DURATION, cls.ffmpeg_outputs
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.workdir.cleanup()
+
+    def test_both_engines_render_every_effect(self):
+        self.assertEqual(self.moviepy_errors, {})
+        self.assertEqual(self.ffmpeg_errors, {})
+
+    def test_frames_match(self):
+        for effect_type in SUPPORTED_EFFECTS:
+            with self.subTest(effect=effect_type):
+                moviepy_frames = _read_frames(self.moviepy_outputs[effect_type])
+                ffmpeg_frames = _read_frames(self.ffmpeg_outputs[effect_type])
+                self.assertEqual(len(moviepy_frames), DURATION * FPS)
+                self.assertEqual(len(ffmpeg_frames), len(moviepy_frames))
+                for index, (expected, actual) in enumerate(zip(moviepy_frames, ffmpeg_frames)):
+                    difference = np.abs(expected - actual).mean()
+                    self.assertLess(difference, MAX_MEAN_DIFFERENCE, f"frame {index} differs by {difference:.2f}")
+
+
+if __name__ == '__main__':
+    unittest.main()
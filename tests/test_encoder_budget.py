@@ -0,0 +1,32 @@
+import unittest
+from unittest import mock
+
+from app.utils.video import profiles
+
+
+class EncoderBudgetTest(unittest.TestCase):
+    def _budget(self, cpu_budget, render_concurrency):
+        return mock.patch.multiple(profiles, RENDER_CPU_BUDGET=str(cpu_budget), RENDER_CONCURRENCY=render_concurrency)
+
+    def test_encoder_threads_split_the_budget_between_renders(self):
+        with self._budget(16, 2):
+            self.assertEqual(profiles.get_encoder_threads(), 8)
+        with self._budget(4, 8):
+            self.assertEqual(profiles.get_encoder_threads(), 1)
+
+    def test_segments_are_encoded_in_parallel(self):
+        for cpu_budget, render_concurrency, expected_workers in ((16, 2, 4), (8, 2, 2), (4, 2, 2), (2, 2, 2),
+                                                                 (6, 2, 2), (10, 2, 3)):
+            with self.subTest(cpu_budget=cpu_budget, render_concurrency=render_concurrency), \
+                    self._budget(cpu_budget, render_concurrency):
+                self.assertEqual(profiles.get_segment_workers(20), expected_workers)
+
+    def test_segment_workers_never_exceed_the_segments(self):
+        with self._budget(16, 2):
+            self.assertEqual(profiles.get_segment_workers(3), 3)
+            self.assertEqual(profiles.get_segment_workers(1), 1)
+            self.assertEqual(profiles.get_segment_workers(0), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import stat
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+from app.utils import function_helpers
+
+
+class Interrupted(BaseException):
+    """Stands in for a worker shutdown or hard time limit landing while the progress loop runs."""
+
+
+class FfmpegProgressTest(unittest.TestCase):
+    """Runs stand-in ffmpeg scripts that print -progress output and ignore their arguments."""
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.workdir.cleanup)
+
+    def _fake_ffmpeg(self, body):
+        path = os.path.join(self.workdir.name, 'ffmpeg')
+        with open(path, 'w') as f:
+            f.write(f"#!/bin/sh\n{body}\n")
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        return path
+
+    def _run(self, command, progress_callback, processes):
+        """Runs `command` through run_ffmpeg_command, appending the process it starts to `processes`."""
+        popen = subprocess.Popen
+
+        def record_popen(*args, **kwargs):
+            processes.append(popen(*args, **kwargs))
+            return processes[-1]
+
+        with mock.patch.object(subprocess, 'Popen', record_popen):
+            return function_helpers.run_ffmpeg_command(command, progress_callback)
+
+    def test_progress_is_reported_in_seconds(self):
+        fake_ffmpeg = self._fake_ffmpeg("echo out_time_us=1500000\necho out_time_ms=3000000\necho progress=end")
+        reported = []
+        processes = []
+        self.assertTrue(self._run([fake_ffmpeg, "-y", "out.mp4"], reported.append, processes))
+        self.assertEqual(reported, [1.5, 3.0])
+        self.assertTrue(processes[0].stdout.closed)
+
+    def test_interrupted_read_loop_kills_ffmpeg(self):
+        fake_ffmpeg = self._fake_ffmpeg("while true; do echo out_time_us=1000000; sleep 0.1; done")
+
+        def interrupt(out_time_seconds):
+            raise Interrupted()
+
+        processes = []
+        with self.assertRaises(Interrupted):
+            self._run([fake_ffmpeg, "-y", "out.mp4"], interrupt, processes)
+        # Killed and reaped, not left running behind the task
+        self.assertIsNotNone(processes[0].returncode)
+        self.assertNotEqual(processes[0].returncode, 0)
+        self.assertTrue(processes[0].stdout.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
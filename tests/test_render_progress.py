@@ -0,0 +1,46 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app.utils.video.progress import RenderProgress
+
+
+class FakeTask:
+    """Mimics Celery's thread-local `request`: only the thread that started the task sees its id."""
+
+    def __init__(self, task_id):
+        self._local = threading.local()
+        self._local.request = SimpleNamespace(id=task_id)
+        self.updates = []
+
+    @property
+    def request(self):
+        return getattr(self._local, 'request', SimpleNamespace(id=None))
+
+    def update_state(self, task_id=None, state=None, meta=None):
+        self.updates.append({'task_id': task_id or self.request.id, 'state': state, 'meta': meta})
+
+
+class RenderProgressTest(unittest.TestCase):
+    def test_update_from_worker_thread_reports_to_the_task(self):
+        task = FakeTask('task-1')
+        progress = RenderProgress(task, min_interval=0)
+        progress.add_stage('segment_0', 10)
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(progress.tracker('segment_0'), 5).result()
+
+        self.assertEqual(len(task.updates), 1)
+        self.assertEqual(task.updates[0]['task_id'], 'task-1')
+        self.assertEqual(task.updates[0]['meta']['current'], 50)
+
+    def test_progress_without_task_only_logs(self):
+        progress = RenderProgress(min_interval=0)
+        progress.add_stage('timeline', 4)
+        progress.update('timeline', 4)
+        self.assertEqual(progress.percent(), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
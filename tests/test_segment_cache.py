@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from app.utils import function_helpers
+from app.utils.video import segment_cache
+
+SIZE = (64, 36)
+
+
+def _copy_media(url, destination, progress_callback=None):
+    # Clip URLs in these timelines are local files
+    shutil.copyfile(url, destination)
+    return {'url': url}
+
+
+@unittest.skipUnless(shutil.which(function_helpers.FFMPEG_PATH), "ffmpeg is not installed")
+class SegmentCacheReuseTest(unittest.TestCase):
+    """Renders the same timeline twice with the segment cache enabled."""
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.workdir.name, 'segments')
+        self.timeline = {'clips': [], 'totalDuration': 2}
+        for i, color in enumerate(((255, 0, 0), (0, 0, 255))):
+            image_path = os.path.join(self.workdir.name, f"clip_{i}.png")
+            Image.new('RGB', SIZE, color).save(image_path)
+            self.timeline['clips'].append({'id': f"clip{i}", 'type': 'image', 'sourceUrl': image_path,
+                                           'startTime': i, 'duration': 1})
+
+        patches = [
+            mock.patch.object(function_helpers, 'fetch_media', _copy_media),
+            mock.patch.object(function_helpers, 'SEGMENT_CACHE_MAX_BYTES', 1024 ** 3),
+            mock.patch.object(segment_cache, 'SEGMENT_CACHE_DIR', self.cache_dir),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.workdir.cleanup)
+
+    def _render(self):
+        """Renders the timeline, returning the segment encodes it ran and how many segments came from the cache."""
+        commands = []
+        cache_hits = []
+        run_ffmpeg_command = function_helpers.run_ffmpeg_command
+        fetch_cached_segment = function_helpers.fetch_cached_segment
+
+        def record_command(command_list, progress_callback=None):
+            commands.append(command_list)
+            return run_ffmpeg_command(command_list, progress_callback)
+
+        def record_cache_hit(cache_key, output_path):
+            fetched = fetch_cached_segment(cache_key, output_path)
+            if fetched:
+                cache_hits.append(cache_key)
+            return fetched
+
+        with mock.patch.object(function_helpers, 'run_ffmpeg_command', record_command), \
+                mock.patch.object(function_helpers, 'fetch_cached_segment', record_cache_hit):
+            outputs = function_helpers.create_video(self.timeline, workspace=mock.Mock(path=self.workdir.name))
+        self.assertTrue(outputs)
+        for output_path in outputs.values():
+            self.assertTrue(os.path.exists(output_path))
+
+        # Segment encodes are the only commands that loop a still image
+        segment_encodes = [command for command in commands if "-loop" in command]
+        return segment_encodes, len(cache_hits)
+
+    def test_second_render_reuses_cached_segments(self):
+        clip_count = len(self.timeline['clips'])
+        segment_encodes, cache_hits = self._render()
+        self.assertEqual(len(segment_encodes), clip_count)
+        self.assertEqual(cache_hits, 0)
+
+        segment_encodes, cache_hits = self._render()
+        self.assertEqual(segment_encodes, [])
+        self.assertEqual(cache_hits, clip_count)
+
+
+if __name__ == '__main__':
+    unittest.main()